@@ -0,0 +1,163 @@
+"""
+Local-folding (RNAplfold-style) accessibility profiles for long transcripts.
+
+For each sequence RNA.pfl_fold_up is run with a sliding ``window`` (RNAplfold -W), maximum base
+pair ``span`` (-L) and segment lengths up to ``max_u`` (-u). The result is kept as an (n, max_u)
+float16 array P, P[i, u - 1] = probability that the segment [i, i + u) is unpaired (0-based, NaN
+past the end), stored as one .npy per sequence hash and parameter set so it is computed once.
+Window queries give P(unpaired) or the opening energy ED = -RT ln P of any site up to max_u nt.
+
+    acc = AccessibilityProfiles(window=150, span=100, max_u=30)   # IntaRNA's default W / L
+    acc.compute_many(mrnas.values(), workers=8)
+    acc.unpaired(seq)                        # (n,) per-nucleotide unpaired probability
+    acc.site_ed(seq, 120, 135)               # ED of positions 120 .. 134
+    acc.window_ed(seq, 7)                    # ED of every 7-nt window, e.g. seed sites
+    seeds = annotate_seeds(seeds, targets, acc, k=7)     # seed_prefilter output + target_ED
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from seq_intern import seq_hash
+
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / 'data' / '.accessibility_cache'
+RT = 0.61632077549          # kcal/mol at 37 C, as ViennaRNA
+MIN_FOLD_LEN = 5            # shortest sequence that can form a base pair
+
+
+def unpaired_profile(seq: str, window: int = 150, span: int = 100, max_u: int = 30) -> np.ndarray:
+    """(n, max_u) float16, [i, u - 1] = P(segment [i, i + u) unpaired) from RNA.pfl_fold_up."""
+    import RNA
+    n = len(seq)
+    P = np.full((n, max_u), np.nan, dtype=np.float32)
+    if n < MIN_FOLD_LEN:
+        # no base pair fits (minimum hairpin of 3), and pfl_fold_up corrupts the heap on such inputs
+        for u in range(1, min(max_u, n) + 1):
+            P[:n - u + 1, u - 1] = 1.0
+        return P.astype(np.float16)
+    u_max = min(max_u, n)
+    # pfl_fold_up is 1-based and indexed by segment end: X[e][u] = P([e - u + 1, e] unpaired)
+    X = np.array(RNA.pfl_fold_up(str(seq).upper().replace('T', 'U'), u_max, min(window, n), min(span, n)))
+    for u in range(1, u_max + 1):
+        P[:n - u + 1, u - 1] = X[u:n + 1, u]
+    return P.astype(np.float16)
+
+
+def _profile_job(job):
+    return unpaired_profile(*job)
+
+
+class AccessibilityProfiles:
+    """Unpaired-probability profiles cached by sequence hash for one (window, span, max_u) setting."""
+
+    def __init__(self, cache_dir=None, window: int = 150, span: int = 100, max_u: int = 30):
+        self.window, self.span, self.max_u = window, span, max_u
+        self.root = Path(cache_dir or CACHE_DIR) / f'W{window}_L{span}_u{max_u}'
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._profiles = {}
+
+    def _path(self, h: str) -> Path:
+        return self.root / f'{h}.npy'
+
+    def _get_cached(self, h: str):
+        if h not in self._profiles and self._path(h).exists():
+            self._profiles[h] = np.load(self._path(h), mmap_mode='r')
+        return self._profiles.get(h)
+
+    def _save(self, h: str, P: np.ndarray):
+        tmp = self.root / f'{h}.tmp.npy'
+        np.save(tmp, P)
+        tmp.replace(self._path(h))
+        self._profiles[h] = np.load(self._path(h), mmap_mode='r')
+
+    def profile(self, seq: str) -> np.ndarray:
+        h = seq_hash(seq)
+        P = self._get_cached(h)
+        if P is None:
+            P = unpaired_profile(seq, self.window, self.span, self.max_u)
+            self._save(h, P)
+        return P
+
+    def compute_many(self, seqs, workers: int = None, chunksize: int = 4) -> list:
+        """Profiles of all ``seqs`` (in order); each distinct uncached sequence is folded once in a process pool."""
+        seqs = list(seqs)
+        hashes = [seq_hash(s) for s in seqs]
+        todo = {h: s for h, s in zip(hashes, seqs) if self._get_cached(h) is None}
+        if todo:
+            jobs = [(s, self.window, self.span, self.max_u) for s in todo.values()]
+            if workers == 1 or len(jobs) == 1:
+                for h, job in zip(todo, jobs):
+                    self._save(h, unpaired_profile(*job))
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    for h, P in zip(todo, pool.map(_profile_job, jobs, chunksize=chunksize)):
+                        self._save(h, P)
+        return [self._profiles[h] for h in hashes]
+
+    def unpaired(self, seq: str) -> np.ndarray:
+        return np.asarray(self.profile(seq)[:, 0], dtype=np.float32)
+
+    def site_unpaired(self, seq: str, start: int, end: int) -> float:
+        """P([start, end) unpaired), NaN if the site runs past the sequence; at most max_u nt long."""
+        u = end - start
+        if not 0 < u <= self.max_u:
+            raise ValueError(f'Site length {u} outside 1 .. max_u={self.max_u}')
+        P = self.profile(seq)
+        # profiles cached before max_u was kept for short sequences have only n columns
+        if start < 0 or end > len(P) or u > P.shape[1]:
+            return float('nan')
+        return float(P[start, u - 1])
+
+    def site_ed(self, seq: str, start: int, end: int) -> float:
+        return -RT * np.log(np.maximum(self.site_unpaired(seq, start, end), 1e-30))
+
+    def window_unpaired(self, seq: str, size: int) -> np.ndarray:
+        """P(unpaired) of every window [s, s + size), s = 0 .. n - size."""
+        if not 0 < size <= self.max_u:
+            raise ValueError(f'Window size {size} outside 1 .. max_u={self.max_u}')
+        P = self.profile(seq)
+        if size > min(len(P), P.shape[1]):
+            return np.zeros(0, dtype=np.float32)
+        return np.asarray(P[:len(P) - size + 1, size - 1], dtype=np.float32)
+
+    def window_ed(self, seq: str, size: int) -> np.ndarray:
+        return -RT * np.log(np.maximum(self.window_unpaired(seq, size), 1e-30))
+
+
+def annotate_seeds(seeds: pd.DataFrame, targets: dict, profiles: AccessibilityProfiles, k: int,
+                   max_ed: float = None) -> pd.DataFrame:
+    """
+    Add the ED of each seed's target site (seed_prefilter columns target / target_pos, ``k`` nt) as
+    target_ED, and drop seeds whose site is harder to open than ``max_ed`` if given.
+    """
+    seeds = seeds.copy()
+    ed = np.full(len(seeds), np.nan, dtype=np.float32)
+    for name, idx in seeds.groupby('target', sort=False).indices.items():
+        ed[idx] = profiles.window_ed(targets[name], k)[seeds['target_pos'].to_numpy()[idx]]
+    seeds['target_ED'] = ed
+    if max_ed is not None:
+        seeds = seeds[seeds['target_ED'] <= max_ed].reset_index(drop=True)
+    return seeds
+
+
+def test_unpaired_profile(tmp_path):
+    import RNA
+    rng = np.random.default_rng(0)
+    seq = ''.join(rng.choice(list('ACGU'), 60))
+    # window and span covering the whole sequence: the global partition function's unpaired probabilities
+    P = unpaired_profile(seq, window=len(seq), span=len(seq), max_u=8)
+    fc = RNA.fold_compound(seq)
+    fc.pf()
+    bpp = np.array(fc.bpp())[1:, 1:]
+    assert np.allclose(P[:, 0], 1 - bpp.sum(axis=0) - bpp.sum(axis=1), atol=2e-3)
+    assert np.isnan(P[-7:, 7]).all() and not np.isnan(P[:-7, 7]).any()
+
+    for n in range(1, MIN_FOLD_LEN):
+        P = unpaired_profile('ACGU'[:n], max_u=8)
+        assert P.shape == (n, 8) and (P[:n, 0] == 1).all() and np.isnan(P[:, n:]).all()
+
+    acc = AccessibilityProfiles(tmp_path, max_u=8)
+    assert acc.site_unpaired('ACG', 0, 3) == 1 and np.isnan(acc.site_unpaired('ACG', 1, 4))
+    assert len(acc.window_unpaired('ACG', 4)) == 0 and np.isnan(acc.site_ed(seq, 55, 63))
@@ -0,0 +1,194 @@
+"""
+Alias -> canonical gene name index over sRNATarBase, RNAInter and EcoCyc, for joining the tables
+by gene without splitting alias lists row by row.
+
+Canonical names are the short gene symbols used by sRNATarBase ('sRNA' / 'Target') and RNAInter
+('Interactor1.Symbol' / 'Interactor2.Symbol'). Every alias points to one of them: sRNATarBase's
+'; '-separated alias lists (synonyms, ECK / JW ids) and NCBI gene ids, RNAInter raw ids (NCBI:...), and EcoCyc's
+'//'-separated Names with b-numbers and ECK ids. An EcoCyc entry joins the canonical name one of
+its names already resolves to, otherwise its shortest single-word name becomes canonical.
+Aliases are matched case-insensitively (srna_db.normalise_alias); when an alias is claimed by
+several genes a canonical symbol wins over a plain alias, then the first source. Canonical symbols
+differing only in case (ryhB / RyhB) are one gene, named as in the first source that has it.
+
+    index = AliasIndex.build()                            # or AliasIndex.load_or_build()
+    df['target_gene'] = index.resolve(df['Target'])       # NaN where unknown
+    index.resolve(pd.Series(['ECK1232', 'osmZ', 'NCBI:946724']))   # -> hns, hns, acnA
+    index.aliases('hns')
+"""
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from srna_db import SOURCES, normalise_alias
+
+
+FN_ALIAS_INDEX = SOURCES['merged'].parent / 'alias_index.parquet'
+ALIAS_COLUMNS = ['alias_norm', 'alias', 'canonical', 'source', 'priority']
+ALIAS_SOURCES = ('sRNATarBase', 'RNAInter', 'EcoCyc')      # the SOURCES tables the index is built from
+
+
+def _normalise(s: pd.Series) -> pd.Series:
+    return s.astype('string').str.strip().str.lower()
+
+
+def _explode_aliases(canonical: pd.Series, aliases: pd.Series, sep: str, source: str) -> pd.DataFrame:
+    """(alias, canonical) rows from a column of ``sep``-separated alias lists."""
+    df = pd.DataFrame({'canonical': canonical.to_numpy(),
+                       'alias': aliases.astype('string').str.split(sep).to_numpy()}).explode('alias')
+    df['alias'] = df['alias'].astype('string').str.strip()
+    df = df[df['alias'].notna() & (df['alias'] != '') & (df['alias'].str.lower() != 'nan')]
+    return df.assign(source=source, priority=1)
+
+
+def _symbols(symbols: pd.Series, source: str) -> pd.DataFrame:
+    symbols = symbols.dropna().astype('string').str.strip()
+    return pd.DataFrame({'canonical': symbols.to_numpy(), 'alias': symbols.to_numpy(), 'source': source,
+                         'priority': 0})
+
+
+def tarbase_aliases(fn=SOURCES['sRNATarBase']) -> pd.DataFrame:
+    df = pd.read_csv(fn)
+    parts = []
+    for k in ('sRNA', 'Target'):
+        parts.append(_symbols(df[k], 'sRNATarBase'))
+        parts.append(_explode_aliases(df[k], df[f'{k} Alias'], ';', 'sRNATarBase'))
+        # 'chromosome:NC_000913.3, Gene ID:945829' -> 'NCBI:945829', RNAInter's Raw_ID form
+        gene_ids = 'NCBI:' + df[f'{k} ID'].astype('string').str.extract(r'Gene ID:\s*(\d+)', expand=False)
+        parts.append(_explode_aliases(df[k], gene_ids, ';', 'sRNATarBase'))
+    return pd.concat(parts, ignore_index=True)
+
+
+def rnainter_aliases(fn=SOURCES['RNAInter']) -> pd.DataFrame:
+    df = pd.read_csv(fn, usecols=['Interactor1.Symbol', 'Interactor2.Symbol', 'Raw_ID1', 'Raw_ID2'])
+    parts = []
+    for i in (1, 2):
+        parts.append(_symbols(df[f'Interactor{i}.Symbol'], 'RNAInter'))
+        parts.append(_explode_aliases(df[f'Interactor{i}.Symbol'], df[f'Raw_ID{i}'], ';', 'RNAInter'))
+    return pd.concat(parts, ignore_index=True)
+
+
+def ecocyc_names(df: pd.DataFrame) -> list:
+    """Per EcoCyc row: its '//'-separated Names, then Common-Name, b-number, ECK id and gene id."""
+    out = []
+    for common, names, acc1, acc2, gene in zip(df['Common-Name'], df['Names'], df['Accession-1'],
+                                                df['Accession-2'], df['Gene']):
+        names = [a.strip() for a in names.split('//') if a.strip()] if isinstance(names, str) else []
+        out.append((names, names + [a for a in (common, acc1, acc2, gene) if isinstance(a, str)]))
+    return out
+
+
+def ecocyc_canonical(df: pd.DataFrame, known: dict = None) -> list:
+    """
+    Canonical gene symbol of every EcoCyc row: the ``known`` canonical name (normalised alias ->
+    canonical) one of its names resolves to, otherwise its shortest single-word name.
+    """
+    known = known or {}
+    out = []
+    for common, (names, aliases) in zip(df['Common-Name'], ecocyc_names(df)):
+        canonical = next((known[normalise_alias(a)] for a in aliases if normalise_alias(a) in known), None)
+        if canonical is None:
+            words = [a for a in names if ' ' not in a and '<' not in a]
+            canonical = min(words, key=len) if words else common
+        out.append(canonical)
+    return out
+
+
+def ecocyc_aliases(fn=SOURCES['EcoCyc'], known: dict = None) -> pd.DataFrame:
+    """EcoCyc names and accessions, attached to a ``known`` canonical name where one of them resolves."""
+    df = pd.read_csv(fn, index_col=0)
+    rows = [(canonical, a, 'EcoCyc', 1)
+            for canonical, (_, aliases) in zip(ecocyc_canonical(df, known), ecocyc_names(df)) for a in aliases]
+    return pd.DataFrame(rows, columns=['canonical', 'alias', 'source', 'priority'])
+
+
+def _collapse_case(table: pd.DataFrame) -> pd.DataFrame:
+    """One spelling per canonical symbol: the first seen, in source order."""
+    table['canonical'] = table['canonical'].astype('string')
+    table['canonical'] = table.groupby(_normalise(table['canonical']), dropna=False)['canonical'].transform('first')
+    return table
+
+
+def known_symbols(sources: dict = None) -> dict:
+    """Normalised alias -> canonical symbol from sRNATarBase and RNAInter, which EcoCyc entries join."""
+    sources = {**SOURCES, **(sources or {})}
+    table = pd.concat([tarbase_aliases(sources['sRNATarBase']), rnainter_aliases(sources['RNAInter'])],
+                      ignore_index=True)
+    table = _collapse_case(table)
+    return dict(zip(_normalise(table['alias']), table['canonical']))
+
+
+class AliasIndex:
+    """Sorted alias table; ``mapping`` is a normalised alias -> canonical Series."""
+
+    def __init__(self, table: pd.DataFrame):
+        self.table = table.reset_index(drop=True)
+        first = self.table.drop_duplicates('alias_norm')
+        self.mapping = pd.Series(first['canonical'].to_numpy(), index=pd.Index(first['alias_norm'].to_numpy()))
+        n_targets = self.table.groupby('alias_norm')['canonical'].nunique()
+        self.ambiguous = n_targets.index[n_targets > 1]
+
+    @classmethod
+    def build(cls, sources: dict = None) -> 'AliasIndex':
+        sources = {**SOURCES, **(sources or {})}
+        table = _collapse_case(pd.concat([tarbase_aliases(sources['sRNATarBase']),
+                                          rnainter_aliases(sources['RNAInter'])], ignore_index=True))
+        known = dict(zip(_normalise(table['alias']), table['canonical']))
+        table = pd.concat([table, ecocyc_aliases(sources['EcoCyc'], known)], ignore_index=True)
+        table['alias_norm'] = _normalise(table['alias'])
+        table = _collapse_case(table)
+        table = table.drop_duplicates(['alias_norm', 'canonical', 'source'])
+        # canonical symbols first, then source order (sRNATarBase, RNAInter, EcoCyc)
+        table = table.sort_values(['alias_norm', 'priority'], kind='stable')
+        return cls(table[ALIAS_COLUMNS])
+
+    @classmethod
+    def load_or_build(cls, fn=FN_ALIAS_INDEX, sources: dict = None) -> 'AliasIndex':
+        """The persisted index, rebuilt (and saved) if missing or older than a source table."""
+        sources = {**SOURCES, **(sources or {})}
+        fn = Path(fn)
+        if fn.exists() and all(Path(sources[k]).stat().st_mtime < fn.stat().st_mtime for k in ALIAS_SOURCES):
+            return cls.load(fn)
+        index = cls.build(sources)
+        index.save(fn)
+        return index
+
+    def save(self, fn=FN_ALIAS_INDEX):
+        self.table.to_parquet(fn, index=False)
+
+    @classmethod
+    def load(cls, fn=FN_ALIAS_INDEX) -> 'AliasIndex':
+        return cls(pd.read_parquet(fn))
+
+    def __len__(self):
+        return len(self.mapping)
+
+    def resolve(self, names: pd.Series, keep_unresolved: bool = False) -> pd.Series:
+        """Canonical gene for every entry of ``names`` (NaN, or the input with keep_unresolved, if unknown)."""
+        names = pd.Series(names)
+        pos = self.mapping.index.get_indexer(_normalise(names).fillna(''))
+        out = pd.Series(np.where(pos >= 0, self.mapping.to_numpy()[pos], None), index=names.index,
+                        dtype='string', name=names.name)
+        return out.fillna(names.astype('string')) if keep_unresolved else out
+
+    def aliases(self, canonical: str) -> list:
+        """Aliases of a canonical symbol (any case)."""
+        match = _normalise(self.table['canonical']) == canonical.strip().lower()
+        return self.table.loc[match.fillna(False), 'alias'].unique().tolist()
+
+
+def test_alias_index_resolve():
+    index = AliasIndex.build()
+    names = pd.Series(['ECK1232', 'osmZ', 'NCBI:946724', 'HNS', ' hns ', 'RyhB', 'ryhb', 'no-such-gene'])
+    assert index.resolve(names).tolist() == ['hns', 'hns', 'acnA', 'hns', 'hns', 'ryhB', 'ryhB', pd.NA]
+    assert index.resolve(names, keep_unresolved=True).iloc[-1] == 'no-such-gene'
+
+
+def test_alias_index_load_or_build(tmp_path):
+    fn = tmp_path / 'alias_index.parquet'
+    merged = tmp_path / 'merged.csv'
+    index = AliasIndex.load_or_build(fn, {'merged': merged})
+    saved = fn.stat().st_mtime_ns
+    merged.write_text('')                   # newer, but not a source of the alias index
+    assert len(AliasIndex.load_or_build(fn, {'merged': merged})) == len(index)
+    assert fn.stat().st_mtime_ns == saved
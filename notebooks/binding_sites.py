@@ -0,0 +1,158 @@
+"""
+Validated binding sites as interval arrays, and batch overlap queries against predicted sites.
+
+sRNATarBase stores binding positions as stringified lists, one entry per evidence, each entry a
+'; '-separated list of 'start..end' ranges, 1-based inclusive and relative to the gene (targets:
+1 = A of the start codon, negative = upstream, no position 0), e.g. "['7..19', 'NA', '7..19; 401..411']".
+Parenthesised curator notes are dropped and 'NA' / 'n.d' entries skipped, as in notebook 04.
+
+A SiteIndex keeps all intervals of many (sRNA, target) pairs sorted in one array, with pairs laid
+end to end on a single axis and a running maximum of interval ends, so the intervals overlapping a
+query are found with two searchsorted calls; a batch of thousands of predictions is one vectorised pass.
+
+    sites = parse_binding_positions(tarbase, 'Target Binding Position', keys=('sRNA', 'Target'))
+    sites = to_sequence_index(sites, anchor=utr_lengths)       # gene-relative -> 0-based sequence index
+    index = SiteIndex(sites)
+    pred = intarna_sites(read_intarna_csv('inter_data_raw.csv'))    # (sRNA, Target, start, end) of the target side
+    acc = index.accuracy(pred)                                  # per prediction: overlap_nt, jaccard, hit
+"""
+import numpy as np
+import pandas as pd
+
+
+SITE_COLUMNS = ['row', 'entry', 'start', 'end']
+_RANGE = r'(?P<start>-?\d+)\s*\.\.\s*(?P<end>-?\d+)'
+
+
+def parse_binding_positions(df: pd.DataFrame, column: str, keys=('sRNA', 'Target')) -> pd.DataFrame:
+    """
+    One row per binding range in ``df[column]``: ``keys`` columns, the source row label, the list
+    entry it came from, and start / end (int64, as written: 1-based inclusive, gene-relative).
+    """
+    raw = df[column].astype('string').str.replace(r'\s*\([^)]*\)', '', regex=True)
+    entries = raw.str.strip('[]').str.split(r"'\s*,\s*'", regex=True).explode()
+    # one row per list entry, numbered within its source row
+    entries = entries.to_frame('entry_str').assign(entry=lambda e: e.groupby(level=0).cumcount())
+    entries = entries.reset_index(names='row')
+    found = entries['entry_str'].str.extractall(_RANGE).reset_index(level=1, drop=True)
+    if found.empty:
+        return pd.DataFrame(columns=list(keys) + SITE_COLUMNS)
+    sites = entries[['row', 'entry']].loc[found.index].assign(
+        start=found['start'].astype(np.int64).to_numpy(), end=found['end'].astype(np.int64).to_numpy())
+    key_values = df.loc[sites['row'], list(keys)].to_numpy()
+    for i, k in enumerate(keys):
+        sites.insert(i, k, key_values[:, i])
+    return sites.reset_index(drop=True)
+
+
+def to_sequence_index(sites: pd.DataFrame, anchor, key: str = 'Target') -> pd.DataFrame:
+    """
+    Gene-relative 1-based inclusive ranges -> 0-based inclusive indices into a sequence where the
+    gene's position 1 is at index ``anchor`` (a scalar, or a mapping / Series from ``key``, e.g. the
+    length of the sequence before the start codon). Position p > 0 -> anchor + p - 1, p < 0 -> anchor + p.
+    """
+    a = pd.Series(sites[key]).map(anchor).to_numpy() if not np.isscalar(anchor) else anchor
+    out = sites.copy()
+    for col in ('start', 'end'):
+        p = sites[col].to_numpy()
+        out[col] = np.where(p > 0, a + p - 1, a + p)
+    return out.dropna(subset=['start', 'end']).astype({'start': np.int64, 'end': np.int64})
+
+
+def intarna_sites(df: pd.DataFrame, side: str = 'target') -> pd.DataFrame:
+    """(sRNA, Target, start, end) of IntaRNA rows (id1 = target, id2 = sRNA query, 0-based inclusive)."""
+    i = 1 if side == 'target' else 2
+    return pd.DataFrame({'sRNA': df['id2'].astype(str).to_numpy(), 'Target': df['id1'].astype(str).to_numpy(),
+                         'start': df[f'start{i}'].to_numpy(np.int64), 'end': df[f'end{i}'].to_numpy(np.int64)},
+                        index=df.index)
+
+
+class SiteIndex:
+    """
+    Static interval index over the validated sites of many (sRNA, target) pairs (inclusive ranges).
+    Coordinates are used as given, so sites and queries must share a contiguous frame such as the
+    0-based sequence indices of to_sequence_index.
+    """
+
+    def __init__(self, sites: pd.DataFrame, keys=('sRNA', 'Target')):
+        self.keys = list(keys)
+        self.sites = sites.reset_index(drop=True)
+        codes, self.pairs = pd.MultiIndex.from_frame(self.sites[self.keys].astype(str)).factorize()
+        start, end = self.sites['start'].to_numpy(np.int64), self.sites['end'].to_numpy(np.int64)
+        start, end = np.minimum(start, end), np.maximum(start, end)
+        self._span = int(max(np.abs(start).max(initial=0), np.abs(end).max(initial=0))) * 2 + 4
+        gstart, gend = self._to_axis(codes, start), self._to_axis(codes, end)
+        order = np.lexsort((gend, gstart))
+        self.order = order                              # sorted position -> row of ``sites``
+        self.start, self.end = gstart[order], gend[order]
+        self.max_end = np.maximum.accumulate(self.end) if len(self.end) else self.end
+
+    def _to_axis(self, codes: np.ndarray, pos: np.ndarray) -> np.ndarray:
+        """Place each pair in its own stretch of one axis, so intervals of different pairs never overlap."""
+        return codes.astype(np.int64) * self._span + pos + self._span // 2
+
+    def _codes(self, queries: pd.DataFrame) -> np.ndarray:
+        return self.pairs.get_indexer(pd.MultiIndex.from_frame(queries[self.keys].astype(str)))
+
+    def overlaps(self, queries: pd.DataFrame) -> pd.DataFrame:
+        """
+        Every (query, site) pair of overlapping intervals of the same (sRNA, target): query row
+        position, site row in ``sites`` and the overlap length in nt. Lengths are end - start + 1, so
+        gene-relative ranges (no position 0) spanning the start codon would count one nt too many:
+        convert both sides with to_sequence_index first.
+        """
+        codes = self._codes(queries)
+        qs, qe = queries['start'].to_numpy(np.int64), queries['end'].to_numpy(np.int64)
+        qs, qe = np.minimum(qs, qe), np.maximum(qs, qe)
+        # sites lie within +-(half - 1), so clipping queries to +-half keeps every overlap and adds none
+        half = self._span // 2 - 1
+        qs, qe = np.clip(qs, -half, half), np.clip(qe, -half, half)
+        q = np.flatnonzero(codes >= 0)
+        gs, ge = self._to_axis(codes[q], qs[q]), self._to_axis(codes[q], qe[q])
+        # candidates: sites starting at or before the query end whose running max end reaches its start
+        lo = np.searchsorted(self.max_end, gs, side='left')
+        hi = np.searchsorted(self.start, ge, side='right')
+        n = np.maximum(hi - lo, 0)
+        qi = np.repeat(np.arange(len(q)), n)
+        si = np.repeat(lo, n) + (np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n))
+        hit = self.end[si] >= gs[qi]
+        qi, si = qi[hit], si[hit]
+        overlap = np.minimum(ge[qi], self.end[si]) - np.maximum(gs[qi], self.start[si]) + 1
+        return pd.DataFrame({'query': q[qi], 'site': self.order[si], 'overlap_nt': overlap})
+
+    def accuracy(self, queries: pd.DataFrame) -> pd.DataFrame:
+        """
+        Per query: whether its pair has validated sites, the best overlap (nt) and Jaccard index with
+        any of them, and hit = overlap_nt > 0. Indexed like ``queries``, in the same coordinates as
+        the sites (see overlaps).
+        """
+        pairs = self.overlaps(queries)
+        qlen = np.abs(queries['end'].to_numpy(np.int64) - queries['start'].to_numpy(np.int64)) + 1
+        slen = (self.sites['end'] - self.sites['start']).abs().to_numpy() + 1
+        pairs['jaccard'] = pairs['overlap_nt'] / (qlen[pairs['query']] + slen[pairs['site']] - pairs['overlap_nt'])
+        best = pairs.groupby('query')[['overlap_nt', 'jaccard']].max()
+        out = pd.DataFrame({'validated': self._codes(queries) >= 0, 'overlap_nt': 0, 'jaccard': 0.0},
+                           index=queries.index)
+        out.iloc[best.index, 1] = best['overlap_nt'].to_numpy()
+        out.iloc[best.index, 2] = best['jaccard'].to_numpy()
+        out['hit'] = out['overlap_nt'] > 0
+        return out
+
+
+def test_site_index_overlaps():
+    rng = np.random.default_rng(0)
+
+    def random_sites(n):
+        start = rng.integers(-60, 60, n)
+        return pd.DataFrame({'sRNA': rng.choice(['ryhB', 'sgrS'], n), 'Target': rng.choice(['sodB', 'ptsG', 'x'], n),
+                             'start': start, 'end': start + rng.integers(-5, 20, n)})
+
+    sites, queries = random_sites(200), random_sites(300)
+    queries.loc[:9, 'start'] += 10_000                          # far outside every site
+    expected = sorted(
+        (q, s, min(max(qa, qb), max(sa, sb)) - max(min(qa, qb), min(sa, sb)) + 1)
+        for q, (qr, qt, qa, qb) in enumerate(queries.itertuples(index=False))
+        for s, (sr, st, sa, sb) in enumerate(sites.itertuples(index=False))
+        if (qr, qt) == (sr, st) and min(max(qa, qb), max(sa, sb)) >= max(min(qa, qb), min(sa, sb)))
+    found = SiteIndex(sites).overlaps(queries)
+    assert sorted(found.itertuples(index=False, name=None)) == expected
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+atom_table.py — Parse a Boltz-2 CIF/PDB structure once into a columnar NumPy atom table.
+
+The table holds one array per column (coords float32, chain/resname/atom name as
+categorical codes, residue index, ...) and is cached next to the structure as an
+uncompressed ``<file>.atoms.npz`` sidecar, so re-opening a large complex (e.g. the
+Hfq hexamer + mRNA jobs) skips text parsing entirely. The sidecar is rebuilt
+whenever the source file size or mtime changes.
+
+Usage:
+    from atom_table import load_atom_table
+    table = load_atom_table("pred_model_0.cif")
+    table.chains, table.chain_types()
+
+    python atom_table.py pred_model_0.cif pred_model_1.pdb   # build sidecars + print summary
+"""
+from pathlib import Path
+import argparse
+import re
+import numpy as np
+
+NUC_NAMES = {"A","U","G","C","DA","DT","DG","DC","I","DI","5MC","PSU"}
+AA3 = {"ALA","ARG","ASN","ASP","CYS","GLN","GLU","GLY","HIS","ILE","LEU","LYS","MET","PHE","PRO","SER","THR","TRP","TYR","VAL"}
+RNA_RESN = {"A","U","G","C","I","PSU","5MC"}
+DNA_RESN = {"DA","DT","DG","DC","DI"}
+WATER_RESN = {"HOH","WAT"}
+KINDS = ("protein", "rna", "dna", "ligand", "water")
+
+SIDECAR_SUFFIX = ".atoms.npz"
+SIDECAR_VERSION = 1
+
+# (name in table, dtype) for numeric columns; categorical columns are stored as <name>_code + <name>s
+_NUMERIC = (("coords", np.float32), ("res_index", np.int32), ("resseq", np.int32),
+            ("bfactor", np.float32), ("occupancy", np.float32), ("model", np.int16), ("het", bool))
+_CATEGORICAL = ("chain", "resname", "atom_name", "element", "icode", "altloc")
+
+# mmCIF tokens: quoted strings may contain spaces and primes (e.g. "O5'")
+_CIF_TOKEN = re.compile(r"""'(?:[^']|'(?!\s|$))*'|"(?:[^"]|"(?!\s|$))*"|\S+""")
+
+
+def resname_kind(resname: str) -> str:
+    """Return one of KINDS for a residue name (same rules as cif_to_pdb.residue_kind, minus Biopython's is_aa)."""
+    name = resname.strip().upper()
+    if name in WATER_RESN:
+        return "water"
+    if name in AA3:
+        return "protein"
+    if name in RNA_RESN:
+        return "rna"
+    if name in DNA_RESN:
+        return "dna"
+    return "ligand"
+
+
+def _factorize(values):
+    """Categorical codes in order of first occurrence (keeps chain order as in the file)."""
+    lookup = {}
+    codes = np.fromiter((lookup.setdefault(v, len(lookup)) for v in values), dtype=np.int32, count=len(values))
+    categories = np.array(list(lookup), dtype=str) if lookup else np.array([], dtype="<U1")
+    return codes, categories
+
+
+class AtomTable:
+    """Columnar atom table. Categorical columns are ``<col>_code`` (int32) indexing into ``<col>s``."""
+
+    def __init__(self, columns: dict):
+        self._columns = columns
+        for k, v in columns.items():
+            setattr(self, k, v)
+
+    def __len__(self):
+        return int(self.coords.shape[0])
+
+    @property
+    def n_residues(self) -> int:
+        return int(self.res_index.max()) + 1 if len(self) else 0
+
+    def select(self, mask) -> "AtomTable":
+        """Subset of atoms (categories are kept, residue indices re-numbered from 0)."""
+        cols = {}
+        for k, v in self._columns.items():
+            cols[k] = v if k.endswith("s") and k[:-1] in _CATEGORICAL else v[mask]
+        if len(cols["res_index"]):
+            _, cols["res_index"] = np.unique(cols["res_index"], return_inverse=True)
+            cols["res_index"] = cols["res_index"].astype(np.int32)
+        return AtomTable(cols)
+
+    def first_model(self) -> "AtomTable":
+        if not len(self) or (self.model == self.model[0]).all():
+            return self
+        return self.select(self.model == self.model[0])
+
+    def resname_kinds(self) -> np.ndarray:
+        """Kind (index into KINDS) for every residue name category."""
+        return np.array([KINDS.index(resname_kind(r)) for r in self.resnames], dtype=np.int8)
+
+    def atom_kinds(self) -> np.ndarray:
+        """Kind (index into KINDS) for every atom."""
+        kinds = self.resname_kinds()
+        if not len(self):
+            return np.zeros(0, dtype=np.int8)
+        return kinds[self.resname_code]
+
+    def chain_types(self) -> dict:
+        """chain -> 'RNA' / 'Protein' / 'Other', by counting nucleotide vs amino-acid atoms (as the viewers do)."""
+        is_nuc = np.isin(self.resnames, list(NUC_NAMES))[self.resname_code]
+        is_aa = np.isin(self.resnames, list(AA3))[self.resname_code]
+        n_chains = len(self.chains)
+        nucl = np.bincount(self.chain_code, weights=is_nuc, minlength=n_chains)
+        aa = np.bincount(self.chain_code, weights=is_aa, minlength=n_chains)
+        types = {}
+        for c, n, a in zip(self.chains.tolist(), nucl, aa):
+            types[c] = "RNA" if n > a else ("Protein" if a > 0 else "Other")
+        return types
+
+    def residues(self) -> dict:
+        """Per-residue columns (in file order): first atom, chain code, resseq, icode, resname code."""
+        first = np.flatnonzero(np.r_[True, self.res_index[1:] != self.res_index[:-1]]) if len(self) else np.zeros(0, int)
+        return {
+            "first_atom": first,
+            "chain_code": self.chain_code[first],
+            "resseq": self.resseq[first],
+            "icode": self.icodes[self.icode_code[first]] if len(first) else np.array([], dtype=str),
+            "resname_code": self.resname_code[first],
+        }
+
+    def to_npz(self, path, **meta):
+        np.savez(path, **self._columns, **{f"_{k}": v for k, v in meta.items()})
+
+
+def _build(rows: dict) -> AtomTable:
+    """rows: dict of python lists with keys x,y,z,chain,resseq,icode,resname,atom_name,element,altloc,bfactor,occupancy,model,het."""
+    n = len(rows["x"])
+    cols = {"coords": np.column_stack([np.asarray(rows[k], dtype=np.float32) for k in "xyz"]).reshape(n, 3)}
+    for c in _CATEGORICAL:
+        cols[f"{c}_code"], cols[f"{c}s"] = _factorize(rows[c])
+    cols["resseq"] = np.asarray(rows["resseq"], dtype=np.int32)
+    cols["bfactor"] = np.asarray(rows["bfactor"], dtype=np.float32)
+    cols["occupancy"] = np.asarray(rows["occupancy"], dtype=np.float32)
+    cols["model"] = np.asarray(rows["model"], dtype=np.int16)
+    cols["het"] = np.asarray(rows["het"], dtype=bool)
+    # residue = consecutive atoms sharing (model, chain, resseq, icode)
+    if n:
+        key = np.stack([cols["model"].astype(np.int64), cols["chain_code"], cols["resseq"], cols["icode_code"]], axis=1)
+        new_res = np.r_[True, (key[1:] != key[:-1]).any(axis=1)]
+        cols["res_index"] = (np.cumsum(new_res) - 1).astype(np.int32)
+    else:
+        cols["res_index"] = np.zeros(0, dtype=np.int32)
+    return AtomTable(cols)
+
+
+def _float(s, default=0.0):
+    try:
+        return float(s)
+    except ValueError:
+        return default
+
+
+def parse_pdb_text(text: str) -> AtomTable:
+    rows = {k: [] for k in ("x","y","z","chain","resseq","icode","resname","atom_name","element","altloc","bfactor","occupancy","model","het")}
+    model = 1
+    for line in text.splitlines():
+        if line.startswith("MODEL"):
+            model = int(line[10:14].strip() or model)
+            continue
+        if not (line.startswith("ATOM") or line.startswith("HETATM")):
+            continue
+        if len(line) < 54:
+            continue
+        rows["het"].append(line.startswith("HETATM"))
+        rows["atom_name"].append(line[12:16].strip())
+        rows["altloc"].append(line[16:17].strip())
+        rows["resname"].append(line[17:20].strip().upper())
+        rows["chain"].append(line[21:22])
+        rows["resseq"].append(int(line[22:26]))
+        rows["icode"].append(line[26:27].strip())
+        rows["x"].append(float(line[30:38]))
+        rows["y"].append(float(line[38:46]))
+        rows["z"].append(float(line[46:54]))
+        rows["occupancy"].append(_float(line[54:60], 1.0))
+        rows["bfactor"].append(_float(line[60:66]))
+        rows["element"].append(line[76:78].strip().upper() if len(line) >= 78 else line[12:16].strip()[:1])
+        rows["model"].append(model)
+    return _build(rows)
+
+
+def parse_cif_text(text: str) -> AtomTable:
+    """Parse the ``_atom_site`` loop of an mmCIF file (auth_* ids preferred, like Biopython and 3Dmol)."""
+    lines = text.splitlines()
+    fields = []
+    i = 0
+    while i < len(lines):
+        if lines[i].startswith("_atom_site."):
+            while i < len(lines) and lines[i].startswith("_atom_site."):
+                fields.append(lines[i].split()[0][len("_atom_site."):])
+                i += 1
+            break
+        i += 1
+    col = {f: j for j, f in enumerate(fields)}
+
+    def pick(*names):
+        return next((col[n] for n in names if n in col), None)
+
+    c_group = pick("group_PDB")
+    c_x, c_y, c_z = pick("Cartn_x"), pick("Cartn_y"), pick("Cartn_z")
+    c_chain = pick("auth_asym_id", "label_asym_id")
+    c_seq = pick("auth_seq_id", "label_seq_id")
+    c_icode = pick("pdbx_PDB_ins_code")
+    c_resn = pick("auth_comp_id", "label_comp_id")
+    c_atom = pick("auth_atom_id", "label_atom_id")
+    c_elem = pick("type_symbol")
+    c_alt = pick("label_alt_id")
+    c_b = pick("B_iso_or_equiv")
+    c_occ = pick("occupancy")
+    c_model = pick("pdbx_PDB_model_num")
+
+    def get(tok, c, default=""):
+        if c is None:
+            return default
+        v = tok[c]
+        if v in (".", "?"):
+            return default
+        if v[0] in "'\"":
+            v = v[1:-1]
+        return v
+
+    rows = {k: [] for k in ("x","y","z","chain","resseq","icode","resname","atom_name","element","altloc","bfactor","occupancy","model","het")}
+    tokens = []
+    for line in lines[i:]:
+        if not line.strip():
+            continue
+        if line.startswith(("_", "#", "loop_", "data_")):
+            break
+        tokens.extend(_CIF_TOKEN.findall(line))
+        if len(tokens) < len(fields):
+            continue  # row continues on the next line
+        tok, tokens = tokens[:len(fields)], tokens[len(fields):]
+        rows["het"].append(get(tok, c_group, "ATOM") == "HETATM")
+        rows["x"].append(float(tok[c_x]))
+        rows["y"].append(float(tok[c_y]))
+        rows["z"].append(float(tok[c_z]))
+        rows["chain"].append(get(tok, c_chain))
+        rows["resseq"].append(int(_float(get(tok, c_seq, "0"))))
+        rows["icode"].append(get(tok, c_icode))
+        rows["resname"].append(get(tok, c_resn).upper())
+        rows["atom_name"].append(get(tok, c_atom))
+        rows["element"].append(get(tok, c_elem).upper())
+        rows["altloc"].append(get(tok, c_alt))
+        rows["bfactor"].append(_float(get(tok, c_b, "0")))
+        rows["occupancy"].append(_float(get(tok, c_occ, "1"), 1.0))
+        rows["model"].append(int(get(tok, c_model, "1")))
+    return _build(rows)
+
+
+def parse_structure_text(text: str, fmt: str) -> AtomTable:
+    fmt = fmt.lower().lstrip(".")
+    if fmt in ("cif", "mmcif"):
+        return parse_cif_text(text)
+    if fmt in ("pdb", "ent"):
+        return parse_pdb_text(text)
+    raise ValueError(f"Unknown structure format: {fmt}")
+
+
+def sidecar_path(path) -> Path:
+    p = Path(path)
+    return p.with_name(p.name + SIDECAR_SUFFIX)
+
+
+def _read_sidecar(sc: Path, size: int, mtime_ns: int):
+    try:
+        with np.load(sc, allow_pickle=False) as z:
+            if (int(z["_version"]) != SIDECAR_VERSION or int(z["_source_size"]) != size
+                    or int(z["_source_mtime_ns"]) != mtime_ns):
+                return None
+            return AtomTable({k: z[k] for k in z.files if not k.startswith("_")})
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def load_atom_table(path, *, cache: bool = True, text: str = None) -> AtomTable:
+    """
+    Load a .cif/.mmcif/.pdb file as an AtomTable, reusing the ``.atoms.npz`` sidecar when it is fresh.
+    Pass ``text`` if the file contents are already in memory (avoids a second read on a cache miss).
+    """
+    p = Path(path)
+    st = p.stat()
+    sc = sidecar_path(p)
+    if cache and sc.exists():
+        table = _read_sidecar(sc, st.st_size, st.st_mtime_ns)
+        if table is not None:
+            return table
+    if text is None:
+        text = p.read_text(encoding="utf-8", errors="ignore")
+    table = parse_structure_text(text, p.suffix)
+    if cache:
+        try:
+            table.to_npz(sc, version=SIDECAR_VERSION, source_size=st.st_size, source_mtime_ns=st.st_mtime_ns)
+        except OSError:
+            pass  # read-only results dir: still usable, just not cached
+    return table
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build cached atom-table sidecars for Boltz-2 CIF/PDB outputs.")
+    ap.add_argument("inputs", nargs="+", help="Structure files (.cif/.mmcif/.pdb)")
+    ap.add_argument("--rebuild", action="store_true", help="Ignore existing sidecars.")
+    args = ap.parse_args()
+    for pth in args.inputs:
+        p = Path(pth)
+        if not p.exists():
+            raise SystemExit(f"Input not found: {p}")
+        if args.rebuild and sidecar_path(p).exists():
+            sidecar_path(p).unlink()
+        table = load_atom_table(p)
+        types = table.chain_types()
+        print(f"{p.name}: {len(table)} atoms, {table.n_residues} residues, "
+              + " ".join(f"{c}:{t}" for c, t in types.items()))
+
+
+if __name__ == "__main__":
+    main()
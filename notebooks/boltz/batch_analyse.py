@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+batch_analyse.py — Interface and confidence statistics for every Boltz-2 prediction in a results folder.
+
+Walks ``<results>/boltz_results_*/predictions/*/`` and, for each ``<job>_model_N.cif``, loads the
+structure (cached atom table), ``confidence_<job>_model_N.json``, ``pae_<job>_model_N.npz`` and
+``plddt_<job>_model_N.npz``. Models are processed in parallel and written as one tidy table with
+one row per (job, model, chain pair):
+
+    job, model, chain_a, chain_b, type_a, type_b, cutoff,
+    n_residue_contacts, n_atom_contacts, n_interface_res_a, n_interface_res_b, min_dist,
+    pae_mean (whole chain-pair block, both directions), pae_interface (contacting residues only),
+    plddt_a, plddt_b, plddt_interface_a, plddt_interface_b, pair_iptm,
+    + every scalar from confidence.json (ptm, iptm, complex_plddt, ...)
+
+Usage:
+    python batch_analyse.py --results results --out boltz_interfaces.parquet --cutoff 5 --workers 8
+"""
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import re
+import sys
+import zipfile
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))  # notebooks/boltz: shared atom table
+from atom_table import KINDS, load_atom_table
+from interface import InterfaceFinder, summarise
+
+MODEL_RE = re.compile(r"^(?P<job>.+)_model_(?P<model>\d+)$")
+
+
+def find_predictions(results_dir) -> list:
+    """One dict of file paths per predicted model."""
+    found = []
+    for pred_dir in sorted(Path(results_dir).glob("boltz_results_*/predictions/*")):
+        if not pred_dir.is_dir():
+            continue
+        for struct in sorted(list(pred_dir.glob("*_model_*.cif")) + list(pred_dir.glob("*_model_*.pdb"))):
+            m = MODEL_RE.match(struct.stem)
+            if not m:
+                continue
+            stem = struct.stem
+            found.append({
+                "job": m["job"], "model": int(m["model"]), "structure": struct,
+                "confidence": pred_dir / f"confidence_{stem}.json",
+                "pae": pred_dir / f"pae_{stem}.npz",
+                "plddt": pred_dir / f"plddt_{stem}.npz",
+            })
+    return found
+
+
+def token_map(table):
+    """
+    Map residues to Boltz tokens: one token per polymer residue, one per atom for ligands.
+    Returns (token chain codes, first token of every residue).
+    """
+    res = table.residues()
+    kinds = table.resname_kinds()[res["resname_code"]]
+    atoms_per_res = np.diff(np.r_[res["first_atom"], len(table)])
+    n_tok = np.where(kinds == KINDS.index("ligand"), atoms_per_res, 1)
+    first_token = np.r_[0, np.cumsum(n_tok)[:-1]]
+    return np.repeat(res["chain_code"], n_tok), first_token
+
+
+def _load_npz(path, key):
+    if not Path(path).exists():
+        return None
+    with np.load(path) as z:
+        return z[key] if key in z else None
+
+
+def analyse_model(pred: dict, cutoff: float = 5.0) -> list:
+    """Rows (dicts) for every chain pair of one predicted model."""
+    table = load_atom_table(pred["structure"]).first_model()
+    finder = InterfaceFinder(table)
+    chains = table.chains.tolist()
+    types = table.chain_types()
+
+    conf = {}
+    if Path(pred["confidence"]).exists():
+        conf = json.loads(Path(pred["confidence"]).read_text())
+    conf_scalars = {k: v for k, v in conf.items() if isinstance(v, (int, float))}
+    pair_iptm = conf.get("pair_chains_iptm", {})
+
+    pae = _load_npz(pred["pae"], "pae")
+    plddt = _load_npz(pred["plddt"], "plddt")
+    tok_chain, first_token = token_map(table)
+    n_tok = len(tok_chain)
+    if pae is not None and pae.shape[0] != n_tok:
+        print(f"[warn] {pred['structure'].name}: PAE n={pae.shape[0]} != {n_tok} tokens, skipping PAE")
+        pae = None
+    if plddt is not None and plddt.shape[0] != n_tok:
+        print(f"[warn] {pred['structure'].name}: pLDDT n={plddt.shape[0]} != {n_tok} tokens, skipping pLDDT")
+        plddt = None
+
+    def mean_over(vec, mask):
+        return float(vec[mask].mean()) if vec is not None and mask.any() else np.nan
+
+    rows = []
+    for ia, a in enumerate(chains):
+        for b in chains[ia + 1:]:
+            ib = chains.index(b)
+            contacts = finder.contacts(a, b, cutoff)
+            row = {"job": pred["job"], "model": pred["model"], "chain_a": a, "chain_b": b,
+                   "type_a": types[a], "type_b": types[b], "cutoff": cutoff}
+            row.update(summarise(contacts))
+            ta, tb = tok_chain == ia, tok_chain == ib
+            if pae is not None:
+                row["pae_mean"] = float((pae[np.ix_(ta, tb)].mean() + pae[np.ix_(tb, ta)].mean()) / 2)
+                ra, rb = first_token[contacts["res_a"]], first_token[contacts["res_b"]]
+                row["pae_interface"] = float(((pae[ra, rb] + pae[rb, ra]) / 2).mean()) if len(ra) else np.nan
+            else:
+                row["pae_mean"] = row["pae_interface"] = np.nan
+            row["plddt_a"], row["plddt_b"] = mean_over(plddt, ta), mean_over(plddt, tb)
+            if plddt is not None and len(contacts["res_a"]):
+                row["plddt_interface_a"] = float(plddt[first_token[np.unique(contacts["res_a"])]].mean())
+                row["plddt_interface_b"] = float(plddt[first_token[np.unique(contacts["res_b"])]].mean())
+            else:
+                row["plddt_interface_a"] = row["plddt_interface_b"] = np.nan
+            row["pair_iptm"] = pair_iptm.get(str(ia), {}).get(str(ib), np.nan)
+            row.update(conf_scalars)
+            rows.append(row)
+    return rows
+
+
+# unreadable or truncated prediction files; anything else is a bug and propagates
+READ_ERRORS = (OSError, ValueError, KeyError, zipfile.BadZipFile)
+
+
+def _analyse(args):
+    pred, cutoff = args
+    try:
+        return analyse_model(pred, cutoff), None
+    except READ_ERRORS as e:
+        return [], f"{type(e).__name__}: {e}"
+
+
+def analyse_results(results_dir, cutoff: float = 5.0, workers: int = None, failures: list = None) -> pd.DataFrame:
+    """
+    One table over all predictions. Models whose files cannot be read are skipped and appended to
+    ``failures`` as (structure path, error) if a list is given.
+    """
+    preds = find_predictions(results_dir)
+    if not preds:
+        return pd.DataFrame()
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for pred, (model_rows, error) in zip(preds, pool.map(_analyse, [(p, cutoff) for p in preds])):
+            rows += model_rows
+            if error is not None and failures is not None:
+                failures.append((pred["structure"], error))
+    return pd.DataFrame(rows)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Batch interface / pAE / pLDDT statistics over all Boltz-2 predictions.")
+    ap.add_argument("--results", default="results", help="Folder containing boltz_results_* directories.")
+    ap.add_argument("--out", default="boltz_interfaces.parquet", help="Output table (.parquet, or .csv).")
+    ap.add_argument("--cutoff", type=float, default=5.0, help="Contact distance cutoff in Å.")
+    ap.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores).")
+    args = ap.parse_args()
+
+    failures = []
+    df = analyse_results(args.results, cutoff=args.cutoff, workers=args.workers, failures=failures)
+    for structure, error in failures:
+        print(f"[error] {structure}: {error}", file=sys.stderr)
+    if df.empty:
+        raise SystemExit(f"No predictions analysed under {Path(args.results).resolve()}")
+    out = Path(args.out)
+    if out.suffix == ".csv":
+        df.to_csv(out, index=False)
+    else:
+        df.to_parquet(out, index=False)
+    print(f"Wrote {len(df)} rows for {df[['job', 'model']].drop_duplicates().shape[0]} models to {out.resolve()}")
+    if failures:
+        raise SystemExit(f"{len(failures)} model(s) could not be read, see above")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,25 +17,20 @@ from typing import List, Set, Tuple, Dict
 # Requires: pip install biopython
 from Bio.PDB import MMCIFParser, PDBIO, Select, is_aa
 
-RNA_RESN = {"A","U","G","C","I","PSU","5MC"}
-DNA_RESN = {"DA","DT","DG","DC","DI"}
+# Residue-name classification is shared with the viewers (atom_table.py, same folder)
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from atom_table import resname_kind
 
 def residue_kind(res):
     """Return one of: 'protein','rna','dna','water','ligand'."""
     het, resseq, icode = res.id
-    name = res.get_resname().strip().upper()
-    if het == 'W' or name in {"HOH","WAT"}:
+    kind = resname_kind(res.get_resname())
+    if het == 'W':
         return "water"
-    if is_aa(res, standard=False):
+    # Modified amino acids (MSE, ...) are only recognised by Biopython's extended table
+    if kind == "ligand" and is_aa(res, standard=False):
         return "protein"
-    if name in RNA_RESN:
-        return "rna"
-    if name in DNA_RESN:
-        return "dna"
-    if het.strip() != "":
-        return "ligand"
-    # Fallbacks: many modified nucleotides present in CIFs; treat unknown HETNA* as ligand.
-    return "ligand"
+    return kind
 
 class AltlocBestByOcc(Select):
     """
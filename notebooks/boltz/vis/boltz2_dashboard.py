@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+boltz2_dashboard.py — One HTML page to browse many Boltz-2 predictions.
+
+Instead of one multi-MB self-contained page per prediction (boltz2_struct_viewer.py), this writes
+the viewer template once and stores every prediction (CIF + PAE/PDE/pLDDT + confidence) as its own
+payload chunk that is only loaded when selected in the page's "Prediction" dropdown:
+
+    out_dir/index.html              viewer template + run list
+    out_dir/data/<job>_model_N.json one payload per prediction, fetched on demand
+    out_dir/data/<job>_model_N_tiles/  full-resolution PAE/PDE tiles (--tile-size / --compact), fetched on zoom
+
+Browsers block fetch() from file:// pages, so serve the folder (python -m http.server -d out_dir)
+or pass --embed to put the chunks inside index.html as inert JSON blocks that are parsed only
+when their run is selected.
+
+Usage:
+    python boltz2_dashboard.py --results ../results --out dashboard --compact
+    python boltz2_dashboard.py --results ../results --out dashboard --embed
+"""
+from pathlib import Path
+import argparse
+import json
+import sys
+
+from boltz2_struct_viewer import ENCODINGS, build_html, load_run, make_payload, write_tiles
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # notebooks/boltz: results layout
+from batch_analyse import find_predictions
+
+
+def run_label(pred: dict, conf: dict) -> str:
+    label = f"{pred['job']}  model_{pred['model']}"
+    scores = [f"{k} {conf[k]:.2f}" for k in ("confidence_score", "iptm") if isinstance(conf.get(k), (int, float))]
+    return label + ("  —  " + ", ".join(scores) if scores else "")
+
+
+def build_dashboard(preds: list, out_dir, *, title: str, embed: bool = False,
+                    encoding: str = "f32", deflate: bool = False, tile_size: int = 0) -> Path:
+    out_dir = Path(out_dir)
+    data_dir = out_dir / "data"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if not embed:
+        data_dir.mkdir(exist_ok=True)
+
+    runs, chunks = [], {}
+    for i, pred in enumerate(preds):
+        pde = pred["pae"].with_name(pred["pae"].name.replace("pae_", "pde_", 1))   # optional, next to the PAE
+        parts = load_run(cif=pred["structure"], conf=pred["confidence"], pae=pred["pae"], pde=pde,
+                         plddt=pred["plddt"], encoding=encoding, deflate=deflate, tile_size=tile_size)
+        run_id = f"{pred['job']}_model_{pred['model']}"
+        if not embed:
+            for kind in ("pae", "pde"):
+                write_tiles(parts[kind], data_dir / f"{run_id}_tiles" / kind, f"data/{run_id}_tiles/{kind}")
+        payload = make_payload(title=run_id, cif_name=Path(pred["structure"]).name, deflate_cif=deflate, **parts)
+        run = {"id": run_id, "name": run_label(pred, parts["conf_data"])}
+        if embed:
+            run["chunk"] = f"run-{i}"
+            chunks[run["chunk"]] = payload
+        else:
+            (data_dir / f"{run_id}.json").write_text(json.dumps(payload), encoding="utf-8")
+            run["url"] = f"data/{run_id}.json"
+        runs.append(run)
+
+    index = out_dir / "index.html"
+    index.write_text(build_html(title=title, runs=runs, chunks=chunks), encoding="utf-8")
+    return index
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build one lazily-loading HTML dashboard over many Boltz-2 predictions.")
+    ap.add_argument("--results", required=True, help="Folder containing boltz_results_* directories.")
+    ap.add_argument("--out", default="boltz2_dashboard", help="Output folder (index.html + data/).")
+    ap.add_argument("--title", default="Boltz-2 predictions", help="Page title")
+    ap.add_argument("--embed", action="store_true", help="Embed payload chunks (and PAE/PDE tiles) in index.html (works from file://).")
+    ap.add_argument("--encoding", choices=ENCODINGS, default="f32", help="Storage type for PAE/PDE/pLDDT.")
+    ap.add_argument("--deflate", action="store_true", help="Deflate-compress matrices and CIF text.")
+    ap.add_argument("--tile-size", type=int, default=0, help="Tile PAE/PDE: payloads hold a block-averaged overview of this size, tiles load on zoom (0 = off).")
+    ap.add_argument("--compact", action="store_true", help="Shortcut for --encoding u8 --deflate --tile-size 256.")
+    args = ap.parse_args()
+    if args.compact:
+        args.encoding, args.deflate, args.tile_size = "u8", True, args.tile_size or 256
+
+    preds = find_predictions(args.results)
+    if not preds:
+        raise SystemExit(f"No predictions found under {Path(args.results).resolve()}")
+    index = build_dashboard(preds, args.out, title=args.title, embed=args.embed,
+                            encoding=args.encoding, deflate=args.deflate, tile_size=args.tile_size)
+    print(f"Wrote {index.resolve()} ({len(preds)} predictions)")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,39 +12,28 @@ Enable widgets:
     jupyter nbextension enable --py widgetsnbextension
 """
 from pathlib import Path
+import sys
 from ipywidgets import Dropdown, HBox, VBox, ToggleButtons, FloatSlider, Button, HTML, Layout
 from IPython.display import display
 import py3Dmol
 
-NUC = {'A','U','G','C','DA','DT','DG','DC','I','DI','5MC','PSU'}
-AA3 = {"ALA","ARG","ASN","ASP","CYS","GLN","GLU","GLY","HIS","ILE","LEU","LYS","MET","PHE","PRO","SER","THR","TRP","TYR","VAL"}
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # notebooks/boltz: shared atom table
+from atom_table import NUC_NAMES as NUC, load_atom_table, parse_pdb_text
+from interface import InterfaceFinder
 
 def _analyze(pdb):
-    chains = {}
-    for line in pdb.splitlines():
-        if not (line.startswith("ATOM") or line.startswith("HETATM")):
-            continue
-        if len(line) < 22:
-            continue
-        resn = line[17:20].strip().upper()
-        ch = line[21:22]
-        d = chains.setdefault(ch, {"aa":0, "nucl":0})
-        if resn in AA3:
-            d["aa"] += 1
-        if resn in NUC:
-            d["nucl"] += 1
-    t = {}
-    for c,d in chains.items():
-        t[c] = "RNA" if d["nucl"]>d["aa"] else ("Protein" if d["aa"]>0 else "Other")
-    return list(chains.keys()), t
+    table = parse_pdb_text(pdb) if isinstance(pdb, str) else pdb
+    return table.chains.tolist(), table.chain_types()
 
 def view_boltz2(pdb_paths, title="Boltz-2 Protein–RNA (py3Dmol)"):
     models = []
     for i, p in enumerate(pdb_paths):
         pt = Path(p)
         pdb = pt.read_text()
-        chains, types = _analyze(pdb)
-        models.append({"id": i, "name": pt.name, "pdb": pdb, "chains": chains, "types": types})
+        table = load_atom_table(pt, text=pdb)
+        chains, types = _analyze(table)
+        models.append({"id": i, "name": pt.name, "pdb": pdb, "chains": chains, "types": types,
+                       "interface": InterfaceFinder(table)})
 
     viewer = py3Dmol.view(width=900, height=600)
     info = HTML()
@@ -100,8 +89,12 @@ def view_boltz2(pdb_paths, title="Boltz-2 Protein–RNA (py3Dmol)"):
         fromC, toC = tb_from.value, tb_to.value
         if not fromC or not toC or fromC==toC:
             viewer.render(); return
-        viewer.setStyle({"within":{"distance": dist, "sel": {"chain": toC}}, "chain": fromC}, {"stick":{"radius":0.2}})
-        viewer.setStyle({"within":{"distance": dist, "sel": {"chain": fromC}}, "chain": toC}, {"stick":{"radius":0.2}})
+        # Contacts are computed (and cached per model/cutoff) in Python rather than by 3Dmol's `within`
+        contacts = m["interface"].contacts(fromC, toC, dist)
+        for c, resi in InterfaceFinder.selection(contacts).items():
+            viewer.setStyle({"chain": c, "resi": resi}, {"stick":{"radius":0.2}})
+        info.value = ("<b>" + title + "</b> &nbsp; " + f"{len(contacts['res_a'])} residue contacts "
+                      + f"{fromC}–{toC} within {dist:.1f} Å")
         viewer.render()
 
     btn_iface.on_click(highlight_iface)
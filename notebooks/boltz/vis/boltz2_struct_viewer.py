@@ -17,6 +17,12 @@ Usage:
 
 The resulting HTML loads 3Dmol.js from a CDN.
 
+For large complexes (e.g. Hfq hexamer + mRNA) add --compact (= --encoding u8 --deflate --tile-size 256):
+the page then embeds only a <= 256 x 256 block-averaged overview of PAE/PDE, and finer tiles are
+written next to it (<out>_tiles/) and fetched on zoom (mouse wheel; double-click resets), hover and
+row colouring. Browsers block fetch() from file://, so serve the folder (python -m http.server)
+to zoom past the overview.
+
 python boltz2_struct_viewer.py \
   --cif /home/hslab/Olive/Kode/sRNA_design/notebooks/boltz/results/boltz_results_bzjob_1_hfq_hex_cyrfp1/predictions/bzjob_1_hfq_hex_cyrfp1/bzjob_1_hfq_hex_cyrfp1_model_0.cif \
   --conf /home/hslab/Olive/Kode/sRNA_design/notebooks/boltz/results/boltz_results_bzjob_1_hfq_hex_cyrfp1/predictions/bzjob_1_hfq_hex_cyrfp1/confidence_bzjob_1_hfq_hex_cyrfp1_model_0.json \
@@ -32,67 +38,157 @@ from pathlib import Path
 import argparse
 import json
 import base64
+import zlib
 import numpy as np
 
-def f32_to_b64(a: np.ndarray) -> dict:
-    a = np.asarray(a, dtype=np.float32)
-    b = a.tobytes(order='C')
-    s = base64.b64encode(b).decode('ascii')
-    return {"shape": list(a.shape), "dtype": "f32", "b64": s}
-
-def main():
-    ap = argparse.ArgumentParser(description="Generate an interactive 3D HTML viewer for Boltz-2 outputs (with PAE/PDE/PLDDT).")
-    ap.add_argument("--cif", required=True, help="Path to job.cif (structure)")
-    ap.add_argument("--conf", required=False, help="Path to confidence.json")
-    ap.add_argument("--pae", required=False, help="Path to pae.npz (key='pae')")
-    ap.add_argument("--pde", required=False, help="Path to pde.npz (key='pde')")
-    ap.add_argument("--plddt", required=False, help="Path to plddt.npz (key='plddt')")
-    ap.add_argument("--out", default="boltz2_view.html", help="Output HTML file")
-    ap.add_argument("--title", default="Boltz-2 Structure Viewer", help="Page title")
-    args = ap.parse_args()
+ENCODINGS = ("f32", "f16", "u8")
 
-    cif_text = Path(args.cif).read_text(encoding='utf-8', errors='ignore')
+def encode_array(a: np.ndarray, encoding: str = "f32", deflate: bool = False) -> dict:
+    """
+    Encode an array for the HTML payload. 'f16' halves and 'u8' quarters the float32 size
+    (u8 is linearly quantised between the array min and max, ~0.12 Å steps for PAE);
+    deflate compresses the bytes (inflated in the browser with DecompressionStream).
+    """
+    a = np.asarray(a, dtype=np.float32)
+    out = {"shape": list(a.shape), "dtype": encoding, "deflate": bool(deflate)}
+    if encoding == "f32":
+        raw = a.astype('<f4').tobytes(order='C')
+    elif encoding == "f16":
+        raw = a.astype('<f2').tobytes(order='C')
+    elif encoding == "u8":
+        finite = a[np.isfinite(a)]
+        lo = float(finite.min()) if finite.size else 0.0
+        hi = float(finite.max()) if finite.size else 0.0
+        scale = (hi - lo) / 255.0 or 1.0
+        q = np.clip(np.rint((np.nan_to_num(a, nan=lo) - lo) / scale), 0, 255).astype(np.uint8)
+        raw = q.tobytes(order='C')
+        out.update(offset=lo, scale=scale)
+    else:
+        raise ValueError(f"Unknown encoding {encoding!r}, expected one of {ENCODINGS}")
+    if deflate:
+        raw = zlib.compress(raw, 9)
+    out["b64"] = base64.b64encode(raw).decode('ascii')
+    return out
+
+def block_average(a: np.ndarray, factor: int) -> np.ndarray:
+    """Mean over factor x factor blocks (edge blocks average only the cells they cover)."""
+    n0, n1 = a.shape
+    m0, m1 = -(-n0 // factor), -(-n1 // factor)
+    padded = np.full((m0 * factor, m1 * factor), np.nan, dtype=np.float32)
+    padded[:n0, :n1] = a
+    return np.nanmean(padded.reshape(m0, factor, m1, factor), axis=(1, 3))
+
+def encode_matrix(a: np.ndarray, encoding: str = "f32", deflate: bool = False, tile_size: int = 0) -> dict:
+    """
+    encode_array of the matrix or, if tile_size > 0 and the matrix is larger, a tile pyramid:
+    levels of factor 1 (full resolution), 2, 4, ... (block means) cut into tile_size x tile_size
+    tiles. Only the coarsest level (a single tile) is embedded, under "top"; the other tiles are
+    kept under "tiles" ({"<factor>_<row>_<col>": encoded tile}) until write_tiles moves them to
+    files the page fetches on zoom.
+    """
+    a = np.asarray(a, dtype=np.float32)
+    if not tile_size or a.ndim != 2 or max(a.shape) <= tile_size:
+        return encode_array(a, encoding, deflate)
+    out = {"shape": list(a.shape), "tile_size": int(tile_size), "levels": [], "tiles": {}}
+    factor = 1
+    while True:
+        level = a if factor == 1 else block_average(a, factor)
+        out["levels"].append({"factor": factor, "n": int(level.shape[0])})
+        if max(level.shape) <= tile_size:
+            out["top"] = encode_array(level, encoding, deflate)
+            return out
+        for r in range(0, level.shape[0], tile_size):
+            for c in range(0, level.shape[1], tile_size):
+                tile = level[r:r + tile_size, c:c + tile_size]
+                out["tiles"][f"{factor}_{r // tile_size}_{c // tile_size}"] = encode_array(tile, encoding, deflate)
+        factor *= 2
+
+def write_tiles(matrix, tile_dir, url: str):
+    """Move the tiles of an encode_matrix pyramid to tile_dir/<key>.json, fetched by the page from url."""
+    if not matrix or "tiles" not in matrix:
+        return matrix
+    tile_dir = Path(tile_dir)
+    tile_dir.mkdir(parents=True, exist_ok=True)
+    for key, tile in matrix.pop("tiles").items():
+        (tile_dir / f"{key}.json").write_text(json.dumps(tile), encoding='utf-8')
+    matrix["tile_url"] = url
+    return matrix
+
+def load_run(*, cif, conf=None, pae=None, pde=None, plddt=None, encoding="f32", deflate=False, tile_size=0) -> dict:
+    """Read one Boltz-2 prediction's files into the keyword arguments of build_html."""
+    enc = dict(encoding=encoding, deflate=deflate)
+    cif_text = Path(cif).read_text(encoding='utf-8', errors='ignore')
 
     conf_data = {}
-    if args.conf and Path(args.conf).exists():
-        conf_data = json.loads(Path(args.conf).read_text(encoding='utf-8', errors='ignore'))
+    if conf and Path(conf).exists():
+        conf_data = json.loads(Path(conf).read_text(encoding='utf-8', errors='ignore'))
 
     pae_data = None
-    if args.pae and Path(args.pae).exists():
-        with np.load(args.pae) as z:
+    if pae and Path(pae).exists():
+        with np.load(pae) as z:
             if "pae" in z:
-                pae_data = f32_to_b64(z["pae"])
+                pae_data = encode_matrix(z["pae"], tile_size=tile_size, **enc)
             else:
                 raise SystemExit("PAE npz missing key 'pae'")
 
     pde_data = None
-    if args.pde and Path(args.pde).exists():
-        with np.load(args.pde) as z:
+    if pde and Path(pde).exists():
+        with np.load(pde) as z:
             if "pde" in z:
-                pde_data = f32_to_b64(z["pde"])
+                pde_data = encode_matrix(z["pde"], tile_size=tile_size, **enc)
             else:
                 raise SystemExit("PDE npz missing key 'pde'")
 
     plddt_vec = None
-    if args.plddt and Path(args.plddt).exists():
-        with np.load(args.plddt) as z:
+    if plddt and Path(plddt).exists():
+        with np.load(plddt) as z:
             if "plddt" in z:
-                plddt_vec = f32_to_b64(z["plddt"])
+                plddt_vec = encode_array(z["plddt"], **enc)
             else:
                 raise SystemExit("PLDDT npz missing key 'plddt'")
 
-    html = build_html(
-        title=args.title,
-        cif_text=cif_text,
-        conf_data=conf_data,
-        pae=pae_data,
-        pde=pde_data,
-        plddt=plddt_vec,
-    )
-    Path(args.out).write_text(html, encoding='utf-8')
+    return dict(cif_text=cif_text, conf_data=conf_data, pae=pae_data, pde=pde_data, plddt=plddt_vec)
+
+def make_payload(*, title, cif_text, conf_data, pae, pde, plddt, cif_name="job.cif", deflate_cif=False) -> dict:
+    """The JSON object the page renders; the CIF text can be deflated like the matrices."""
+    cif = {"name": cif_name, "format": "cif", "text": cif_text}
+    if deflate_cif:
+        cif = {"name": cif_name, "format": "cif", "deflate": True,
+               "b64": base64.b64encode(zlib.compress(cif_text.encode('utf-8'), 9)).decode('ascii')}
+    return {"title": title, "cif": cif, "conf": conf_data, "pae": pae, "pde": pde, "plddt": plddt}
+
+def main():
+    ap = argparse.ArgumentParser(description="Generate an interactive 3D HTML viewer for Boltz-2 outputs (with PAE/PDE/PLDDT).")
+    ap.add_argument("--cif", required=True, help="Path to job.cif (structure)")
+    ap.add_argument("--conf", required=False, help="Path to confidence.json")
+    ap.add_argument("--pae", required=False, help="Path to pae.npz (key='pae')")
+    ap.add_argument("--pde", required=False, help="Path to pde.npz (key='pde')")
+    ap.add_argument("--plddt", required=False, help="Path to plddt.npz (key='plddt')")
+    ap.add_argument("--out", default="boltz2_view.html", help="Output HTML file")
+    ap.add_argument("--title", default="Boltz-2 Structure Viewer", help="Page title")
+    ap.add_argument("--encoding", choices=ENCODINGS, default="f32", help="Storage type for PAE/PDE/pLDDT (f16/u8 shrink the page 2x/4x).")
+    ap.add_argument("--deflate", action="store_true", help="Deflate-compress the matrix payloads (decompressed in the browser).")
+    ap.add_argument("--tile-size", type=int, default=0, help="Embed only a block-averaged PAE/PDE overview of this size; finer tiles go to <out>_tiles/ (0 = off).")
+    ap.add_argument("--compact", action="store_true", help="Shortcut for --encoding u8 --deflate --tile-size 256.")
+    args = ap.parse_args()
+    if args.compact:
+        args.encoding, args.deflate, args.tile_size = "u8", True, args.tile_size or 256
+    enc = dict(encoding=args.encoding, deflate=args.deflate)
+    parts = load_run(cif=args.cif, conf=args.conf, pae=args.pae, pde=args.pde, plddt=args.plddt,
+                     tile_size=args.tile_size, **enc)
+    out = Path(args.out)
+    for kind in ("pae", "pde"):
+        write_tiles(parts[kind], out.parent / f"{out.stem}_tiles" / kind, f"{out.stem}_tiles/{kind}")
+    html = build_html(title=args.title, **parts)
+    out.write_text(html, encoding='utf-8')
     print(f"Wrote {Path(args.out).resolve()}")
 
-def build_html(*, title, cif_text, conf_data, pae, pde, plddt):
+def build_html(*, title, cif_text=None, conf_data=None, pae=None, pde=None, plddt=None, runs=None, chunks=None):
+    """
+    Self-contained page for one prediction, or - with ``runs`` ([{id, name, url|chunk}]) - one page
+    over many predictions whose payloads are fetched from ``url`` or read from embedded ``chunks``
+    ({chunk id: payload json}) only when selected.
+    """
     import html as _html
     def jsjson(x): 
         return json.dumps(x).replace("</", "<\\/")  # prevent </script> breaks
@@ -129,14 +225,15 @@ def build_html(*, title, cif_text, conf_data, pae, pde, plddt):
                 metrics_rows += f"<tr><td>{_html.escape(str(k))}</td><td class='small'>{_html.escape(str(v))}</td></tr>"
 
     # Prepare payloads
-    payload = {
-        "title": title,
-        "cif": {"name": "job.cif", "format": "cif", "text": cif_text},
-        "conf": conf_data,
-        "pae": pae,
-        "pde": pde,
-        "plddt": plddt,
-    }
+    payload = None
+    if not runs:
+        payload = make_payload(title=title, cif_text=cif_text, conf_data=conf_data, pae=pae, pde=pde, plddt=plddt)
+    run_select = ""
+    if runs:
+        run_select = f"""<span class="label">Prediction</span><select id="runSelect" style="min-width:320px"></select>
+  <span class="small">{len(runs)} runs</span>"""
+    chunk_tags = "".join(f'<script type="application/json" id="{_html.escape(k)}">{jsjson(v)}</script>\n'
+                         for k, v in (chunks or {}).items())
 
     html = f"""<!doctype html>
 <html lang="en">
@@ -150,6 +247,7 @@ def build_html(*, title, cif_text, conf_data, pae, pde, plddt):
 <body>
 <header>
   <strong style="font-size:14px">{_html.escape(title)}</strong>
+  {run_select}
 </header>
 <div id="wrap">
   <aside>
@@ -211,7 +309,7 @@ def build_html(*, title, cif_text, conf_data, pae, pde, plddt):
     <div class="group">
       <h2>Confidence metrics</h2>
       <table>
-        <tbody>
+        <tbody id="metricsBody">
           {metrics_rows or "<tr><td colspan='2' class='small'>No confidence.json provided</td></tr>"}
         </tbody>
       </table>
@@ -223,18 +321,106 @@ def build_html(*, title, cif_text, conf_data, pae, pde, plddt):
   </main>
 </div>
 
-<script>
-const PAYLOAD = {jsjson(payload)};
+{chunk_tags}<script>
+let PAYLOAD = {jsjson(payload)};
+const RUNS = {jsjson(runs or [])};
 
-// ----------- helpers: Float32 decoding & colormaps -----------
-function decodeF32(obj) {{
-  if (!obj) return null;
-  const bin = atob(obj.b64);
+// ----------- helpers: payload decoding & colormaps -----------
+function b64ToBytes(b64) {{
+  const bin = atob(b64);
   const len = bin.length;
-  const buf = new ArrayBuffer(len);
-  const view = new Uint8Array(buf);
+  const view = new Uint8Array(new ArrayBuffer(len));
   for (let i=0;i<len;i++) view[i] = bin.charCodeAt(i);
-  return {{shape: obj.shape, data: new Float32Array(buf)}};
+  return view;
+}}
+
+async function inflateBytes(bytes) {{
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('deflate'));
+  return new Uint8Array(await new Response(stream).arrayBuffer());
+}}
+
+function halfToFloat(h) {{
+  const s = (h & 0x8000) ? -1 : 1, e = (h >> 10) & 0x1f, f = h & 0x3ff;
+  if (e === 0) return s * Math.pow(2, -14) * (f / 1024);
+  if (e === 31) return f ? NaN : s * Infinity;
+  return s * Math.pow(2, e - 15) * (1 + f / 1024);
+}}
+
+// Decode an encoded array ({{dtype: f32|f16|u8, deflate, b64}}) into {{shape, data: Float32Array}}
+async function decodeArray(obj) {{
+  if (!obj) return null;
+  let bytes = b64ToBytes(obj.b64);
+  if (obj.deflate) bytes = await inflateBytes(bytes);
+  let data;
+  if (obj.dtype === 'f16') {{
+    const u16 = new Uint16Array(bytes.buffer, bytes.byteOffset, bytes.byteLength/2);
+    data = new Float32Array(u16.length);
+    for (let i=0;i<u16.length;i++) data[i] = halfToFloat(u16[i]);
+  }} else if (obj.dtype === 'u8') {{
+    data = new Float32Array(bytes.length);
+    for (let i=0;i<bytes.length;i++) data[i] = obj.offset + bytes[i]*obj.scale;
+  }} else {{
+    data = new Float32Array(bytes.buffer, bytes.byteOffset, bytes.byteLength/4);
+  }}
+  return {{shape: obj.shape, data}};
+}}
+
+// PAE/PDE matrix as levels (factor 1 = full resolution, then 2, 4, ... block means) cut into
+// tile x tile tiles. Only the coarsest level comes with the payload; finer tiles are read from
+// obj.tiles (embedded) or fetched from obj.tile_url when needed. An untiled matrix is one tile.
+async function loadMatrix(obj) {{
+  if (!obj) return null;
+  const n = obj.shape[0];
+  const level = l => ({{factor: l.factor, n: l.n, tiles: new Map(), pending: new Map()}});
+  if (!obj.levels) {{
+    const m = {{shape: obj.shape, n, obj, tile: n, failed: false, levels: [level({{factor: 1, n}})]}};
+    m.levels[0].tiles.set('0_0', (await decodeArray(obj)).data);
+    return m;
+  }}
+  const m = {{shape: obj.shape, n, obj, tile: obj.tile_size, failed: false, levels: obj.levels.map(level)}};
+  m.levels[m.levels.length-1].tiles.set('0_0', (await decodeArray(obj.top)).data);
+  return m;
+}}
+
+function tileKey(m, k, j, i) {{
+  const T = m.tile * m.levels[k].factor;
+  return Math.floor(j / T) + '_' + Math.floor(i / T);
+}}
+
+function loadTile(m, k, key) {{
+  const l = m.levels[k];
+  if (!l.pending.has(key)) {{
+    const name = l.factor + '_' + key;
+    const src = (m.obj.tiles && m.obj.tiles[name]) ? Promise.resolve(m.obj.tiles[name])
+              : fetch(m.obj.tile_url + '/' + name + '.json').then(r => r.json());
+    l.pending.set(key, src.then(decodeArray).then(d => {{ l.tiles.set(key, d.data); }}).catch(() => {{
+      m.failed = true;
+      setHmStatus('Full-resolution tiles could not be loaded (serve the page over http).');
+    }}));
+  }}
+  return l.pending.get(key);
+}}
+
+// Start loading the missing tiles of level k over rows j0..j1 and columns i0..i1; null if none are missing
+function loadTiles(m, k, j0, j1, i0, i1) {{
+  if (m.failed) return null;
+  const l = m.levels[k], T = m.tile * l.factor, jobs = [];
+  for (let r = Math.floor(j0 / T); r <= Math.floor(j1 / T); r++)
+    for (let c = Math.floor(i0 / T); c <= Math.floor(i1 / T); c++)
+      if (!l.tiles.has(r + '_' + c)) jobs.push(loadTile(m, k, r + '_' + c));
+  return jobs.length ? Promise.all(jobs) : null;
+}}
+
+// Value at row j, column i from level k, or from the nearest coarser level while its tile is missing
+function matrixValue(m, j, i, k) {{
+  for (; k < m.levels.length; k++) {{
+    const l = m.levels[k], t = l.tiles.get(tileKey(m, k, j, i));
+    if (!t) continue;
+    const y = Math.floor(j / l.factor) % m.tile, x = Math.floor(i / l.factor);
+    const w = Math.min(m.tile, l.n - x + x % m.tile);
+    return t[y * w + x % m.tile];
+  }}
+  return NaN;
 }}
 
 function clamp(x,a,b){{return Math.max(a, Math.min(b,x));}}
@@ -273,35 +459,92 @@ let plddt = null;
 let pae = null, pde = null;
 let nRes = 0;
 let selectedIdx = 0;
+let hmView = {{x0: 0, y0: 0, span: 0}};  // visible heatmap window (span 0 = whole matrix)
 
 // ----------- init -----------
-function init() {{
-  pae = decodeF32(PAYLOAD.pae);
-  pde = decodeF32(PAYLOAD.pde);
-  plddt = decodeF32(PAYLOAD.plddt);
-
-  // init viewer
+async function init() {{
   viewer = $3Dmol.createViewer("viewer", {{ backgroundColor: "#101826", antialias: true }});
-  model = viewer.addModel(PAYLOAD.cif.text, PAYLOAD.cif.format);
+  wireUI();
+  if (RUNS.length) {{
+    const sel = document.getElementById('runSelect');
+    RUNS.forEach(r => {{
+      const opt = document.createElement('option');
+      opt.value = r.id; opt.textContent = r.name;
+      sel.appendChild(opt);
+    }});
+    sel.onchange = () => selectRun(sel.value);
+    await selectRun(RUNS[0].id);
+  }} else {{
+    await loadPayload(PAYLOAD);
+  }}
+}}
+
+// Dashboard mode: payloads live in separate files (fetched) or embedded JSON chunks (parsed on demand)
+async function selectRun(id) {{
+  const run = RUNS.find(r => String(r.id) === String(id));
+  setHmStatus('Loading ' + run.name + ' …');
+  const p = run.chunk ? JSON.parse(document.getElementById(run.chunk).textContent)
+                      : await (await fetch(run.url)).json();
+  if (p.cif.b64) {{
+    let bytes = b64ToBytes(p.cif.b64);
+    if (p.cif.deflate) bytes = await inflateBytes(bytes);
+    p.cif = {{name: p.cif.name, format: p.cif.format, text: new TextDecoder().decode(bytes)}};
+  }}
+  renderMetrics(p.conf);
+  await loadPayload(p);
+  setHmStatus('');
+}}
+
+function renderMetrics(conf) {{
+  const body = document.getElementById('metricsBody');
+  body.innerHTML = '';
+  const entries = Object.entries(conf || {{}});
+  if (!entries.length) {{
+    body.innerHTML = "<tr><td colspan='2' class='small'>No confidence.json provided</td></tr>";
+    return;
+  }}
+  for (const [k, v] of entries) {{
+    const tr = document.createElement('tr');
+    const td1 = document.createElement('td'); td1.textContent = k;
+    const td2 = document.createElement('td');
+    if (typeof v === 'number') {{ td2.style.textAlign = 'right'; td2.textContent = v.toFixed(4); }}
+    else {{ td2.className = 'small'; td2.textContent = JSON.stringify(v); }}
+    tr.appendChild(td1); tr.appendChild(td2); body.appendChild(tr);
+  }}
+}}
+
+async function loadPayload(p) {{
+  PAYLOAD = p;
+  pae = await loadMatrix(p.pae);
+  pde = await loadMatrix(p.pde);
+  plddt = await decodeArray(p.plddt);
+  selectedIdx = 0;
+  hmView = {{x0: 0, y0: 0, span: 0}};
+
+  viewer.clear();
+  model = viewer.addModel(p.cif.text, p.cif.format);
   // default styling: nucleic sticks, protein cartoon
   const NUC = ['A','U','G','C','DA','DT','DG','DC','I','DI','5MC','PSU'];
   viewer.setStyle({{resn:NUC}}, {{stick:{{}}}});
   viewer.setStyle({{not: {{resn:NUC}}}}, {{cartoon:{{}}}});
 
   buildResidueIndex();
+  document.getElementById('resSlider').value = 0;
+  document.getElementById('resIdx').value = 0;
   setColorMode(document.getElementById('colorMode').value);
   viewer.zoomTo();
   viewer.render();
 
-  // UI wiring
+  drawHeatmap();
+  setMappingInfo();
+}}
+
+function wireUI() {{
   const slider = document.getElementById('resSlider');
   const idxBox = document.getElementById('resIdx');
   const colorMode = document.getElementById('colorMode');
   const matrixKind = document.getElementById('matrixKind');
 
-  slider.max = Math.max(0, nRes-1);
-  idxBox.max = Math.max(0, nRes-1);
-
   slider.oninput = () => {{ idxBox.value = slider.value; onResidueChange(parseInt(slider.value)); }};
   idxBox.onchange = () => {{ const v = clamp(parseInt(idxBox.value)||0,0,nRes-1); slider.value = v; onResidueChange(v); }};
   colorMode.onchange = () => setColorMode(colorMode.value);
@@ -317,14 +560,13 @@ function init() {{
     setTimeout(()=>URL.revokeObjectURL(url), 1000);
   }};
 
-  drawHeatmap();
-  matrixKind.onchange = drawHeatmap;
+  matrixKind.onchange = () => {{ hmView = {{x0: 0, y0: 0, span: 0}}; drawHeatmap(); }};
   const hm = document.getElementById('hm');
   hm.addEventListener('mousemove', onHmHover);
   hm.addEventListener('mouseleave', ()=> setHmStatus(''));
   hm.addEventListener('click', onHmClick);
-
-  setMappingInfo();
+  hm.addEventListener('wheel', onHmWheel, {{passive: false}});
+  hm.addEventListener('dblclick', () => {{ hmView = {{x0: 0, y0: 0, span: 0}}; drawHeatmap(); }});
 }}
 
 function setMappingInfo() {{
@@ -390,7 +632,7 @@ function colorByPLDDT() {{
   viewer.render();
 }}
 
-function colorByMatrixRow(i, kind) {{
+async function colorByMatrixRow(i, kind) {{
   const obj = (kind==='pae'? pae : pde);
   if (!obj) return;
   const n = obj.shape[0];
@@ -398,11 +640,11 @@ function colorByMatrixRow(i, kind) {{
     setHmStatus(kind.toUpperCase()+" size ("+n+") does not match residue count ("+nRes+").");
     return;
   }}
+  await loadTiles(obj, 0, i, i, 0, n-1);
   resetBaseStyles();
-  const row = obj.data.subarray(i*n, (i+1)*n);
   for (let j=0;j<nRes;j++) {{
     const sel = residues[j];
-    const v = row[j];
+    const v = matrixValue(obj, i, j, 0);
     const col = (kind==='pae'? colorPAE(v) : colorPDE(v));
     viewer.setStyle({{chain: sel.chain, resi: sel.resi}}, {{cartoon:{{color:col}}, stick:{{colorscheme: col}}}});
   }}
@@ -416,6 +658,13 @@ function getActiveMatrix() {{
   return {{kind, obj}};
 }}
 
+// Coarsest level whose blocks are no larger than one canvas pixel; full resolution once zoomed in
+function levelFor(m, step) {{
+  let k = 0;
+  while (k + 1 < m.levels.length && m.levels[k+1].factor <= step) k++;
+  return k;
+}}
+
 function drawHeatmap() {{
   const canvas = document.getElementById('hm');
   const ctx = canvas.getContext('2d');
@@ -426,14 +675,19 @@ function drawHeatmap() {{
     ctx.fillText('No '+kind.toUpperCase()+' data', 10, 20);
     return;
   }}
-  const n = obj.shape[0];
+  const n = obj.n;
+  const span = hmView.span || n;
+  const k = levelFor(obj, span / canvas.width);
+  const last = v0 => Math.min(n-1, Math.floor(v0 + span * (1 - 1/canvas.width)));
+  const loading = loadTiles(obj, k, Math.floor(hmView.y0), last(hmView.y0), Math.floor(hmView.x0), last(hmView.x0));
+  if (loading) loading.then(drawHeatmap);
   const img = ctx.createImageData(canvas.width, canvas.height);
-  // Map matrix to canvas pixels
+  // Map the visible matrix window to canvas pixels
   for (let y=0; y<canvas.height; y++) {{
-    const j = Math.floor(y * n / canvas.height);
+    const j = Math.min(n-1, Math.floor(hmView.y0 + y * span / canvas.height));
     for (let x=0; x<canvas.width; x++) {{
-      const i = Math.floor(x * n / canvas.width);
-      const v = obj.data[j*n + i];
+      const i = Math.min(n-1, Math.floor(hmView.x0 + x * span / canvas.width));
+      const v = matrixValue(obj, j, i, k);
       const col = (kind==='pae'? colorPAE(v) : colorPDE(v));
       const r = parseInt(col.slice(1,3),16);
       const g = parseInt(col.slice(3,5),16);
@@ -445,8 +699,8 @@ function drawHeatmap() {{
   ctx.putImageData(img,0,0);
   // Crosshair for selected index
   if (nRes>0) {{
-    const x = Math.round(selectedIdx * canvas.width / nRes);
-    const y = Math.round(selectedIdx * canvas.height / nRes);
+    const x = Math.round((selectedIdx - hmView.x0) * canvas.width / span);
+    const y = Math.round((selectedIdx - hmView.y0) * canvas.height / span);
     ctx.strokeStyle = '#ffffff99';
     ctx.beginPath();
     ctx.moveTo(x,0); ctx.lineTo(x,canvas.height);
@@ -466,11 +720,33 @@ function onHmHover(ev) {{
   const v = (ev.clientY - rect.top)/canvas.height;
   const {{obj, kind}} = getActiveMatrix();
   if (!obj) return;
-  const n = obj.shape[0];
-  const i = Math.floor(u * n);
-  const j = Math.floor(v * n);
-  const val = obj.data[j*n + i];
-  setHmStatus(kind.toUpperCase()+`[${{j}},${{i}}] = `+val.toFixed(2));
+  const n = obj.n, span = hmView.span || n;
+  const i = clamp(Math.floor(hmView.x0 + u * span), 0, n-1);
+  const j = clamp(Math.floor(hmView.y0 + v * span), 0, n-1);
+  const val = matrixValue(obj, j, i, 0);
+  if (obj.levels[0].tiles.has(tileKey(obj, 0, j, i))) {{
+    setHmStatus(kind.toUpperCase()+`[${{j}},${{i}}] = `+val.toFixed(2));
+  }} else {{
+    setHmStatus(kind.toUpperCase()+`[${{j}},${{i}}] ≈ `+val.toFixed(2)+' (block mean, loading full resolution)');
+    loadTiles(obj, 0, j, j, i, i);
+  }}
+}}
+
+function onHmWheel(ev) {{
+  ev.preventDefault();
+  const {{obj}} = getActiveMatrix();
+  if (!obj) return;
+  const canvas = ev.target;
+  const rect = canvas.getBoundingClientRect();
+  const u = (ev.clientX - rect.left)/canvas.width;
+  const v = (ev.clientY - rect.top)/canvas.height;
+  const n = obj.n, span = hmView.span || n;
+  const cx = hmView.x0 + u * span, cy = hmView.y0 + v * span;
+  const newSpan = clamp(span * (ev.deltaY < 0 ? 0.5 : 2), Math.min(n, 16), n);
+  hmView = {{span: newSpan === n ? 0 : newSpan,
+            x0: clamp(cx - u * newSpan, 0, n - newSpan),
+            y0: clamp(cy - v * newSpan, 0, n - newSpan)}};
+  drawHeatmap();
 }}
 
 function onHmClick(ev) {{
@@ -479,8 +755,8 @@ function onHmClick(ev) {{
   const v = (ev.clientY - rect.top)/canvas.height;
   const {{obj}} = getActiveMatrix();
   if (!obj) return;
-  const n = obj.shape[0];
-  const row = Math.floor(v * n);
+  const n = obj.n;
+  const row = Math.floor(hmView.y0 + v * (hmView.span || n));
   const slider = document.getElementById('resSlider');
   const idxBox = document.getElementById('resIdx');
   const clamped = clamp(row,0,nRes-1);
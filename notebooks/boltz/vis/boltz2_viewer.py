@@ -1,10 +1,11 @@
 from pathlib import Path
 import argparse
+import sys
 from html import escape as hescape
 import json
 
-NUC_NAMES = {"A","U","G","C","DA","DT","DG","DC","I","DI","5MC","PSU"}
-AA3 = {"ALA","ARG","ASN","ASP","CYS","GLN","GLU","GLY","HIS","ILE","LEU","LYS","MET","PHE","PRO","SER","THR","TRP","TYR","VAL"}
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # notebooks/boltz: shared atom table
+from atom_table import load_atom_table, parse_pdb_text
 
 def parse_args():
     ap = argparse.ArgumentParser(description="Generate an interactive 3D viewer HTML for Boltz-2 PDB outputs (protein–RNA).")
@@ -13,30 +14,11 @@ def parse_args():
     ap.add_argument("--title", default="Boltz-2 Protein–RNA Viewer", help="Title shown in the HTML.")
     return ap.parse_args()
 
+def analyze_table(table):
+    return {"chains": table.chains.tolist(), "chain_types": table.chain_types()}
+
 def analyze_pdb(pdb_text):
-    chains = {}
-    for line in pdb_text.splitlines():
-        if not (line.startswith("ATOM") or line.startswith("HETATM")):
-            continue
-        if len(line) < 22:
-            continue
-        resname = line[17:20].strip().upper()
-        chain = line[21:22]
-        d = chains.setdefault(chain, {"aa":0, "nucl":0, "resnames":set()})
-        d["resnames"].add(resname)
-        if resname in AA3:
-            d["aa"] += 1
-        if resname in NUC_NAMES:
-            d["nucl"] += 1
-    chain_types = {}
-    for c, d in chains.items():
-        if d["nucl"] > d["aa"]:
-            chain_types[c] = "RNA"
-        elif d["aa"] > 0:
-            chain_types[c] = "Protein"
-        else:
-            chain_types[c] = "Other"
-    return {"chains": list(chains.keys()), "chain_types": chain_types}
+    return analyze_table(parse_pdb_text(pdb_text))
 
 def build_html(models, title):
     css = """
@@ -239,7 +221,7 @@ def main():
         if not p.exists():
             raise SystemExit(f"PDB not found: {p}")
         pdb_text = p.read_text()
-        meta = analyze_pdb(pdb_text)
+        meta = analyze_table(load_atom_table(p, text=pdb_text))
         models.append({
             "id": i,
             "name": p.name,
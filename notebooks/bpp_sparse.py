@@ -0,0 +1,263 @@
+"""
+Sparse base-pair probability matrices.
+
+A SparseBPP keeps only the pairs (i < j, 0-based) with probability >= a cutoff, as int32 index and
+float16 probability arrays - a 2 kb mRNA at cutoff 1e-5 is a few tens of thousands of pairs instead
+of a 4M-entry dense matrix. Unpaired probabilities and windowed accessibility are computed from the
+pair list directly. It is built from ViennaRNA's pair list (fold_compound.plist_from_probs), so no
+dense matrix is created on the way either.
+
+BPPStore appends many matrices to memory-mapped shard files under one directory, with an index from
+key (e.g. fold_service.fold_key) to shard / offset. Added matrices are buffered and written as one
+shard once ``flush_pairs`` pairs are pending, or on flush(). Several stores (processes) may share a
+directory: shard files are created exclusively and the index is merged with the one on disk under a
+lock before it is written.
+
+
+    P = bpp_from_sequence(seq, cutoff=1e-5)
+    pu = P.unpaired()                       # (n,) probability each base is unpaired
+    P.window_unpaired(20)                   # mean unpaired probability of every 20-nt window
+    store = BPPStore('data/.fold_cache/bpp')
+    store.add('ompF', P); store.flush()
+    store.get('ompF')                       # arrays are views into the memory-mapped shard
+"""
+from contextlib import contextmanager
+from pathlib import Path
+import fcntl
+import numpy as np
+
+
+BPP_CUTOFF = 1e-5
+PAIR_DTYPE = np.dtype([('i', '<i4'), ('j', '<i4'), ('p', '<f2')])
+
+
+class SparseBPP:
+    """Pair probabilities of an ``n``-nt sequence as parallel arrays i < j (0-based) and p (float16)."""
+
+    __slots__ = ('n', 'i', 'j', 'p')
+
+    def __init__(self, n: int, i, j, p):
+        self.n = int(n)
+        self.i, self.j = np.asarray(i), np.asarray(j)
+        self.p = np.asarray(p)
+
+    @classmethod
+    def from_plist(cls, n: int, plist, cutoff: float = BPP_CUTOFF):
+        """From a ViennaRNA pair list (elements with 1-based .i, .j and .p)."""
+        pairs = np.array([(e.i - 1, e.j - 1, e.p) for e in plist if e.p >= cutoff and e.j > 0],
+                         dtype=np.float64).reshape(-1, 3)
+        order = np.lexsort((pairs[:, 1], pairs[:, 0]))
+        pairs = pairs[order]
+        return cls(n, pairs[:, 0].astype(np.int32), pairs[:, 1].astype(np.int32), pairs[:, 2].astype(np.float16))
+
+    @classmethod
+    def from_dense(cls, P: np.ndarray, cutoff: float = BPP_CUTOFF):
+        i, j = np.nonzero(np.triu(P, k=1) >= cutoff)
+        return cls(len(P), i.astype(np.int32), j.astype(np.int32), P[i, j].astype(np.float16))
+
+    @classmethod
+    def from_records(cls, n: int, records: np.ndarray):
+        return cls(n, records['i'], records['j'], records['p'])
+
+    def records(self) -> np.ndarray:
+        out = np.empty(len(self), dtype=PAIR_DTYPE)
+        out['i'], out['j'], out['p'] = self.i, self.j, self.p
+        return out
+
+    def __len__(self):
+        return len(self.p)
+
+    @property
+    def nbytes(self) -> int:
+        return self.i.nbytes + self.j.nbytes + self.p.nbytes
+
+    def __eq__(self, other):
+        return (isinstance(other, SparseBPP) and self.n == other.n and np.array_equal(self.i, other.i)
+                and np.array_equal(self.j, other.j) and np.array_equal(self.p, other.p))
+
+    def __repr__(self):
+        return f'SparseBPP(n={self.n}, pairs={len(self)})'
+
+    def pair(self, i: int, j: int) -> float:
+        """P(i, j), 0 if the pair is below the cutoff."""
+        i, j = min(i, j), max(i, j)
+        lo, hi = np.searchsorted(self.i, i, 'left'), np.searchsorted(self.i, i, 'right')
+        k = lo + np.searchsorted(self.j[lo:hi], j)
+        return float(self.p[k]) if k < hi and self.j[k] == j else 0.0
+
+    def paired(self) -> np.ndarray:
+        """Probability that each base is paired (summed over partners above the cutoff)."""
+        p = self.p.astype(np.float64)
+        return np.bincount(self.i, p, minlength=self.n) + np.bincount(self.j, p, minlength=self.n)
+
+    def unpaired(self) -> np.ndarray:
+        return np.clip(1 - self.paired(), 0, 1)
+
+    def window_unpaired(self, size: int) -> np.ndarray:
+        """Mean unpaired probability of each window [s, s + size), s = 0 .. n - size."""
+        c = np.r_[0, np.cumsum(self.unpaired())]
+        return (c[size:] - c[:-size]) / size
+
+    def window_accessibility(self, size: int, kT: float = 0.61632) -> np.ndarray:
+        """
+        Approximate opening energy -kT * sum(log Pu) of each window, treating bases as independent
+        (exact ED needs constrained partition functions, see RNAplfold -u / IntaRNA).
+        """
+        c = np.r_[0, np.cumsum(np.log(np.maximum(self.unpaired(), 1e-12)))]
+        return -kT * (c[size:] - c[:-size])
+
+    def to_csr(self):
+        """Upper-triangular scipy CSR matrix."""
+        from scipy.sparse import csr_matrix
+        return csr_matrix((self.p.astype(np.float32), (self.i, self.j)), shape=(self.n, self.n))
+
+
+def bpp_from_sequence(seq: str, cutoff: float = BPP_CUTOFF, md=None) -> SparseBPP:
+    """Partition function fold of ``seq`` and its pair probabilities >= cutoff."""
+    import RNA
+    fc = RNA.fold_compound(seq, md) if md is not None else RNA.fold_compound(seq)
+    _, mfe = fc.mfe()
+    fc.exp_params_rescale(mfe)
+    fc.pf()
+    return SparseBPP.from_plist(len(seq.replace('&', '')), fc.plist_from_probs(cutoff), cutoff)
+
+
+class BPPStore:
+    """Sparse matrices appended to memory-mapped .npy shards, with an index saved as index.npz."""
+
+    def __init__(self, root, flush_pairs: int = 1 << 20):
+        self.root = Path(root)
+        self.flush_pairs = flush_pairs
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.index = {}                     # key -> (shard, offset, count, n)
+        self._pending = {}
+        self._pending_pairs = 0
+        self._shards = {}
+        with self._lock():
+            self.index = self._load_index()
+
+    @contextmanager
+    def _lock(self):
+        """Exclusive lock on the directory's index, shared by every store (and process) using it."""
+        with open(self.root / 'index.lock', 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _load_index(self) -> dict:
+        fn_index = self.root / 'index.npz'
+        if not fn_index.exists():
+            return {}
+        idx = np.load(fn_index, allow_pickle=False)
+        return {k: tuple(int(x) for x in row) for k, row in zip(idx['keys'], idx['entries'])}
+
+    def _new_shard(self, records: np.ndarray) -> int:
+        """Write ``records`` to a shard number no other store has taken (the file is created exclusively)."""
+        shard = max((s for s, *_ in self.index.values()), default=-1) + 1
+        while True:
+            try:
+                f = open(self.root / f'shard_{shard:05d}.npy', 'xb')
+            except FileExistsError:
+                shard += 1
+                continue
+            with f:
+                np.save(f, records)
+            return shard
+
+    def __contains__(self, key) -> bool:
+        return key in self.index or key in self._pending
+
+    def __len__(self):
+        return len(set(self.index) | set(self._pending))
+
+    def add(self, key: str, bpp: SparseBPP):
+        self._pending[key] = bpp
+        self._pending_pairs += len(bpp)
+        if self._pending_pairs >= self.flush_pairs:
+            self.flush()
+
+    def _shard(self, shard: int) -> np.ndarray:
+        if shard not in self._shards:
+            self._shards[shard] = np.load(self.root / f'shard_{shard:05d}.npy', mmap_mode='r')
+        return self._shards[shard]
+
+    def get(self, key: str) -> SparseBPP:
+        if key in self._pending:
+            return self._pending[key]
+        shard, offset, count, n = self.index[key]
+        return SparseBPP.from_records(n, self._shard(shard)[offset:offset + count])
+
+    def flush(self):
+        """Write pending matrices as one new shard and save the index."""
+        if not self._pending:
+            return
+        shard = self._new_shard(np.concatenate([bpp.records() for bpp in self._pending.values()]))
+        offset = 0
+        for key, bpp in self._pending.items():
+            self.index[key] = (shard, offset, len(bpp), bpp.n)
+            offset += len(bpp)
+        self._pending, self._pending_pairs = {}, 0
+        with self._lock():
+            self.index = {**self._load_index(), **self.index}
+            self._save_index()
+
+    def _save_index(self):
+        """Write the index; callers hold the lock."""
+        keys = list(self.index)
+        entries = np.array([self.index[k] for k in keys], dtype=np.int64).reshape(-1, 4)
+        tmp = self.root / 'index.tmp.npz'
+        np.savez(tmp, keys=np.array(keys, dtype=str), entries=entries)
+        tmp.replace(self.root / 'index.npz')
+
+    def compact(self, shard_pairs: int = 1 << 24):
+        """Rewrite all matrices into shards of about ``shard_pairs`` pairs (merges small per-flush shards)."""
+        self.flush()
+        with self._lock():
+            self.index = self._load_index()
+            old = sorted({s for s, *_ in self.index.values()})
+            new_index, chunk, keys, offset = {}, [], [], 0
+
+            def write():
+                shard = self._new_shard(np.concatenate(chunk))
+                new_index.update({k: (shard, *new_index[k][1:]) for k in keys})
+
+            for key in list(self.index):
+                rec = self.get(key).records()
+                if offset and offset + len(rec) > shard_pairs:
+                    write()
+                    chunk, keys, offset = [], [], 0
+                new_index[key] = (-1, offset, len(rec), self.index[key][3])
+                chunk.append(rec)
+                keys.append(key)
+                offset += len(rec)
+            if chunk:
+                write()
+            self.index = new_index
+            self._save_index()
+        self._shards = {}
+        for s in old:
+            (self.root / f'shard_{s:05d}.npy').unlink(missing_ok=True)
+
+
+def test_bpp_store(tmp_path):
+    rng = np.random.default_rng(0)
+
+    def random_bpp(n):
+        P = np.triu(rng.random((n, n)) * (rng.random((n, n)) < 0.05), k=1)
+        return SparseBPP.from_dense(P, cutoff=0.01)
+
+    mats = {f'k{i}': random_bpp(30 + i) for i in range(6)}
+    a, b = BPPStore(tmp_path, flush_pairs=1 << 30), BPPStore(tmp_path, flush_pairs=1 << 30)
+    for i, (key, bpp) in enumerate(mats.items()):
+        (a if i % 2 else b).add(key, bpp)
+    a.flush()
+    b.flush()
+    a.add('k0', mats['k0'])
+    a.flush()
+    store = BPPStore(tmp_path)
+    assert len(store) == len(mats) and all(store.get(k) == v for k, v in mats.items())
+    store.compact(shard_pairs=1)
+    store = BPPStore(tmp_path)
+    assert len(store) == len(mats) and all(store.get(k) == v for k, v in mats.items())
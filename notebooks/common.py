@@ -1,3 +1,6 @@
+from pathlib import Path
+import hashlib
+import json
 import re
 import pandas as pd
 import numpy as np
@@ -53,6 +56,117 @@ def count_A_richness(seq: str) -> float:
     return seq.count(nuc) / len(seq) if len(seq) > 0 else 0.0
 
 
+NUCS = 'ACGT'
+# ASCII code -> index into NUCS (U reads as T); anything else, including encode_seqs padding, is 4
+NUC_CODES = np.full(256, 4, dtype=np.uint8)
+for _i, _n in enumerate(NUCS):
+    NUC_CODES[ord(_n)] = _i
+NUC_CODES[ord('U')] = NUCS.index('T')
+
+
+def encode_seqs(seqs):
+    """
+    Uppercased sequences as an (n, max_len) uint8 matrix of ASCII codes, 0-padded on the right,
+    plus the length of each sequence.
+    """
+    seqs = [s.upper() for s in seqs]
+    lengths = np.fromiter(map(len, seqs), dtype=np.int64, count=len(seqs))
+    width = int(lengths.max()) if len(seqs) else 0
+    mat = np.zeros((len(seqs), width), dtype=np.uint8)
+    mat[np.arange(width) < lengths[:, None]] = np.frombuffer(
+        ''.join(seqs).encode('ascii', 'replace'), dtype=np.uint8)
+    return mat, lengths
+
+
+def motif_hits(mat, *alphabets):
+    """Bool (n, L) mask of positions where a motif starts, one alphabet (bytes) per motif position."""
+    n, L = mat.shape
+    k = len(alphabets)
+    hits = np.zeros((n, L), dtype=bool)
+    if L < k:
+        return hits
+    window = np.ones((n, L - k + 1), dtype=bool)
+    for i, alphabet in enumerate(alphabets):
+        window &= np.isin(mat[:, i:L - k + 1 + i], np.frombuffer(alphabet, dtype=np.uint8))
+    hits[:, :L - k + 1] = window
+    return hits
+
+
+def greedy_motif_starts(hits, k: int = 3):
+    """
+    Non-overlapping left-to-right matches of a k-mer motif (what re.finditer finds), as a bool
+    (n, L) mask of match starts, for every row at once.
+    """
+    n, L = hits.shape
+    taken = np.zeros((n, L), dtype=bool)
+    next_free = np.zeros(n, dtype=np.int64)
+    for j in np.flatnonzero(hits.any(axis=0)):
+        take = hits[:, j] & (next_free <= j)
+        next_free[take] = j + k
+        taken[:, j] = take
+    return taken
+
+
+def chain_motif_matches(rows, starts, k: int = 3):
+    """
+    Group back-to-back motif matches (row-major sorted, e.g. from np.nonzero) into (ARN)n-style runs.
+    Returns the row, start and number of repeats of every run.
+    """
+    new_run = np.ones(len(rows), dtype=bool)
+    new_run[1:] = (rows[1:] != rows[:-1]) | (starts[1:] - starts[:-1] != k)
+    run_id = np.cumsum(new_run) - 1
+    return rows[new_run], starts[new_run], np.bincount(run_id, minlength=int(new_run.sum()))
+
+
+def _greedy_motif_runs(hits, k: int = 3):
+    """Number of non-overlapping matches and longest chain of back-to-back matches per row."""
+    rows, starts = np.nonzero(greedy_motif_starts(hits, k))
+    count = np.bincount(rows, minlength=len(hits))
+    longest = np.zeros(len(hits), dtype=np.int64)
+    run_rows, _, repeats = chain_motif_matches(rows, starts, k)
+    np.maximum.at(longest, run_rows, repeats)
+    return count, longest
+
+
+def true_runs(mask):
+    """(row, start, length) of every run of True, row-major."""
+    n, L = mask.shape
+    padded = np.zeros((n, L + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    return starts // (L + 1), starts % (L + 1), ends - starts
+
+
+def longest_true_run(mask):
+    """Length of the longest run of True in every row."""
+    rows, _, lengths = true_runs(mask)
+    longest = np.zeros(mask.shape[0], dtype=np.int64)
+    np.maximum.at(longest, rows, lengths)
+    return longest
+
+
+def motif_features(seqs: pd.Series, name_bracket: str) -> pd.DataFrame:
+    """
+    All calc_ARNs features for a sequence column in one vectorised pass (same values as the
+    per-sequence count_* functions): ARN/AAN counts, longest (ARN)n, A-richness, longest (A)n.
+    """
+    mat, lengths = encode_seqs(seqs)
+    n_ARN, ARNn = _greedy_motif_runs(motif_hits(mat, b'A', b'AG', b'ACGT'))
+    n_AAN, _ = _greedy_motif_runs(motif_hits(mat, b'A', b'A', b'ACGT'))
+    is_A = mat == ord('A')
+    An = longest_true_run(is_A)
+    safe_len = np.maximum(lengths, 1)
+    return pd.DataFrame({
+        f"ARN count ({name_bracket})": n_ARN,
+        f"AAN count ({name_bracket})": n_AAN,
+        f"ARNn count ({name_bracket})": ARNn,
+        f"A-rich % ({name_bracket})": np.where(lengths > 0, is_A.sum(axis=1) / safe_len, 0.0),
+        f"(A)n count ({name_bracket})": An,
+        f"(A)n count norm ({name_bracket})": np.where(lengths > 0, An / safe_len, 0.0),
+    }, index=seqs.index)
+
+
 def test_count_ARNn():
     assert count_ARNn("AAGAAGAT") == 2
     assert count_ARNn("ccAGgAtNAGGxx") == 1
@@ -61,6 +175,14 @@ def test_count_ARNn():
     assert count_ARNn("AATAGCAGGGAGG") == 3
 
 
+def test_motif_features():
+    seqs = pd.Series(["AAGAAGAT", "ccAGgAtNAGGxx", "AGGAGGA", "AAAA", "AATAGCAGGGAGG", "", "AAAAAAAG", "uuAAU"])
+    feats = motif_features(seqs, 'seq')
+    for fn, col in [(count_ARN_motifs, 'ARN count'), (count_AAN_motifs, 'AAN count'), (count_ARNn, 'ARNn count'),
+                    (count_A_richness, 'A-rich %'), (count_An, '(A)n count'), (count_An_norm, '(A)n count norm')]:
+        assert np.allclose(seqs.apply(fn).to_numpy(), feats[f'{col} (seq)'].to_numpy()), col
+
+
 def drop_subheader(df):
     df = df.T.reset_index(drop=True).set_index(0).T
     df = df[df.index.notna()]
@@ -68,7 +190,72 @@ def drop_subheader(df):
     return df
 
 
+def file_digest(fn, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha1()
+    with open(fn, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class CachedExcelFile:
+    """
+    Drop-in for pd.ExcelFile(fn).parse / .sheet_names that converts every parsed sheet once into
+    <cache_dir>/<workbook>.<hash>/<sheet>.parquet (pickle if pyarrow can't store a column), keyed by
+    the workbook's content hash and the parse arguments. The workbook is only opened on a cache miss.
+    """
+
+    def __init__(self, fn, cache_dir=None):
+        if isinstance(fn, pd.ExcelFile):
+            self._excel_file, fn = fn, getattr(fn, '_io', getattr(fn, 'io', None))
+        else:
+            self._excel_file = None
+        self.fn = Path(fn)
+        self.digest = file_digest(self.fn)[:16]
+        self.cache_dir = Path(cache_dir or self.fn.parent / '.excel_cache') / f'{self.fn.stem}.{self.digest}'
+
+    @property
+    def excel_file(self) -> pd.ExcelFile:
+        if self._excel_file is None:
+            self._excel_file = pd.ExcelFile(self.fn)
+        return self._excel_file
+
+    @property
+    def sheet_names(self) -> list:
+        fn_names = self.cache_dir / 'sheet_names.json'
+        if fn_names.exists():
+            return json.loads(fn_names.read_text())
+        names = self.excel_file.sheet_names
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fn_names.write_text(json.dumps(names))
+        return names
+
+    def _cache_path(self, sheet_name, kwargs, suffix: str) -> Path:
+        key = re.sub(r'[^\w.-]+', '_', str(sheet_name))
+        if kwargs:
+            key += '.' + hashlib.sha1(repr(sorted(kwargs.items())).encode()).hexdigest()[:8]
+        return self.cache_dir / (key + suffix)
+
+    def parse(self, sheet_name=0, **kwargs) -> pd.DataFrame:
+        fn_parquet, fn_pickle = (self._cache_path(sheet_name, kwargs, s) for s in ('.parquet', '.pkl'))
+        if fn_parquet.exists():
+            return pd.read_parquet(fn_parquet)
+        if fn_pickle.exists():
+            return pd.read_pickle(fn_pickle)
+        df = self.excel_file.parse(sheet_name, **kwargs)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            df.to_parquet(fn_parquet)
+        except (ImportError, ValueError, TypeError):
+            # Columns mixing numbers and text (e.g. sub-headers) can't be written by pyarrow
+            fn_parquet.unlink(missing_ok=True)
+            df.to_pickle(fn_pickle)
+        return df
+
+
 def load_df_Reis(excel_file, sheet_name_proteins: str):
+    if not isinstance(excel_file, CachedExcelFile):
+        excel_file = CachedExcelFile(excel_file)
     df = pd.concat([excel_file.parse(sheet_name_proteins, index_col=0),
                     excel_file.parse('RBS Calculator v2.1', index_col=0)], axis=1)
     df = df.loc[:, ~df.T.duplicated()]
@@ -94,12 +281,9 @@ def load_df_Reis(excel_file, sheet_name_proteins: str):
     df = df[~df['5pUTR'].isna()]
 
     def calc_ARNs(df, seq_key: str, name_bracket: str):
-        df[f"ARN count ({name_bracket})"] = df[seq_key].apply(count_ARN_motifs)
-        df[f"AAN count ({name_bracket})"] = df[seq_key].apply(count_AAN_motifs)
-        df[f"ARNn count ({name_bracket})"] = df[seq_key].apply(count_ARNn)
-        df[f"A-rich % ({name_bracket})"] = df[seq_key].apply(count_A_richness)
-        df[f"(A)n count ({name_bracket})"] = df[seq_key].apply(count_An)
-        df[f"(A)n count norm ({name_bracket})"] = df[seq_key].apply(count_An_norm)
+        feats = motif_features(df[seq_key], name_bracket)
+        for k in feats.columns:
+            df[k] = feats[k]
         return df
     
     df = calc_ARNs(df, 'used_mRNA_sequence', 'mRNA')
@@ -121,6 +305,7 @@ def load_df_Reis(excel_file, sheet_name_proteins: str):
 
 def main():
     test_count_ARNn()
+    test_motif_features()
     
     
 if __name__ == "__main__":
@@ -0,0 +1,142 @@
+"""
+Approximate sRNA-target interaction energies from ungapped nearest-neighbour helices, in NumPy.
+
+For every target in a batch and every antiparallel alignment (anti-diagonal i + j = c of the
+sRNA x target pairing matrix) the stacking energies of consecutive pairs are computed at once, and
+a minimum-sum segment scan along the diagonals (Kadane, with terminal AU/GU penalties at the helix
+ends) finds the best contiguous helix. E = DUPLEX_INIT + stacks + end penalties (Turner 2004,
+nn_params); no loops, bulges, dangles or accessibility, so it is a fast lower-bound style
+score for ranking and prefiltering rather than a replacement for IntaRNA's E.
+
+Rows use IntaRNA's CSV columns (target = id1 / start1 / end1, query = id2 / start2 / end2,
+0-based inclusive), so the scorer can stand in for IntaRNA via intarna_runner.run_interactions.
+
+    rows = run_duplex_scan({'SynChiX': 'ACG...'}, {'ompF': '...', 'chiP': '...'})
+"""
+import numpy as np
+
+from nucleotides import PackedSeq
+from nn_params import PAIR_TYPE, STACK, DUPLEX_INIT, TERMINAL_AU
+
+
+# Pair types with code 4 for padding / N, which never pairs
+_PT = np.full((5, 5), -1, dtype=np.int8)
+_PT[:4, :4] = PAIR_TYPE
+_STACK = np.full((7, 7), np.inf, dtype=np.float32)     # index 6 = no pair
+_STACK[:6, :6] = STACK
+_END_PENALTY = np.array([0, 0, TERMINAL_AU, TERMINAL_AU, TERMINAL_AU, TERMINAL_AU, np.inf], dtype=np.float32)
+
+
+def encode(seq) -> np.ndarray:
+    """0-3 codes, 4 for N / anything that can't pair."""
+    p = seq if isinstance(seq, PackedSeq) else PackedSeq.from_str(str(seq))
+    codes = p.codes().astype(np.int8)
+    codes[p.masked()] = 4
+    return codes
+
+
+def encode_batch(seqs: list) -> np.ndarray:
+    """(n, max_len) codes, right-padded with 4."""
+    width = max((len(s) for s in seqs), default=0)
+    out = np.full((len(seqs), width), 4, dtype=np.int8)
+    for row, s in zip(out, seqs):
+        codes = encode(s)
+        row[:len(codes)] = codes
+    return out
+
+
+def best_helices(query: np.ndarray, targets: np.ndarray) -> dict:
+    """
+    Best ungapped helix between one encoded query (m,) and every row of encoded targets (B, n).
+    Returns arrays E (inf if no helix of >= 2 bp), start1, end1 (target), start2, end2 (query).
+    Pair types are built one query row at a time, so memory stays O(B * (m + n)).
+    """
+    B, n = targets.shape
+    m = len(query)
+    C = m + n - 1                                                          # anti-diagonals c = i + j
+    cur = np.full((B, C), np.inf, dtype=np.float32)                        # best helix ending at pair i
+    cur_start = np.zeros((B, C), dtype=np.int64)
+    best = np.full((B, C), np.inf, dtype=np.float32)
+    best_start = np.zeros((B, C), dtype=np.int64)
+    best_end = np.zeros((B, C), dtype=np.int64)
+    cols = np.arange(n)
+    pair_next = _reversed_type(targets, query[0])                          # (B, n): pair (0, j)
+    for i in range(m - 1):
+        pair, pair_next = pair_next, _reversed_type(targets, query[i + 1])
+        # stack of pair (i, j) on (i + 1, j - 1), on diagonal c = i + j, for j = 1 .. n - 1
+        s = np.full((B, C), np.inf, dtype=np.float32)
+        start_cost = np.full((B, C), np.inf, dtype=np.float32)
+        finish = np.full((B, C), np.inf, dtype=np.float32)
+        c = i + cols[1:]
+        s[:, c] = _STACK[pair[:, 1:], _reversed_type(query[i + 1], targets[:, :-1])]
+        start_cost[:, c] = _END_PENALTY[pair[:, 1:]]
+        finish[:, c] = _END_PENALTY[pair_next[:, :-1]]
+        extend, restart = cur + s, start_cost + s
+        cur_start = np.where(extend <= restart, cur_start, i)
+        cur = np.minimum(extend, restart)
+        total = cur + finish
+        better = total < best
+        best = np.where(better, total, best)
+        best_start = np.where(better, cur_start, best_start)
+        best_end = np.where(better, i + 1, best_end)
+    diag = np.argmin(best, axis=1)
+    rows = np.arange(B)
+    E = best[rows, diag] + DUPLEX_INIT
+    start2, end2 = best_start[rows, diag], best_end[rows, diag]
+    return {'E': E, 'start1': diag - end2, 'end1': diag - start2, 'start2': start2, 'end2': end2}
+
+
+def _reversed_type(k: int, l: np.ndarray) -> np.ndarray:
+    """Type of the inner pair read as (l, k): target base l, query base k; 6 if they can't pair."""
+    t = _PT[l, k]
+    return np.where(t < 0, 6, t)
+
+
+def run_duplex_scan(query: dict, target: dict, batch_size: int = 256, min_bp: int = 2) -> list:
+    """
+    Best helix for every query x target pair, as IntaRNA-style rows (id1 = target, id2 = query).
+    Pairs without a helix of at least ``min_bp`` base pairs are omitted.
+    """
+    names = list(target)
+    seqs = list(target.values())
+    rows = []
+    for q_name, q_seq in query.items():
+        q = encode(q_seq)
+        if len(q) < 2:
+            continue
+        for b in range(0, len(seqs), batch_size):
+            batch = encode_batch(seqs[b:b + batch_size])
+            if batch.shape[1] < 2:
+                continue
+            res = best_helices(q, batch)
+            for k in np.flatnonzero(np.isfinite(res['E']) & (res['end2'] - res['start2'] + 1 >= min_bp)):
+                rows.append({'id1': names[b + k], 'id2': q_name, 'E': round(float(res['E'][k]), 2),
+                             'start1': int(res['start1'][k]), 'end1': int(res['end1'][k]),
+                             'start2': int(res['start2'][k]), 'end2': int(res['end2'][k])})
+    return rows
+
+
+def test_best_helices_brute_force():
+    from nn_params import stack_energy
+    rng = np.random.default_rng(0)
+
+    def helix(q, t, a, b, c):
+        """Energy of query a..b paired with target c - a .. c - b, or inf."""
+        i = np.arange(a, b)
+        if min(c - b, c - a) < 0 or c - a >= len(t):
+            return np.inf
+        e = stack_energy(q[i], t[c - i], q[i + 1], t[c - i - 1]).sum()
+        ends = _END_PENALTY[_reversed_type(t[c - a], q[a])] + _END_PENALTY[_reversed_type(t[c - b], q[b])]
+        return DUPLEX_INIT + e + ends
+
+    query = encode(''.join(rng.choice(list('ACGU'), 12)))
+    seqs = [''.join(rng.choice(list('ACGU'), int(rng.integers(2, 25)))) for _ in range(30)]
+    res = best_helices(query, encode_batch(seqs))
+    for k, seq in enumerate(seqs):
+        t = encode(seq)
+        m = len(query)
+        E = min(helix(query, t, a, b, c) for a in range(m) for b in range(a + 1, m) for c in range(m + len(t) - 1))
+        assert np.isclose(res['E'][k], E) or (np.isinf(E) and np.isinf(res['E'][k]))
+        if np.isfinite(E):
+            a, b, c = res['start2'][k], res['end2'][k], res['start1'][k] + res['end2'][k]
+            assert res['end1'][k] == c - a and np.isclose(helix(query, t, a, b, c), E)
@@ -0,0 +1,230 @@
+"""
+Memoised ViennaRNA folding.
+
+MFE structures / energies (RNA.fold, RNA.cofold with 'A&B' sequences) and base-pair probability
+matrices are keyed by (sequence hash, kind, model options such as temperature or dangles), kept in
+an in-memory LRU and persisted to a SQLite store (structures) and memory-mapped bpp_sparse shards
+(pair probabilities, float16 above ``bpp_cutoff``), so re-running an analysis does not refold
+sequences it has already seen and never builds dense n x n matrices. Model options are RNA.md
+attributes. Pair probabilities are written in batches: by fold_many, once the store's buffer is
+full, and on close() / interpreter exit.
+
+    fs = FoldService()                              # store: data/.fold_cache/folds.sqlite
+    structure, mfe = fs.fold(seq)                   # as RNA.fold(seq) / fold_compound(seq).mfe()
+    structure, mfe = fs.cofold(srna, mrna)          # as RNA.cofold(srna + '&' + mrna)
+    P = fs.bpp(seq, temperature=30)                 # bpp_sparse.SparseBPP, pairs with p >= 1e-5
+    pu = fs.unpaired(seq)                           # P.unpaired()
+    results = fs.fold_many(seqs, workers=8)         # unseen sequences folded in a process pool
+
+    from fold_service import fold                   # shared default service
+    structure, mfe = fold(seq)
+"""
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import json
+import sqlite3
+import weakref
+import numpy as np
+
+from seq_intern import seq_hash
+from bpp_sparse import SparseBPP, BPPStore, BPP_CUTOFF, bpp_from_sequence
+
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / 'data' / '.fold_cache'
+KINDS = ('mfe', 'cofold', 'bpp')
+
+SCHEMA_VERSION = 2         # 1: bpp matrices as dense blobs in a 'data' column, 2: bpp in BPPStore shards
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS folds (
+    key TEXT PRIMARY KEY, kind TEXT NOT NULL, structure TEXT, energy REAL);
+"""
+
+
+def model_details(**options):
+    import RNA
+    md = RNA.md()
+    for k, v in options.items():
+        if not hasattr(md, k):
+            raise ValueError(f'Unknown ViennaRNA model option {k}')
+        setattr(md, k, v)
+    return md
+
+
+def open_store(fn) -> sqlite3.Connection:
+    """Open (or create) the SQLite store, migrating older schemas to SCHEMA_VERSION."""
+    conn = sqlite3.connect(fn)
+    if conn.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(folds)')]
+        with conn:
+            if columns and columns != ['key', 'kind', 'structure', 'energy']:
+                # version 1: keep the MFE rows, drop the dense bpp blobs (refolded into shards on demand)
+                conn.execute('ALTER TABLE folds RENAME TO folds_v1')
+                conn.execute(SCHEMA)
+                conn.execute("INSERT INTO folds SELECT key, kind, structure, energy FROM folds_v1 WHERE kind != 'bpp'")
+                conn.execute('DROP TABLE folds_v1')
+            conn.execute(SCHEMA)
+            conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    return conn
+
+
+def fold_key(seq: str, kind: str, options: dict) -> str:
+    return f'{kind}:{seq_hash(seq)}:{json.dumps(options, sort_keys=True)}'
+
+
+def compute(seq: str, kind: str = 'mfe', options: dict = None):
+    """
+    One uncached ViennaRNA call: (structure, mfe) for 'mfe' / 'cofold', a SparseBPP of the pairs
+    with probability >= options['bpp_cutoff'] (default BPP_CUTOFF) for 'bpp'.
+    """
+    import RNA
+    options = dict(options or {})
+    cutoff = options.pop('bpp_cutoff', BPP_CUTOFF)
+    md = model_details(**options)
+    if kind in ('mfe', 'cofold'):
+        return tuple(RNA.fold_compound(seq, md).mfe())
+    if kind == 'bpp':
+        return bpp_from_sequence(seq, cutoff, md)
+    raise ValueError(f'Unknown fold kind {kind}, expected one of {KINDS}')
+
+
+def _compute_job(job):
+    return compute(*job)
+
+
+class FoldService:
+    """Folding with an LRU of ``maxsize`` results in front of the on-disk stores (``cache_dir=False``: memory only)."""
+
+    def __init__(self, cache_dir=None, maxsize: int = 4096, **options):
+        self.options = options                      # default model options, overridden per call
+        self.maxsize = maxsize
+        self._lru = OrderedDict()
+        self.conn = self.bpp_store = None
+        if cache_dir is not False:
+            cache_dir = Path(cache_dir or CACHE_DIR)
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            self.conn = open_store(cache_dir / 'folds.sqlite')
+            self.bpp_store = BPPStore(cache_dir / 'bpp')
+            weakref.finalize(self, self.bpp_store.flush)
+
+    def _options(self, options: dict) -> dict:
+        return {**self.options, **options}
+
+    def _remember(self, key: str, value):
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+
+    def _lookup(self, key: str):
+        if key in self._lru:
+            self._lru.move_to_end(key)
+            return self._lru[key]
+        if self.conn is None:
+            return None
+        if key.startswith('bpp:'):
+            if key not in self.bpp_store:
+                return None
+            value = self.bpp_store.get(key)
+        else:
+            row = self.conn.execute('SELECT structure, energy FROM folds WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            value = tuple(row)
+        self._remember(key, value)
+        return value
+
+    def _store(self, items: list):
+        """Save (key, kind, value) results in the LRU and the on-disk store."""
+        for key, _, value in items:
+            self._remember(key, value)
+        if self.conn is None:
+            return
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO folds VALUES (?, ?, ?, ?)',
+                                  [(key, kind, value[0], float(value[1]))
+                                   for key, kind, value in items if kind != 'bpp'])
+        for key, kind, value in items:
+            if kind == 'bpp':
+                self.bpp_store.add(key, value)
+
+    def get(self, seq: str, kind: str = 'mfe', **options):
+        options = self._options(options)
+        key = fold_key(seq, kind, options)
+        value = self._lookup(key)
+        if value is None:
+            value = compute(seq, kind, options)
+            self._store([(key, kind, value)])
+        return value
+
+    def fold(self, seq: str, **options):
+        """(structure, mfe) of a single sequence."""
+        return self.get(seq, 'mfe', **options)
+
+    def cofold(self, seq1: str, seq2: str = None, **options):
+        """(structure, mfe) of the dimer ``seq1 & seq2`` (or of an already joined 'A&B' sequence)."""
+        return self.get(seq1 if seq2 is None else f'{seq1}&{seq2}', 'cofold', **options)
+
+    def bpp(self, seq: str, **options) -> SparseBPP:
+        """Base-pair probabilities >= ``bpp_cutoff`` (an option, default BPP_CUTOFF), i < j 0-based."""
+        return self.get(seq, 'bpp', **options)
+
+    def unpaired(self, seq: str, **options) -> np.ndarray:
+        return self.bpp(seq, **options).unpaired()
+
+    def fold_many(self, seqs, kind: str = 'mfe', workers: int = None, chunksize: int = 16, **options) -> list:
+        """
+        Results for every sequence in ``seqs`` (in order). Cached ones are looked up, each distinct
+        uncached sequence is folded once over a process pool (``workers=1``: in this process).
+        """
+        options = self._options(options)
+        seqs = list(seqs)
+        keys = [fold_key(s, kind, options) for s in seqs]
+        results = {k: v for k in set(keys) if (v := self._lookup(k)) is not None}
+        todo = {k: s for k, s in zip(keys, seqs) if k not in results}
+        if todo:
+            jobs = [(s, kind, options) for s in todo.values()]
+            if workers == 1 or len(jobs) == 1:
+                values = [compute(*job) for job in jobs]
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    values = list(pool.map(_compute_job, jobs, chunksize=chunksize))
+            fresh = list(zip(todo, values))
+            self._store([(k, kind, v) for k, v in fresh])
+            if self.bpp_store is not None:
+                self.bpp_store.flush()
+            results.update(fresh)
+        return [results[k] for k in keys]
+
+    def close(self):
+        if self.bpp_store is not None:
+            self.bpp_store.flush()
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+_default = None
+
+
+def default_service() -> FoldService:
+    global _default
+    if _default is None:
+        _default = FoldService()
+    return _default
+
+
+def fold(seq: str, **options):
+    return default_service().fold(seq, **options)
+
+
+def cofold(seq1: str, seq2: str = None, **options):
+    return default_service().cofold(seq1, seq2, **options)
+
+
+def bpp(seq: str, **options) -> SparseBPP:
+    return default_service().bpp(seq, **options)
+
+
+def fold_many(seqs, kind: str = 'mfe', workers: int = None, **options) -> list:
+    return default_service().fold_many(seqs, kind, workers, **options)
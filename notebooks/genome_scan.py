@@ -0,0 +1,159 @@
+"""
+Genome-wide sRNA off-target scan with bounded memory.
+
+The genome (a nucleotides.PackedSeq) is cut into windows - around annotated start codons (GFF CDS
+features) or tiled with overlap - which are streamed in batches to an interaction backend running
+in a thread pool. At most ``max_in_flight`` batches are queued at once, hits are mapped back to
+genome coordinates, hits of the same sRNA that overlap on the same strand (e.g. from overlapping
+windows) are merged, and only the ``top_k`` strongest per sRNA are kept in a heap.
+
+    genome = read_fasta('genome_NC_010473_1.fasta')['NC_010473.1']
+    windows = windows_around_starts(genome, read_gff_starts('NC_010473.1.gff3'), upstream=150, downstream=100)
+    hits = scan_genome({'SynChiX': synchix}, windows, intarna_backend(threads=1), workers=8, top_k=100)
+
+    # skip windows without a 7-bp seed of <= -6 kcal/mol (seed_prefilter), or rank with the NumPy scorer
+    backend = prefiltered_backend(intarna_backend(), k=7, max_energy=-6)
+    backend = interaction_backend('nn')
+"""
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import partial
+import heapq
+import itertools
+import pandas as pd
+
+from intarna_runner import run_interactions, SCAN_CSVCOLS
+
+
+Window = namedtuple('Window', ['name', 'start', 'end', 'strand', 'seq'])     # genome [start, end), seq 5'->3'
+HIT_COLUMNS = ['sRNA', 'window', 'strand', 'start', 'end', 'E', 'srna_start', 'srna_end']
+
+
+def read_gff_starts(fn, feature: str = 'CDS') -> pd.DataFrame:
+    """Start codon position (0-based, first base of the codon on its strand) and name of every CDS in a GFF3."""
+    rows = []
+    with open(fn) as f:
+        for line in f:
+            if line.startswith('#') or not line.strip():
+                continue
+            cols = line.rstrip('\n').split('\t')
+            if len(cols) < 9 or cols[2] != feature:
+                continue
+            attrs = dict(a.split('=', 1) for a in cols[8].split(';') if '=' in a)
+            start, end, strand = int(cols[3]) - 1, int(cols[4]), cols[6]
+            rows.append({'name': attrs.get('gene', attrs.get('locus_tag', attrs.get('ID', f'{start}'))),
+                         'start_codon': start if strand == '+' else end - 1, 'strand': strand})
+    return pd.DataFrame(rows).drop_duplicates(subset=['start_codon', 'strand'])
+
+
+def windows_around_starts(genome, starts: pd.DataFrame, upstream: int = 150, downstream: int = 100):
+    """Windows from ``upstream`` nt before to ``downstream`` nt after each start codon, on the gene's strand."""
+    for name, pos, strand in starts[['name', 'start_codon', 'strand']].itertuples(index=False):
+        if strand == '+':
+            start, end = max(pos - upstream, 0), min(pos + downstream, len(genome))
+            yield Window(f'{name}:{pos}:+', start, end, '+', genome[start:end])
+        else:
+            start, end = max(pos + 1 - downstream, 0), min(pos + 1 + upstream, len(genome))
+            yield Window(f'{name}:{pos}:-', start, end, '-', genome[start:end].reverse_complement())
+
+
+def tile_windows(genome, size: int = 300, overlap: int = 100, both_strands: bool = True):
+    """Overlapping tiles over the whole genome (the notebook's sliding_window / overlap split)."""
+    for start, view in genome.windows(size, step=size - overlap):
+        end = start + len(view)
+        yield Window(f'{start}:{end}:+', start, end, '+', view)
+        if both_strands:
+            yield Window(f'{start}:{end}:-', start, end, '-', view.reverse_complement())
+
+
+def interaction_backend(method: str = 'intarna', **kwargs):
+    """
+    Backend running intarna_runner.run_interactions with the sRNAs as query and a batch of windows as
+    targets; ``method='nn'`` uses the NumPy helix scorer (duplex_energy) instead of IntaRNA.
+    """
+    def run(srnas: dict, targets: dict) -> list:
+        rows = run_interactions(srnas, targets, method=method, **kwargs)
+        # id1 / start1 / end1 are the target (window), id2 / start2 / end2 the query (sRNA)
+        return [{'sRNA': r['id2'], 'window': r['id1'], 'E': r['E'], 'start': r['start1'], 'end': r['end1'],
+                 'srna_start': r['start2'], 'srna_end': r['end2']} for r in rows]
+    return run
+
+
+def intarna_backend(threads: int = 1, extra_params: list = (), param_file: str = ''):
+    return interaction_backend('intarna', outcsvcols=SCAN_CSVCOLS, threads=threads, n=1,
+                               param_file=param_file, extra_params=extra_params)
+
+
+def _batches(windows, batch_size: int):
+    it = iter(windows)
+    while batch := list(itertools.islice(it, batch_size)):
+        yield batch
+
+
+def _to_genome(hit: dict, window: Window) -> dict:
+    """Window-local, 0-based inclusive hit positions -> genome [start, end) on the window's strand."""
+    if window.strand == '+':
+        start, end = window.start + hit['start'], window.start + hit['end'] + 1
+    else:
+        start, end = window.end - 1 - hit['end'], window.end - hit['start']
+    return {**hit, 'window': window.name, 'strand': window.strand, 'start': start, 'end': end}
+
+
+class TopHits:
+    """The ``k`` lowest-energy hits per sRNA, with hits overlapping on the same strand merged (best kept)."""
+
+    def __init__(self, k: int):
+        self.k = k
+        self.heaps = {}                 # sRNA -> heap of (-E, counter, hit); heap[0] is the weakest kept hit
+        self._counter = itertools.count()
+
+    def push(self, hit: dict):
+        heap = self.heaps.setdefault(hit['sRNA'], [])
+        for i, (_, _, other) in enumerate(heap):
+            if other['strand'] == hit['strand'] and other['start'] < hit['end'] and hit['start'] < other['end']:
+                if hit['E'] < other['E']:
+                    heap[i] = (-hit['E'], next(self._counter), hit)
+                    heapq.heapify(heap)
+                return
+        item = (-hit['E'], next(self._counter), hit)
+        if len(heap) < self.k:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
+    def frame(self) -> pd.DataFrame:
+        rows = [h for heap in self.heaps.values() for _, _, h in heap]
+        if not rows:
+            return pd.DataFrame(columns=HIT_COLUMNS)
+        return pd.DataFrame(rows)[HIT_COLUMNS].sort_values(['sRNA', 'E']).reset_index(drop=True)
+
+
+def scan_genome(srnas: dict, windows, backend=None, batch_size: int = 200, workers: int = 4,
+                max_in_flight: int = None, top_k: int = 50, max_energy: float = 0.0) -> pd.DataFrame:
+    """
+    Screen every sRNA against every window and return the ``top_k`` strongest merged hits per sRNA
+    (genome coordinates, columns HIT_COLUMNS). Only ``max_in_flight`` batches (default 2 x workers)
+    of windows are materialised at any time, so memory does not grow with the genome.
+    """
+    backend = backend or intarna_backend()
+    max_in_flight = max_in_flight or 2 * workers
+    top = TopHits(top_k)
+
+    def collect(future, batch):
+        by_name = {w.name: w for w in batch}
+        for hit in future.result():
+            if hit['E'] < max_energy:
+                top.push(_to_genome(hit, by_name[hit['window']]))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        for batch in _batches(windows, batch_size):
+            if len(pending) >= max_in_flight:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for f in done:
+                    collect(f, pending.pop(f))
+            targets = {w.name: str(w.seq) for w in batch}
+            pending[pool.submit(partial(backend, srnas), targets)] = batch
+        for f in list(pending):
+            collect(f, pending.pop(f))
+    return top.frame()
@@ -0,0 +1,135 @@
+"""
+Position-weight-matrix scoring of Hfq binding motifs over whole sequence tables.
+
+Hfq binds A-rich (ARN)n repeats with its distal face and U-rich stretches (such as sRNA 3' ends) with
+its proximal face. Both are modelled as log2-odds PWMs (iupac_pwm) and scored at every window of
+every sequence: sequences are 0-3 encoded into length-bucketed matrices and the PWM is added up one
+column at a time over the whole batch, so a table of thousands of transcripts is scored in seconds.
+Windows containing N or padding score -inf.
+
+    tracks = score_tracks(seqs, HFQ_MODELS['distal'])          # per-sequence score arrays (window starts)
+    top_sites(tracks[0], width=12, n=5)                        # best non-overlapping sites
+    ranking = rank_transcripts(load_sequence_tables())         # every transcript in the databases
+    ranking.query("category == 'mRNA'").head(20)               # strongest candidates for Hfq competition
+
+Positions are 0-based window starts on the sequence as given (T and U both read as U).
+"""
+import numpy as np
+import pandas as pd
+
+from common import NUCS, NUC_CODES, encode_seqs
+from motif_index import IUPAC
+
+
+def iupac_pwm(pattern: str, eps: float = 0.03, background: float = 0.25) -> np.ndarray:
+    """
+    (len(pattern), 4) log2-odds PWM of an IUPAC pattern: allowed bases share 1 - eps, the others eps
+    (N columns score 0).
+    """
+    pwm = np.zeros((len(pattern), 4))
+    for i, c in enumerate(pattern.upper()):
+        allowed = np.isin(list(NUCS), list(IUPAC[c]))
+        if allowed.all():
+            continue
+        pwm[i] = np.where(allowed, (1 - eps) / allowed.sum(), eps / (~allowed).sum())
+        pwm[i] = np.log2(pwm[i] / background)
+    return pwm.astype(np.float32)
+
+
+HFQ_MODELS = {
+    'distal': iupac_pwm('ARN' * 4),                  # (ARN)4, distal face
+    'proximal': iupac_pwm('T' * 6, eps=0.15),        # U6, proximal face (tolerates single mismatches)
+}
+
+
+def max_score(pwm: np.ndarray) -> float:
+    return float(pwm.max(axis=1).sum())
+
+
+def encode_batch(seqs) -> tuple:
+    """(n, max_len) 0-3 codes (4 for N / padding) and lengths."""
+    mat, lengths = encode_seqs(seqs)
+    return NUC_CODES[mat], lengths
+
+
+def score_matrix(codes: np.ndarray, pwm: np.ndarray) -> np.ndarray:
+    """(n, L - w + 1) scores of every window of an encoded batch; -inf where a window has N or padding."""
+    w = len(pwm)
+    n, L = codes.shape
+    if L < w:
+        return np.zeros((n, 0), dtype=np.float32)
+    ext = np.full((w, 5), -np.inf, dtype=np.float32)
+    ext[:, :4] = pwm
+    scores = np.zeros((n, L - w + 1), dtype=np.float32)
+    for j in range(w):
+        scores += ext[j][codes[:, j:L - w + 1 + j]]
+    return scores
+
+
+def _buckets(lengths: np.ndarray, batch_size: int):
+    """Index batches of similar length, so padding stays small."""
+    order = np.argsort(lengths, kind='stable')
+    for b in range(0, len(order), batch_size):
+        yield order[b:b + batch_size]
+
+
+def score_tracks(seqs, pwm: np.ndarray, batch_size: int = 512) -> list:
+    """Score track (one value per window start) of every sequence, in input order."""
+    seqs = [str(s) for s in seqs]
+    lengths = np.fromiter(map(len, seqs), dtype=np.int64, count=len(seqs))
+    tracks = [None] * len(seqs)
+    w = len(pwm)
+    for idx in _buckets(lengths, batch_size):
+        codes, _ = encode_batch([seqs[i] for i in idx])
+        scores = score_matrix(codes, pwm)
+        for row, i in enumerate(idx):
+            tracks[i] = scores[row, :max(lengths[i] - w + 1, 0)]
+    return tracks
+
+
+def top_sites(track: np.ndarray, width: int, n: int = 5, min_score: float = -np.inf) -> pd.DataFrame:
+    """The ``n`` best non-overlapping windows (start, score) with score >= min_score."""
+    order = np.argsort(-track, kind='stable')
+    order = order[track[order] >= min_score]
+    taken = np.zeros(len(track) + width, dtype=bool)
+    starts = []
+    for s in order:
+        if len(starts) == n:
+            break
+        if not taken[s:s + width].any():
+            starts.append(s)
+            taken[s:s + width] = True
+    starts = np.array(starts, dtype=np.int64)
+    return pd.DataFrame({'start': starts, 'end': starts + width, 'score': track[starts]})
+
+
+def count_sites(track: np.ndarray, width: int, min_score: float) -> int:
+    """Non-overlapping windows scoring >= min_score (greedy from the left)."""
+    count, free_from = 0, 0
+    for s in np.flatnonzero(track >= min_score):
+        if s >= free_from:
+            count += 1
+            free_from = s + width
+    return count
+
+
+def rank_transcripts(df: pd.DataFrame, seq_key: str = 'Sequence', models: dict = None,
+                     threshold: float = 0.8, batch_size: int = 512) -> pd.DataFrame:
+    """
+    Per model the best site score / start and the number of non-overlapping sites scoring at least
+    ``threshold`` x the model's maximum, added to ``df`` and sorted by 'Hfq score' (sum over models
+    of the best score relative to the model maximum).
+    """
+    models = models or HFQ_MODELS
+    out = df.copy()
+    out['Hfq score'] = 0.0
+    seqs = df[seq_key].fillna('').astype(str).tolist()
+    for name, pwm in models.items():
+        tracks = score_tracks(seqs, pwm, batch_size)
+        top = max_score(pwm)
+        best = np.array([t.max() if len(t) else -np.inf for t in tracks], dtype=np.float32)
+        out[f'{name} max'] = best
+        out[f'{name} start'] = [int(t.argmax()) if len(t) else -1 for t in tracks]
+        out[f'{name} sites'] = [count_sites(t, len(pwm), threshold * top) for t in tracks]
+        out['Hfq score'] += np.where(np.isfinite(best), best / top, 0.0)
+    return out.sort_values('Hfq score', ascending=False)
@@ -0,0 +1,283 @@
+"""
+IntaRNA as a function: the same command line the notebooks' simulate_IntaRNA_local builds
+(--outMode=C with --outcsvcols, 0-based indices, --outNumber, --threads), with query / target
+given as FASTA files or {name: sequence} dicts and the CSV output parsed into row dicts.
+
+    rows = run_intarna({'SynChiX': 'ACG...'}, 'targets.fasta', threads=4)
+    nested = rows_to_nested(rows)              # {id1: {id2: row}} like process_raw_stdout
+
+    # same rows (E, start1, end1, start2, end2) from the NumPy helix scorer instead of IntaRNA
+    rows = run_interactions(srnas, targets, method='nn')
+
+    # typed table straight from the IntaRNA pipe (or a saved CSV / stdout string), no JSON dicts
+    df = run_intarna(fasta_q, fasta_t, as_frame=True)
+    df = read_intarna_csv('inter_data_raw.csv')
+
+    # every mutant of an sRNA against one target in a single IntaRNA call, target ED cached on disk
+    scan = run_mutational_scan(wt_seq, MutantLibrary.singles(wt_seq, (10, 40)), {'ompF': ompf})
+
+    # sequences addressed by SequenceStore id (seq_intern), resolved inside the runner
+    rows = run_intarna(srna_ids, target_ids, store=store)             # id lists: FASTA names are the ids
+    rows = run_interactions({'SynChiX': srna_id}, {'ompF': ompf_id}, store=store)
+"""
+from pathlib import Path
+from subprocess import Popen, PIPE
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import pandas as pd
+
+from seq_intern import SequenceStore, seq_hash
+
+
+OUTCSVCOLS = 'id1, id2, E, E_norm, bpList, hybridDPfull, seedPu1, seedPu2, seedStart1, seedStart2, seedEnd1, seedEnd2'
+SCAN_CSVCOLS = 'id1,id2,E,start1,end1,start2,end2'
+INT_COLUMNS = {'start1', 'end1', 'start2', 'end2', 'seedStart1', 'seedEnd1', 'seedStart2', 'seedEnd2'}
+FLOAT_COLUMNS = {'E', 'E_norm', 'ED1', 'ED2', 'Pu1', 'Pu2', 'E_hybrid', 'E_init', 'E_loops', 'E_dangleL',
+                 'E_dangleR', 'E_endL', 'E_endR', 'Eall', 'Eall1', 'Eall2', 'Zall', 'P_E', 'seedE', 'seedED1',
+                 'seedED2', 'seedPu1', 'seedPu2'}
+
+
+# Column types for the typed parser. Seed columns hold ':'-separated lists when several seeds are
+# reported, so they stay strings along with bpList / hybridDP* and anything not listed here.
+CATEGORY_COLUMNS = {'id1', 'id2'}
+INT32_COLUMNS = {'start1', 'end1', 'start2', 'end2'}
+FLOAT32_COLUMNS = {c for c in FLOAT_COLUMNS if not c.startswith('seed')}
+
+
+def write_fasta(seqs: dict, fn):
+    with open(fn, 'w') as f:
+        for name, seq in seqs.items():
+            f.write(f'>{name}\n{seq}\n')
+    return fn
+
+
+def _convert(key: str, value: str):
+    try:
+        if key in INT_COLUMNS:
+            return int(value)
+        if key in FLOAT_COLUMNS:
+            return float(value)
+    except ValueError:
+        pass
+    return value
+
+
+def parse_csv_output(stdout: str) -> list:
+    """Rows of IntaRNA --outMode=C output (';'-separated, header first) as dicts."""
+    lines = [l for l in stdout.splitlines() if l.strip()]
+    if not lines:
+        return []
+    header = lines[0].split(';')
+    return [{k: _convert(k, v) for k, v in zip(header, l.split(';'))} for l in lines[1:]]
+
+
+def _column_dtypes(columns) -> dict:
+    return {c: 'category' if c in CATEGORY_COLUMNS else 'int32' if c in INT32_COLUMNS
+            else 'float32' if c in FLOAT32_COLUMNS else 'string' for c in columns}
+
+
+def iter_intarna_csv(source, chunksize: int = 100_000):
+    """
+    Typed DataFrame chunks of IntaRNA --outMode=C output. ``source`` is a path, an open text stream
+    (e.g. the IntaRNA stdout pipe) or the output as a string. Ids are categoricals, energies float32,
+    positions int32 and everything else (hybridDPfull, bpList, seed lists) strings.
+    """
+    if isinstance(source, str) and (not source or '\n' in source or ';' in source):
+        source = io.StringIO(source)
+    try:
+        reader = pd.read_csv(source, sep=';', dtype='string', chunksize=chunksize, keep_default_na=False,
+                             na_values=[''])
+        first = next(reader)
+    except (pd.errors.EmptyDataError, StopIteration):
+        return
+    dtypes = _column_dtypes(first.columns)
+    yield first.astype(dtypes)
+    for chunk in reader:
+        yield chunk.astype(dtypes)
+
+
+def read_intarna_csv(source, chunksize: int = 100_000) -> pd.DataFrame:
+    """All of iter_intarna_csv in one DataFrame (categoricals unified across chunks)."""
+    chunks = list(iter_intarna_csv(source, chunksize))
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0].reset_index(drop=True)
+    df = pd.concat([c.astype({k: 'string' for k in CATEGORY_COLUMNS & set(c.columns)}) for c in chunks],
+                   ignore_index=True)
+    return df.astype({k: 'category' for k in CATEGORY_COLUMNS & set(df.columns)})
+
+
+def frame_to_nested(df: pd.DataFrame) -> dict:
+    """Legacy {id1: {id2: row dict}} view of a typed table, as process_raw_stdout / the JSON outputs."""
+    return rows_to_nested(df.astype(object).where(df.notna(), None).to_dict('records'))
+
+
+def rows_to_nested(rows: list) -> dict:
+    nested = {}
+    for row in rows:
+        nested.setdefault(row['id1'], {})[row['id2']] = row
+    return nested
+
+
+def resolve_sequences(seqs, store: SequenceStore = None):
+    """
+    {name: sequence} from a {name: sequence} dict or, with a SequenceStore, from store ids: a list of
+    ids (each named by its id) or a {name: id} dict. Values that are not ids in ``store`` pass through
+    as sequences; FASTA paths are returned unchanged.
+    """
+    if store is None or isinstance(seqs, (str, Path)):
+        return seqs
+    if not isinstance(seqs, dict):
+        return {h: store.get(h) for h in seqs}
+    return {name: store.get(v) if v in store else v for name, v in seqs.items()}
+
+
+def run_intarna(query, target, outcsvcols: str = OUTCSVCOLS, threads: int = 1, n: int = 1,
+                qidxpos0: int = 0, tidxpos0: int = 0, param_file: str = '', extra_params: list = (),
+                tmp_dir=None, as_frame: bool = False, store: SequenceStore = None):
+    """
+    Run IntaRNA once. ``query`` / ``target`` are FASTA paths, or {name: sequence} dicts that are written
+    to temporary FASTA files, or SequenceStore ids with ``store`` (see resolve_sequences). Note IntaRNA
+    reports the target as id1 and the query as id2.
+    Returns row dicts, or with ``as_frame`` a typed DataFrame parsed straight from the stdout pipe.
+    """
+    tmp = []
+    try:
+        inputs = []
+        for seqs in (resolve_sequences(query, store), resolve_sequences(target, store)):
+            if isinstance(seqs, dict):
+                fd, fn = tempfile.mkstemp(suffix='.fasta', dir=tmp_dir)
+                os.close(fd)
+                tmp.append(write_fasta(seqs, fn))
+                inputs.append(fn)
+            else:
+                inputs.append(str(seqs))
+        with tempfile.TemporaryFile(mode='w+', dir=tmp_dir) as stderr:
+            p = Popen(['IntaRNA', '-q', inputs[0], '-t', inputs[1],
+                       '--outMode=C', f'--outcsvcols={outcsvcols}',
+                       f'--qIdxPos0={qidxpos0}',
+                       f'--tIdxPos0={tidxpos0}',
+                       f'--outNumber={n}',
+                       f'--threads={threads}'] + ([param_file] if param_file else [])
+                      + list(extra_params), stdout=PIPE, stderr=stderr, universal_newlines=True)
+            if as_frame:
+                out = read_intarna_csv(p.stdout)
+                p.stdout.read()
+            else:
+                out = parse_csv_output(p.stdout.read())
+            p.stdout.close()
+            if p.wait():
+                stderr.seek(0)
+                raise RuntimeError(f'IntaRNA failed ({p.returncode}): {stderr.read().strip()}')
+        return out
+    finally:
+        for fn in tmp:
+            Path(fn).unlink(missing_ok=True)
+
+
+def read_fasta_dict(fn) -> dict:
+    seqs, name = {}, None
+    with open(fn) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('>'):
+                name = line[1:].split()[0] if line[1:].strip() else ''
+                seqs[name] = ''
+            elif line and name is not None:
+                seqs[name] += line
+    return seqs
+
+
+def run_interactions(query, target, method: str = 'intarna', store: SequenceStore = None, **kwargs) -> list:
+    """
+    Interaction rows from IntaRNA (``method='intarna'``, kwargs as run_intarna) or the ungapped
+    nearest-neighbour scorer in duplex_energy (``method='nn'``; best helix per pair, kwargs
+    batch_size / min_bp, IntaRNA-only options ignored). Inputs as run_intarna.
+    """
+    query, target = resolve_sequences(query, store), resolve_sequences(target, store)
+    if method == 'intarna':
+        return run_intarna(query, target, **kwargs)
+    if method == 'nn':
+        from duplex_energy import run_duplex_scan
+        query, target = (s if isinstance(s, dict) else read_fasta_dict(s) for s in (query, target))
+        return run_duplex_scan(query, target, **{k: v for k, v in kwargs.items() if k in ('batch_size', 'min_bp')})
+    raise ValueError(f'Unknown interaction method {method}')
+
+
+def _write_query_fasta(wild_type: str, mutants, fn, wt_name: str):
+    """FASTA of the wild type and every mutant; MutantLibrary variants are built one at a time."""
+    with open(fn, 'w') as f:
+        f.write(f'>{wt_name}\n{wild_type}\n')
+        for name, seq in (mutants.items() if isinstance(mutants, dict) else mutants):
+            f.write(f'>{name}\n{seq}\n')
+    return fn
+
+
+def target_accessibility_path(target_seq: str, cache_dir, param_file: str = '', extra_params: list = ()) -> Path:
+    """Cache file for a target's ED values, keyed by its sequence and the accessibility-relevant options."""
+    options = hashlib.sha1(repr((param_file, sorted(extra_params))).encode()).hexdigest()[:8]
+    return Path(cache_dir) / f'{seq_hash(target_seq)[:16]}.{options}.tAcc'
+
+
+def run_mutational_scan(wild_type: str, mutants, target: dict, wt_name: str = 'wild_type', cache_dir=None,
+                        batch_size: int = 5000, threads: int = 1, param_file: str = '', extra_params: list = (),
+                        method: str = 'intarna', store: SequenceStore = None) -> pd.DataFrame:
+    """
+    E of the wild-type sRNA and every mutant (a {name: seq} dict or a mutagenesis.MutantLibrary)
+    against a single ``target`` ({name: seq}), with dE = E - E_wt. Mutants without a predicted
+    interaction get E = 0. With ``store``, the wild type and the target may be given as store ids
+    (wild_type an id, target {name: id} or [id]).
+
+    The mutants go to IntaRNA as queries of one call per ``batch_size`` variants. The target's
+    accessibility (ED values, --out=tAcc) is computed in the first call and stored in ``cache_dir``
+    (default data/.intarna_cache); later calls and scans of the same target read it back with
+    --tAcc=E instead of refolding the target. ``method='nn'`` scores with duplex_energy (no
+    accessibility term) through run_interactions.
+    """
+    if store is not None and wild_type in store:
+        wild_type = store.get(wild_type)
+    target = resolve_sequences(target, store)
+    if len(target) != 1:
+        raise ValueError('A mutational scan runs against exactly one target')
+    (t_name, t_seq), = target.items()
+    lib_frame = mutants.frame() if hasattr(mutants, 'frame') else None
+    if method != 'intarna':
+        queries = {wt_name: wild_type, **(mutants if isinstance(mutants, dict) else dict(mutants))}
+        rows = run_interactions(queries, target, method=method)
+    else:
+        cache_dir = Path(cache_dir or Path(__file__).resolve().parent.parent / 'data' / '.intarna_cache')
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        acc_file = target_accessibility_path(t_seq, cache_dir, param_file, extra_params)
+        if hasattr(mutants, 'batches'):
+            batches = mutants.batches(batch_size)
+        else:
+            items = list(mutants.items())
+            batches = [dict(items[b:b + batch_size]) for b in range(0, len(items), batch_size)] or [{}]
+        rows = []
+        with tempfile.TemporaryDirectory(dir=cache_dir) as tmp:
+            fn_target = write_fasta(target, Path(tmp) / 'target.fasta')
+            for i, batch in enumerate(batches):
+                fn_query = _write_query_fasta(wild_type, batch, Path(tmp) / 'query.fasta', wt_name)
+                if acc_file.exists():
+                    acc = ['--tAcc=E', f'--tAccFile={acc_file}']
+                else:
+                    acc = [f'--out=tAcc:{Path(tmp) / "target.tAcc"}']
+                batch_rows = run_intarna(fn_query, fn_target, outcsvcols=SCAN_CSVCOLS, threads=threads,
+                                         param_file=param_file, extra_params=list(extra_params) + acc)
+                if not acc_file.exists() and (Path(tmp) / 'target.tAcc').exists():
+                    shutil.move(str(Path(tmp) / 'target.tAcc'), acc_file)
+                # the wild type is in every batch so all batches share its reference row
+                rows += [r for r in batch_rows if i == 0 or r['id2'] != wt_name]
+    E = {r['id2']: r['E'] for r in rows}
+    names = [wt_name] + (lib_frame['mutation_name'].tolist() if lib_frame is not None else list(mutants))
+    df = pd.DataFrame({'mutation_name': names, 'target': t_name})
+    df['E'] = df['mutation_name'].map(E).fillna(0.0).astype('float32')
+    df['dE'] = df['E'] - df['E'].iloc[0]
+    if lib_frame is not None:
+        df = df.merge(lib_frame, on='mutation_name', how='left')
+        df['count'] = df['count'].fillna(0).astype(int)
+    return df
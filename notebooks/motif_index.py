@@ -0,0 +1,248 @@
+"""
+k-mer spectrum and motif position index over the sRNA / mRNA sequence tables.
+
+Sequences are encoded once; the index keeps
+    - a sparse (n_seqs x 4^k) k-mer count matrix (overlapping counts, windows with N skipped),
+    - position postings for motifs: non-overlapping ARN / AAN matches chained into (ARN)n runs,
+      homopolymer A / U tracts and start codons, as flat (seq, start, length) arrays sorted by seq,
+so motif questions become array queries instead of regex rescans:
+
+    index = build_database_index()
+    utr_end = index.first('ATG')                               # crude 5' UTR: up to first AUG
+    hits = index.count('ARN', end=utr_end) >= 3                # >= 3 ARN motifs in the 5' UTR
+    index.longest('U')                                         # longest U tract per sequence
+    index.frame().query("source == 'sRNATarBase' and category == 'sRNA'")
+
+Positions are 0-based on the DNA alphabet (U is stored as T).
+"""
+from pathlib import Path
+from itertools import product
+import json
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from common import NUCS, NUC_CODES, encode_seqs, motif_hits, greedy_motif_starts, chain_motif_matches, true_runs
+
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data' / 'sRNA'
+FN_MERGED = DATA_DIR / 'merged_EcoCyc_RNAInter.csv'
+FN_TARBASE = DATA_DIR / 'sRNATarBase' / 'sRNATarBase.csv'
+
+IUPAC = {'A': 'A', 'C': 'C', 'G': 'G', 'T': 'T', 'U': 'T', 'R': 'AG', 'Y': 'CT', 'S': 'CG', 'W': 'AT',
+         'K': 'GT', 'M': 'AC', 'B': 'CGT', 'D': 'AGT', 'H': 'ACT', 'V': 'ACG', 'N': 'ACGT'}
+
+# name -> (kind, pattern). 'chain': non-overlapping matches grouped into back-to-back runs (length in nt,
+# repeats = length // len(pattern)); 'tract': homopolymer runs; 'site': every (overlapping) occurrence.
+MOTIFS = {
+    'ARN': ('chain', 'ARN'),
+    'AAN': ('chain', 'AAN'),
+    'A': ('tract', 'A'),
+    'U': ('tract', 'T'),
+    'ATG': ('site', 'ATG'),
+}
+
+def kmer_names(k: int) -> np.ndarray:
+    return np.array([''.join(p) for p in product(NUCS, repeat=k)])
+
+
+def expand_iupac(pattern: str) -> list:
+    return [''.join(p) for p in product(*(IUPAC[c] for c in pattern.upper()))]
+
+
+def kmer_matrix(mat, lengths, k: int):
+    """Sparse (n, 4^k) overlapping k-mer counts for an encode_seqs matrix."""
+    n, L = mat.shape
+    if L < k:
+        return sp.csr_matrix((n, 4 ** k), dtype=np.int32)
+    codes = NUC_CODES[mat]
+    windows = np.lib.stride_tricks.sliding_window_view(codes, k, axis=1)
+    valid = (windows < 4).all(axis=2)
+    ids = (windows.astype(np.int64) * 4 ** np.arange(k - 1, -1, -1)).sum(axis=2)
+    rows, cols = np.nonzero(valid)
+    m = sp.coo_matrix((np.ones(len(rows), dtype=np.int32), (rows, ids[rows, cols])), shape=(n, 4 ** k))
+    return m.tocsr()
+
+
+def motif_postings(mat, kind: str, pattern: str):
+    """(seq, start, length) arrays for one MOTIFS entry."""
+    alphabets = [IUPAC[c].encode() for c in pattern]
+    if kind == 'tract':
+        return true_runs(np.isin(mat, np.frombuffer(alphabets[0], dtype=np.uint8)))
+    hits = motif_hits(mat, *alphabets)
+    if kind == 'site':
+        rows, starts = np.nonzero(hits)
+        return rows, starts, np.full(len(rows), len(pattern))
+    rows, starts = np.nonzero(greedy_motif_starts(hits, len(pattern)))
+    rows, starts, repeats = chain_motif_matches(rows, starts, len(pattern))
+    return rows, starts, repeats * len(pattern)
+
+
+class MotifIndex:
+
+    def __init__(self, meta: pd.DataFrame, lengths, kmers, k: int, postings: dict, motifs: dict = None):
+        self.meta = meta.reset_index(drop=True)
+        self.lengths = np.asarray(lengths)
+        self.kmers = kmers
+        self.k = k
+        self.postings = postings     # name -> {'seq', 'start', 'length', 'ptr', 'unit'}
+        self.motifs = motifs         # the MOTIFS-style spec the postings were built from
+
+    def __len__(self):
+        return len(self.meta)
+
+    @classmethod
+    def build(cls, meta: pd.DataFrame, seq_key: str = 'Sequence', k: int = 3, motifs: dict = None):
+        seqs = meta[seq_key].fillna('').astype(str).str.upper().str.replace('U', 'T')
+        mat, lengths = encode_seqs(seqs)
+        motifs = motifs or MOTIFS
+        postings = {}
+        for name, (kind, pattern) in motifs.items():
+            seq, start, length = motif_postings(mat, kind, pattern)
+            postings[name] = {'seq': seq.astype(np.int32), 'start': start.astype(np.int32),
+                              'length': length.astype(np.int32),
+                              'ptr': np.searchsorted(seq, np.arange(len(seqs) + 1)),
+                              'unit': 1 if kind == 'tract' else len(pattern)}
+        return cls(meta.drop(columns=seq_key), lengths, kmer_matrix(mat, lengths, k), k, postings,
+                   {name: tuple(spec) for name, spec in motifs.items()})
+
+    def frame(self) -> pd.DataFrame:
+        return self.meta.assign(length=self.lengths)
+
+    def kmer_counts(self, pattern: str) -> np.ndarray:
+        """Overlapping occurrences per sequence of a length-k pattern (IUPAC codes allowed)."""
+        if len(pattern) != self.k:
+            raise ValueError(f'Pattern {pattern} does not match index k={self.k}')
+        names = kmer_names(self.k).tolist()
+        cols = [names.index(p) for p in expand_iupac(pattern)]
+        return np.asarray(self.kmers[:, cols].sum(axis=1)).ravel()
+
+    def spectrum(self, normalise: bool = False) -> pd.DataFrame:
+        df = pd.DataFrame(self.kmers.toarray(), columns=kmer_names(self.k))
+        if normalise:
+            df = df.div(df.sum(axis=1).replace(0, 1), axis=0)
+        return df
+
+    def _clipped(self, name: str, start=0, end=None):
+        """
+        Per-posting (seq, length inside [start, end)); bounds are scalars or per-sequence arrays.
+        Chained motifs and sites only keep whole units that lie inside the region.
+        """
+        p = self.postings[name]
+        unit = p['unit']
+        lo = np.broadcast_to(start, len(self))[p['seq']]
+        hi = np.broadcast_to(self.lengths if end is None else end, len(self))[p['seq']]
+        first = p['start'] + -(-np.maximum(lo - p['start'], 0) // unit) * unit
+        clipped = np.maximum(np.minimum(p['start'] + p['length'], hi) - first, 0)
+        return p['seq'], clipped // unit * unit
+
+    def count(self, name: str, start=0, end=None) -> np.ndarray:
+        """Number of motif matches (repeats for chained motifs, tracts/sites otherwise) per sequence."""
+        seq, clipped = self._clipped(name, start, end)
+        unit = self.postings[name]['unit']
+        weights = clipped // unit if unit > 1 else (clipped > 0)
+        return np.bincount(seq, weights=weights, minlength=len(self)).astype(np.int64)
+
+    def longest(self, name: str, start=0, end=None) -> np.ndarray:
+        """Longest run per sequence, in repeats for chained motifs ((ARN)n) and nt for tracts."""
+        seq, clipped = self._clipped(name, start, end)
+        out = np.zeros(len(self), dtype=np.int64)
+        np.maximum.at(out, seq, clipped // self.postings[name]['unit'])
+        return out
+
+    def first(self, name: str) -> np.ndarray:
+        """Start of the first occurrence per sequence (sequence length if absent)."""
+        p = self.postings[name]
+        out = self.lengths.copy()
+        has = p['ptr'][1:] > p['ptr'][:-1]
+        out[has] = p['start'][p['ptr'][:-1][has]]
+        return out
+
+    def occurrences(self, name: str, i: int) -> pd.DataFrame:
+        """Postings of one sequence."""
+        p = self.postings[name]
+        sl = slice(p['ptr'][i], p['ptr'][i + 1])
+        return pd.DataFrame({'start': p['start'][sl], 'length': p['length'][sl]})
+
+    def save(self, fn):
+        arrays = {'lengths': self.lengths, 'k': self.k, 'motifs': json.dumps(self.motifs, sort_keys=True),
+                  'kmers_data': self.kmers.data, 'kmers_indices': self.kmers.indices, 'kmers_indptr': self.kmers.indptr}
+        for c in self.meta.columns:
+            # missing values as '' plus a null mask, so NaN does not come back as the string 'nan'
+            arrays[f'meta/{c}'] = self.meta[c].fillna('').astype(str).to_numpy(dtype=str)
+            arrays[f'meta_null/{c}'] = self.meta[c].isna().to_numpy()
+        for name, p in self.postings.items():
+            for key, v in p.items():
+                arrays[f'postings/{name}/{key}'] = v
+        np.savez_compressed(fn, **arrays)
+
+    @classmethod
+    def load(cls, fn):
+        with np.load(fn) as z:
+            k = int(z['k'])
+            lengths = z['lengths']
+            kmers = sp.csr_matrix((z['kmers_data'], z['kmers_indices'], z['kmers_indptr']),
+                                  shape=(len(lengths), 4 ** k))
+            meta = pd.DataFrame({f.split('/', 1)[1]: z[f] for f in z.files if f.startswith('meta/')})
+            for c in meta.columns:
+                if f'meta_null/{c}' in z.files:
+                    meta[c] = meta[c].astype(object).mask(z[f'meta_null/{c}'])
+            motifs = ({name: tuple(spec) for name, spec in json.loads(str(z['motifs'])).items()}
+                      if 'motifs' in z.files else None)
+            postings = {}
+            for f in z.files:
+                if f.startswith('postings/'):
+                    _, name, key = f.split('/')
+                    postings.setdefault(name, {})[key] = int(z[f]) if key == 'unit' else z[f]
+        return cls(meta, lengths, kmers, k, postings, motifs)
+
+
+def load_sequence_tables(fn_merged=FN_MERGED, fn_tarbase=FN_TARBASE) -> pd.DataFrame:
+    """One row per unique (source, name, sequence) from the merged EcoCyc/RNAInter table and sRNATarBase."""
+    merged = pd.read_csv(fn_merged, index_col=0)
+    merged = merged.rename(columns={'Database': 'source'})[['Name', 'Category', 'source', 'Sequence']]
+    tarbase = pd.read_csv(fn_tarbase)
+    tarbase = pd.concat([
+        tarbase[['sRNA', 'sRNA Sequence']].set_axis(['Name', 'Sequence'], axis=1).assign(Category='sRNA'),
+        tarbase[['Target', 'Target Sequence']].set_axis(['Name', 'Sequence'], axis=1).assign(Category='mRNA'),
+    ]).assign(source='sRNATarBase')
+    df = pd.concat([merged, tarbase], ignore_index=True).dropna(subset=['Sequence'])
+    df = df.drop_duplicates(subset=['source', 'Name', 'Sequence']).reset_index(drop=True)
+    return df.rename(columns={'Name': 'name', 'Category': 'category'})
+
+
+def build_database_index(fn_cache=None, k: int = 3, fn_merged=FN_MERGED, fn_tarbase=FN_TARBASE,
+                         motifs: dict = None) -> MotifIndex:
+    """
+    Index of the sRNA databases, reloaded from ``fn_cache`` (.npz) if it is newer than both sources
+    and was built with the same ``k`` and motif spec (default MOTIFS).
+    """
+    motifs = {name: tuple(spec) for name, spec in (motifs or MOTIFS).items()}
+    if fn_cache is not None and Path(fn_cache).exists():
+        mtime = Path(fn_cache).stat().st_mtime
+        if all(Path(f).stat().st_mtime < mtime for f in (fn_merged, fn_tarbase)):
+            index = MotifIndex.load(fn_cache)
+            if index.k == k and index.motifs == motifs:
+                return index
+    index = MotifIndex.build(load_sequence_tables(fn_merged, fn_tarbase), k=k, motifs=motifs)
+    if fn_cache is not None:
+        index.save(fn_cache)
+    return index
+
+
+def test_motif_index():
+    from common import count_ARN_motifs, count_AAN_motifs, count_ARNn, count_An
+    seqs = ["AAGAAGAT", "ccAGgAtNAGGxx", "AGGAGGA", "AAAA", "AATAGCAGGGAGG", "", "AAAAAAAG", "ATGAAATTTTAGA"]
+    index = MotifIndex.build(pd.DataFrame({'Sequence': seqs}))
+    for fn, got in [(count_ARN_motifs, index.count('ARN')), (count_AAN_motifs, index.count('AAN')),
+                    (count_ARNn, index.longest('ARN')), (count_An, index.longest('A'))]:
+        assert [fn(s) for s in seqs] == got.tolist(), fn.__name__
+
+
+def test_motif_index_cache(tmp_path):
+    meta = pd.DataFrame({'Sequence': ['AAGAAGAT', 'TTTTATG'], 'category': ['sRNA', np.nan]})
+    index = MotifIndex.build(meta, motifs={'A': ('tract', 'A')})
+    index.save(tmp_path / 'index.npz')
+    loaded = MotifIndex.load(tmp_path / 'index.npz')
+    assert loaded.motifs == index.motifs and loaded.meta['category'].isna().tolist() == [False, True]
+    assert loaded.longest('A').tolist() == [2, 1]
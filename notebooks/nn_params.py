@@ -0,0 +1,57 @@
+"""
+Nearest-neighbour helix parameters (Turner 2004, 37 °C, kcal/mol, as in ViennaRNA's rna_turner2004.par)
+for fast array-based duplex energies. Bases are 0-3 codes (A, C, G, U) as in nucleotides.PackedSeq.codes().
+
+STACK[p, q] is the stacking energy of pair p = (i, j) on top of the adjacent pair whose reversed
+type (l, k) is q, where k = i + 1 on the 5' strand and l is its partner, j - 1 on the 3' strand.
+"""
+import numpy as np
+
+
+PAIRS = ['CG', 'GC', 'GU', 'UG', 'AU', 'UA']
+_BASE = {'A': 0, 'C': 1, 'G': 2, 'U': 3}
+
+# PAIR_TYPE[a, b]: index into PAIRS for a 5' base a paired with a 3' base b, -1 if they can't pair
+PAIR_TYPE = np.full((4, 4), -1, dtype=np.int8)
+for _t, _p in enumerate(PAIRS):
+    PAIR_TYPE[_BASE[_p[0]], _BASE[_p[1]]] = _t
+
+STACK = np.array([
+    # CG     GC     GU     UG     AU     UA
+    [-2.40, -3.30, -2.10, -1.40, -2.10, -2.10],   # CG
+    [-3.30, -3.40, -2.50, -1.50, -2.20, -2.40],   # GC
+    [-2.10, -2.50, 1.30, -0.50, -1.40, -1.30],    # GU
+    [-1.40, -1.50, -0.50, 0.30, -0.60, -1.00],    # UG
+    [-2.10, -2.20, -1.40, -0.60, -1.10, -0.90],   # AU
+    [-2.10, -2.40, -1.30, -1.00, -0.90, -1.30],   # UA
+], dtype=np.float32)
+
+DUPLEX_INIT = 4.10          # intermolecular initiation
+TERMINAL_AU = 0.50          # per helix end closed by AU / GU
+
+# Target bases that can pair with each query base (Watson-Crick + G-U wobble)
+PARTNERS = {0: (3,), 1: (2,), 2: (1, 3), 3: (0, 2)}
+PARTNERS_WC = {0: (3,), 1: (2,), 2: (1,), 3: (0,)}
+
+
+def stack_energy(i, j, k, l):
+    """Energy of pair (i, j) stacked on (k, l), k = i + 1 and l = j - 1 (arrays of codes allowed)."""
+    p, q = PAIR_TYPE[i, j], PAIR_TYPE[l, k]
+    return np.where((p >= 0) & (q >= 0), STACK[p, q], np.inf)
+
+
+def helix_energy(top, bottom) -> np.ndarray:
+    """
+    Stacking energy of helices where top[..., m] (5'->3') pairs with bottom[..., m] (read 3'->5', i.e.
+    the partner strand reversed). Works on the last axis of equal-shape code arrays; inf if any
+    position can't pair. No initiation or terminal penalties.
+    """
+    top, bottom = np.asarray(top), np.asarray(bottom)
+    return stack_energy(top[..., :-1], bottom[..., :-1], top[..., 1:], bottom[..., 1:]).sum(axis=-1)
+
+
+def terminal_penalty(top, bottom) -> np.ndarray:
+    """TERMINAL_AU for each helix end closed by an AU or GU pair."""
+    top, bottom = np.asarray(top), np.asarray(bottom)
+    au_gu = PAIR_TYPE[top[..., [0, -1]], bottom[..., [0, -1]]] >= 2
+    return au_gu.sum(axis=-1) * TERMINAL_AU
@@ -0,0 +1,156 @@
+"""
+RBS / 5' UTR feature matrix for the RBS datasets (Salis 2009, Borujeni 2016, Reis 1014IC, ...).
+
+For each (5' UTR, CDS) pair, in one process-pool job per distinct pair:
+    MFE (5' UTR)            ViennaRNA MFE of the UTR (folded through fold_service, so shared with its cache)
+    MFE (mRNA)              MFE of the UTR plus the first ``cds_len`` nt of the CDS (the RBS calculator's window)
+    aSD dG (RBS)            RNA.duplexfold energy of the 16S rRNA 3' end (ANTI_SD) with the last ``sd_window`` nt of the UTR
+    aSD start (5' UTR)      0-based start of that Shine-Dalgarno site in the UTR
+    Pu / ED (RBS)           probability that the SD site is unpaired in the mRNA window, and -RT ln Pu
+    ED (start codon)        the same for the start codon
+plus the common.motif_features counts of the UTR. Pu / ED are NaN for mRNA windows shorter than
+MIN_MRNA_LEN. Results are cached per pair (keyed by sequence hash and parameters) in a parquet file,
+so reruns and overlapping datasets only fold new pairs; the MFEs of new pairs are folded first with
+fold_service.fold_many, and the pair jobs read them back from its store.
+
+    df = load_df_Reis(excel_file, '1014IC')
+    X = rbs_feature_matrix(df, utr_col='5pUTR', cds_col='predicted_CDS_2.0', workers=8)
+    X = rbs_feature_matrix(df_salis, mrna_col='mRNA sequence')     # UTR / CDS split at the first ATG
+    X[~X['start codon found']]                                       # no ATG after min_utr: features NaN
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import hashlib
+import json
+import numpy as np
+import pandas as pd
+
+from common import motif_features
+from fold_service import fold, fold_many
+from seq_intern import seq_hash
+
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / 'data' / '.feature_cache'
+ANTI_SD = 'ACCUCCUUA'           # 3' end of E. coli 16S rRNA
+RT = 0.61632077549
+MIN_MRNA_LEN = 20           # shorter mRNA windows get no accessibility features
+FEATURE_COLUMNS = ["MFE (5' UTR)", 'MFE (mRNA)', 'aSD dG (RBS)', "aSD start (5' UTR)", 'Pu (RBS)', 'ED (RBS)',
+                   'ED (start codon)']
+
+
+def _rna(seq: str) -> str:
+    return str(seq).upper().replace('T', 'U')
+
+
+def split_mrna(seq: str, start_codon: str = 'ATG', min_utr: int = 10):
+    """(5' UTR, CDS) of an mRNA split at the first start codon at or after ``min_utr`` (CDS '' if none)."""
+    s = str(seq).upper().replace('U', 'T')
+    i = s.find(start_codon, min_utr)
+    return (s, '') if i < 0 else (s[:i], s[i:])
+
+
+def _fold_inputs(utr: str, cds: str, cds_len: int):
+    """(UTR, CDS start, mRNA window) as RNA."""
+    utr, cds = _rna(utr), _rna(cds)[:cds_len]
+    return utr, cds, utr + cds
+
+
+def rbs_pair_features(utr: str, cds: str, cds_len: int = 35, sd_window: int = 20, anti_sd: str = ANTI_SD) -> dict:
+    """FEATURE_COLUMNS for one 5' UTR and the start of its CDS."""
+    import RNA
+    from accessibility import unpaired_profile
+    utr, cds, mrna = _fold_inputs(utr, cds, cds_len)
+    out = dict.fromkeys(FEATURE_COLUMNS, np.nan)
+    if utr:
+        out["MFE (5' UTR)"] = fold(utr)[1]
+    if not mrna:
+        return out
+    out['MFE (mRNA)'] = fold(mrna)[1]
+    tail_start = max(len(utr) - sd_window, 0)
+    sites = []
+    if len(utr) > tail_start:
+        d = RNA.duplexfold(utr[tail_start:], _rna(anti_sd))
+        site_len = d.structure.index('&')
+        sd_start = tail_start + d.i - site_len
+        out['aSD dG (RBS)'], out["aSD start (5' UTR)"] = d.energy, sd_start
+        sites.append(('RBS', sd_start, sd_start + site_len))
+    if len(cds) >= 3:
+        sites.append(('start codon', len(utr), len(utr) + 3))
+    if sites and len(mrna) >= MIN_MRNA_LEN:
+        # global partition function: window and span cover the whole mRNA window
+        P = unpaired_profile(mrna, len(mrna), len(mrna), max(e - s for _, s, e in sites))
+        for name, s, e in sites:
+            pu = float(P[s, e - s - 1])
+            if name == 'RBS':
+                out['Pu (RBS)'] = pu
+            out[f'ED ({name})'] = -RT * np.log(max(pu, 1e-30))
+    return out
+
+
+def _pair_job(job):
+    return rbs_pair_features(*job)
+
+
+def _params_digest(params: dict) -> str:
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def compute_rbs_features(pairs, workers: int = None, cache_dir=None, chunksize: int = 8, **params) -> pd.DataFrame:
+    """
+    Features of (utr, cds) pairs, indexed by pair key (sequence hash). Pairs already in the parquet
+    cache for these ``params`` (cds_len, sd_window, anti_sd) are read back, the rest computed.
+    """
+    params = {'cds_len': 35, 'sd_window': 20, 'anti_sd': ANTI_SD, **params}
+    pairs = {seq_hash(f'{u}&{c[:params["cds_len"]]}'): (u, c) for u, c in pairs}
+    fn_cache = None
+    cached = pd.DataFrame(columns=FEATURE_COLUMNS)
+    if cache_dir is not False:
+        fn_cache = Path(cache_dir or CACHE_DIR) / f'rbs_features.{_params_digest(params)}.parquet'
+        if fn_cache.exists():
+            cached = pd.read_parquet(fn_cache)
+    todo = [k for k in pairs if k not in cached.index]
+    if todo:
+        jobs = [(*pairs[k], params['cds_len'], params['sd_window'], params['anti_sd']) for k in todo]
+        seqs = set()
+        for u, c in (pairs[k] for k in todo):
+            utr, _, mrna = _fold_inputs(u, c, params['cds_len'])
+            seqs.update(s for s in (utr, mrna) if s)
+        fold_many(seqs, workers=workers)
+        if workers == 1 or len(jobs) == 1:
+            rows = [rbs_pair_features(*job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                rows = list(pool.map(_pair_job, jobs, chunksize=chunksize))
+        fresh = pd.DataFrame(rows, index=pd.Index(todo, name='key'), columns=FEATURE_COLUMNS)
+        cached = fresh if cached.empty else pd.concat([cached, fresh])
+        if fn_cache is not None:
+            fn_cache.parent.mkdir(parents=True, exist_ok=True)
+            cached.to_parquet(fn_cache)
+    return cached.loc[list(pairs)]
+
+
+def rbs_feature_matrix(df: pd.DataFrame, utr_col: str = None, cds_col: str = None, mrna_col: str = None,
+                       workers: int = None, cache_dir=None, **params) -> pd.DataFrame:
+    """
+    Feature matrix (FEATURE_COLUMNS + UTR motif features) with df's index. Give ``utr_col`` (and
+    ``cds_col`` if the CDS is a separate column) or a single ``mrna_col`` to split with split_mrna;
+    then 'start codon found' flags the rows that could be split, the others are not folded (NaN).
+    """
+    found = pd.Series(True, index=df.index)
+    if mrna_col is not None:
+        utrs, cdss = zip(*df[mrna_col].map(split_mrna)) if len(df) else ((), ())
+        utrs, cdss = pd.Series(utrs, index=df.index, dtype=str), pd.Series(cdss, index=df.index, dtype=str)
+        found = cdss != ''
+    else:
+        utrs = df[utr_col].fillna('').astype(str)
+        cdss = df[cds_col].fillna('').astype(str) if cds_col is not None else pd.Series('', index=df.index)
+    cds_len = params.get('cds_len', 35)
+    keys = [seq_hash(f'{u}&{c[:cds_len]}') for u, c in zip(utrs[found], cdss[found])]
+    feats = compute_rbs_features(zip(utrs[found], cdss[found]), workers, cache_dir, **params)
+    out = feats.loc[keys].set_axis(df.index[found]).reindex(df.index)
+    motifs = motif_features(utrs.str.upper().str.replace('U', 'T'), "5' UTR").set_axis(df.index)
+    if mrna_col is None:
+        return pd.concat([out, motifs], axis=1)
+    out = pd.concat([out, motifs.where(found)], axis=1)
+    out['start codon found'] = found
+    return out
@@ -0,0 +1,132 @@
+"""
+Streaming loader for RNAInter RNA-RNA exports (the checked-in Download_data_RR.csv subset or the
+complete dump) that never holds the whole file in memory.
+
+The export is read in chunks with explicit dtypes (categoricals for categories / species, float32
+scores), rows are filtered by species, category and score while reading, and the two sequence
+columns are replaced by seq_intern hashes (seq_id1 / seq_id2) with each distinct sequence stored once.
+build_rnainter_cache writes the result as a hive-partitioned parquet dataset plus a SequenceStore,
+reused as long as the source file and the filters are unchanged.
+
+    df, store = load_rnainter(category2='sRNA', min_score=0.2)
+    cache = build_rnainter_cache('RNAInter_full.txt', 'data/sRNA/RNAInter/cache', sep='\\t',
+                                 species1='Escherichia coli str. K-12 substr. MG1655', category2='sRNA')
+    df = read_rnainter_cache(cache, filters=[('Category1', '==', 'mRNA')])
+    store = SequenceStore.load(cache / '_sequences')
+"""
+from pathlib import Path
+from urllib.parse import quote
+import json
+import shutil
+import pandas as pd
+import pyarrow.dataset as ds
+
+from common import file_digest
+from seq_intern import SequenceStore
+
+
+NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'       # pyarrow's hive directory name for missing values
+FN_RNAINTER = Path(__file__).resolve().parent.parent / 'data' / 'sRNA' / 'RNAInter' / 'Download_data_RR.csv'
+
+RNAINTER_DTYPES = {
+    'RNAInterID': 'string',
+    'Interactor1.Symbol': 'string', 'Category1': 'category', 'Species1': 'category',
+    'Interactor2.Symbol': 'string', 'Category2': 'category', 'Species2': 'category',
+    'Raw_ID1': 'string', 'Raw_ID2': 'string',
+    'score': 'float32', 'strong': 'string', 'weak': 'string', 'predict': 'string',
+    'Sequence1': 'string', 'Sequence2': 'string',
+}
+
+
+def _as_set(value):
+    return None if value is None else {value} if isinstance(value, str) else set(value)
+
+
+def iter_rnainter(fn=FN_RNAINTER, chunksize: int = 100_000, sep: str = ',', species1=None, species2=None,
+                  category1=None, category2=None, min_score: float = None):
+    """
+    Filtered DataFrame chunks of an RNAInter export. Species / category filters take one value or a
+    list; index columns left over from earlier pandas exports are skipped.
+    """
+    filters = {'Species1': _as_set(species1), 'Species2': _as_set(species2),
+               'Category1': _as_set(category1), 'Category2': _as_set(category2)}
+    reader = pd.read_csv(fn, sep=sep, chunksize=chunksize, usecols=lambda c: c in RNAINTER_DTYPES,
+                         dtype=RNAINTER_DTYPES)
+    for chunk in reader:
+        keep = pd.Series(True, index=chunk.index)
+        for col, values in filters.items():
+            if values is not None:
+                keep &= chunk[col].isin(values)
+        if min_score is not None:
+            keep &= chunk['score'] >= min_score
+        if keep.any():
+            yield chunk[keep]
+
+
+def intern_chunk(chunk: pd.DataFrame, store: SequenceStore) -> pd.DataFrame:
+    """Replace Sequence1 / Sequence2 by their ids (seq_id1 / seq_id2) in ``store``."""
+    chunk = chunk.copy()
+    for i in (1, 2):
+        chunk[f'seq_id{i}'] = store.intern(chunk.pop(f'Sequence{i}').astype(object)).astype('string')
+    return chunk
+
+
+def load_rnainter(fn=FN_RNAINTER, store: SequenceStore = None, chunksize: int = 100_000, sep: str = ',',
+                  **filters):
+    """All filtered rows (sequences as ids) and the SequenceStore holding the sequences."""
+    store = store if store is not None else SequenceStore()
+    chunks = [intern_chunk(c, store) for c in iter_rnainter(fn, chunksize, sep, **filters)]
+    if not chunks:
+        return pd.DataFrame(columns=[c for c in RNAINTER_DTYPES if not c.startswith('Sequence')]
+                            + ['seq_id1', 'seq_id2']), store
+    df = pd.concat(chunks, ignore_index=True)
+    for col in ('Category1', 'Category2', 'Species1', 'Species2'):
+        df[col] = df[col].astype('category')
+    return df, store
+
+
+def build_rnainter_cache(fn=FN_RNAINTER, cache_dir=None, partition_on: str = 'Category1', chunksize: int = 100_000,
+                         sep: str = ',', rebuild: bool = False, **filters) -> Path:
+    """
+    Stream ``fn`` into ``cache_dir`` (default <fn dir>/<fn stem>.cache): one parquet file per chunk
+    and ``partition_on`` value under <partition_on>=<value>/ (URL-escaped as pyarrow does, NULL_PARTITION for NaN),
+    sequences in cache_dir/_sequences.*,
+    and _meta.json recording the source digest and filters. An up-to-date cache is left as is.
+    """
+    fn = Path(fn)
+    cache_dir = Path(cache_dir or fn.with_name(fn.stem + '.cache'))
+    meta = {'source': fn.name, 'digest': file_digest(fn), 'partition_on': partition_on,
+            'filters': {k: sorted(_as_set(v)) if isinstance(v, (str, list, tuple, set)) else v
+                        for k, v in filters.items()}}
+    fn_meta = cache_dir / '_meta.json'
+    if not rebuild and fn_meta.exists() and {k: v for k, v in json.loads(fn_meta.read_text()).items()
+                                            if k != 'rows'} == meta:
+        return cache_dir
+    if cache_dir.exists():
+        shutil.rmtree(cache_dir)
+    cache_dir.mkdir(parents=True)
+    store = SequenceStore()
+    n_rows = 0
+    for i, chunk in enumerate(iter_rnainter(fn, chunksize, sep, **filters)):
+        chunk = intern_chunk(chunk, store)
+        n_rows += len(chunk)
+        for value, part in chunk.groupby(partition_on, observed=True, dropna=False):
+            part_dir = cache_dir / f'{partition_on}={NULL_PARTITION if pd.isna(value) else quote(str(value), safe="")}'
+            part_dir.mkdir(exist_ok=True)
+            part.drop(columns=partition_on).astype({c: 'string' for c in ('Category1', 'Category2', 'Species1',
+                                                                          'Species2') if c != partition_on}) \
+                .to_parquet(part_dir / f'part-{i:05d}.parquet', index=False)
+    store.save(cache_dir / '_sequences')
+    fn_meta.write_text(json.dumps({**meta, 'rows': n_rows}))
+    return cache_dir
+
+
+def read_rnainter_cache(cache_dir, columns: list = None, filters: list = None) -> pd.DataFrame:
+    """Rows of a build_rnainter_cache dataset; ``filters`` are pyarrow (column, op, value) tuples."""
+    # partition values as plain strings: pyarrow cannot unify per-file dictionaries once one holds nulls
+    partitioning = ds.HivePartitioning.discover(infer_dictionary=False, null_fallback=NULL_PARTITION)
+    df = pd.read_parquet(cache_dir, columns=columns, filters=filters, partitioning=partitioning)
+    for col in ('Category1', 'Category2', 'Species1', 'Species2'):
+        if col in df:
+            df[col] = df[col].astype('string').astype('category')
+    return df
@@ -4,8 +4,11 @@ import os
 import pandas as pd
 import re
 import numpy as np 
+import shutil
 import subprocess
 
+from seq_intern import seq_hash
+
 
 BPRNA_STRUCTURE_TYPES = ["S", "H", "B", "I", "M", "X", "E", "PK", "PKBP", "NCBP", "segment"]
 
@@ -74,6 +77,12 @@ def execute_perl_script(*args):
 
 
 def run_bpRNA(sim_data, data, data_writer):
+    """
+    Annotate every sRNA-target hybrid structure with bpRNA. Sequences are looked up once per symbol,
+    and hybrids with identical sequence and structure reuse the first .st file instead of re-running.
+    """
+    seqs = data.drop_duplicates(subset=['Symbol']).set_index('Symbol')['Sequence'].to_dict()
+    done = {}
     for k1 in sim_data:
         data_writer.subdivide_writing('st')
         data_writer.subdivide_writing(k1, safe_dir_change=False)
@@ -85,11 +94,16 @@ def run_bpRNA(sim_data, data, data_writer):
             # bplist = sim_data[k1][k2]['bpList']
             # make_db(bplist, seq_len=len(db))
             db = sim_data[k1][k2]['hybridDPfull'].replace('&', '')
-            seq = data[data['Symbol'] == k1]['Sequence'].iloc[0] + \
-                data[data['Symbol'] == k2]['Sequence'].iloc[0]
+            seq = seqs[k1] + seqs[k2]
             fn = write_dbn(k1 + '_' + k2, data_writer.write_dir, id_name='arcZ', seq=seq, db=db)
+            fn_st = fn.replace('.dbn', '').replace('dbn', 'st')
+            key = (seq_hash(seq), db)
+            if key in done and os.path.isfile(done[key] + '.st'):
+                shutil.copyfile(done[key] + '.st', fn_st + '.st')
+                continue
             try:
-                execute_perl_script(fn, fn.replace('.dbn', '').replace('dbn', 'st'))
+                execute_perl_script(fn, fn_st)
+                done[key] = fn_st
             except:
                 print('Could not write', k1, k2)
     data_writer.unsubdivide()
@@ -0,0 +1,178 @@
+"""
+Seed prefilter for sRNA x target screens: only pairs with a plausible seed go to the full predictor.
+
+A seed is ``k`` consecutive base pairs (Watson-Crick, and G-U unless ``wobble=False``) between a
+window of the sRNA's seed region and the target. Targets are indexed once by their k-mers (2-bit
+ids); for each sRNA every complementary k-mer variant is enumerated with its stacking energy
+(nn_params), matched against the index with searchsorted, and the best seed per target is kept.
+Pairs without a seed at or below ``max_energy`` are discarded.
+
+    index = SeedIndex(targets, k=7)
+    seeds, stats = index.prefilter(srnas, max_energy=-5, seed_regions={'ChiX': (0, 30)})
+    stats['pruned'] -> fraction of pairs skipped
+    rows = run_prefiltered(srnas, targets, k=7, max_energy=-5, threads=4)   # IntaRNA on survivors only
+
+    # also drop seeds whose target site is hard to open (accessibility.AccessibilityProfiles)
+    rows = run_prefiltered(srnas, targets, k=7, max_energy=-5, profiles=AccessibilityProfiles(), max_seed_ed=4)
+"""
+from itertools import product
+import numpy as np
+import pandas as pd
+
+from nucleotides import PackedSeq
+from nn_params import PARTNERS, PARTNERS_WC, helix_energy
+from intarna_runner import run_intarna
+
+
+SEED_COLUMNS = ['sRNA', 'target', 'n_seeds', 'seed_E', 'srna_pos', 'target_pos']
+
+
+def kmer_ids(codes: np.ndarray, k: int) -> np.ndarray:
+    windows = np.lib.stride_tricks.sliding_window_view(codes.astype(np.int64), k)
+    return (windows << (2 * np.arange(k - 1, -1, -1))).sum(axis=1)
+
+
+def seed_variants(srna: str, k: int, region=None, wobble: bool = True):
+    """
+    Every target k-mer (as id) that can form a k-bp helix with a window of ``srna[region]``, with the
+    helix stacking energy and the sRNA window start. The lowest energy is kept per k-mer.
+    """
+    seq = PackedSeq.from_str(srna)
+    codes, masked = seq.codes(), seq.masked()
+    lo, hi = region or (0, len(seq))
+    partners = PARTNERS if wobble else PARTNERS_WC
+    ids, energies, starts = [], [], []
+    for i in range(max(lo, 0), min(hi, len(seq)) - k + 1):
+        if masked[i:i + k].any():
+            continue
+        window = codes[i:i + k]
+        # target read 5'->3' pairs with the sRNA window reversed
+        options = np.array(list(product(*(partners[c] for c in window[::-1]))), dtype=np.int64)
+        e = helix_energy(np.broadcast_to(window, options.shape), options[:, ::-1])
+        ids.append((options << (2 * np.arange(k - 1, -1, -1))).sum(axis=1))
+        energies.append(e)
+        starts.append(np.full(len(options), i))
+    if not ids:
+        return np.zeros(0, np.int64), np.zeros(0, np.float32), np.zeros(0, np.int64)
+    ids, energies, starts = np.concatenate(ids), np.concatenate(energies), np.concatenate(starts)
+    order = np.lexsort((energies, ids))
+    ids, energies, starts = ids[order], energies[order], starts[order]
+    first = np.r_[True, ids[1:] != ids[:-1]]
+    return ids[first], energies[first].astype(np.float32), starts[first]
+
+
+class SeedIndex:
+    """k-mer index over a set of target sequences."""
+
+    def __init__(self, targets: dict, k: int = 7):
+        self.k = k
+        self.names = list(targets)
+        seqs = [str(s) for s in targets.values()]
+        # One encoding pass over all targets, separated by N so no k-mer spans two targets
+        joined = PackedSeq.from_str('N'.join(seqs))
+        offsets = np.cumsum([0] + [len(s) + 1 for s in seqs])
+        codes, masked = joined.codes(), joined.masked()
+        if len(codes) < k:
+            self.ids = self.target = self.pos = np.zeros(0, dtype=np.int64)
+            return
+        ids = kmer_ids(codes, k)
+        valid = ~np.lib.stride_tricks.sliding_window_view(masked, k).any(axis=1)
+        starts = np.flatnonzero(valid)
+        self.ids = ids[valid]
+        self.target = np.searchsorted(offsets, starts, side='right') - 1
+        self.pos = starts - offsets[self.target]
+
+    def seeds(self, srna: str, region=None, wobble: bool = True, max_energy: float = None) -> pd.DataFrame:
+        """Best seed per target for one sRNA (targets without a seed are absent)."""
+        v_ids, v_energy, v_start = seed_variants(srna, self.k, region, wobble)
+        if not len(v_ids) or not len(self.ids):
+            return pd.DataFrame(columns=SEED_COLUMNS[1:])
+        idx = np.minimum(np.searchsorted(v_ids, self.ids), len(v_ids) - 1)
+        hit = v_ids[idx] == self.ids
+        energy = v_energy[idx[hit]]
+        if max_energy is not None:
+            keep = energy <= max_energy
+            hit[hit] = keep
+            energy = energy[keep]
+        df = pd.DataFrame({'target': self.target[hit], 'seed_E': energy,
+                           'srna_pos': v_start[idx[hit]], 'target_pos': self.pos[hit]})
+        n_seeds = df.groupby('target').size()
+        best = df.sort_values('seed_E', kind='stable').drop_duplicates('target').set_index('target')
+        best['n_seeds'] = n_seeds
+        best.index = [self.names[t] for t in best.index]
+        return best.rename_axis('target').reset_index()[SEED_COLUMNS[1:]]
+
+    def prefilter(self, srnas: dict, max_energy: float = None, seed_regions: dict = None, wobble: bool = True):
+        """Candidate (sRNA, target) pairs with their best seed, and pruning statistics."""
+        seed_regions = seed_regions or {}
+        found = [self.seeds(seq, seed_regions.get(name), wobble, max_energy).assign(sRNA=name)
+                 for name, seq in srnas.items()]
+        seeds = pd.concat(found, ignore_index=True)[SEED_COLUMNS] if found else pd.DataFrame(columns=SEED_COLUMNS)
+        n_pairs = len(srnas) * len(self.names)
+        stats = {'pairs': n_pairs, 'candidates': len(seeds),
+                 'pruned': 1 - len(seeds) / n_pairs if n_pairs else 0.0}
+        return seeds, stats
+
+
+def run_prefiltered(srnas: dict, targets: dict, k: int = 7, max_energy: float = None, seed_regions: dict = None,
+                    wobble: bool = True, run=run_intarna, verbose: bool = True, profiles=None,
+                    max_seed_ed: float = None, **run_kwargs) -> list:
+    """
+    Run the interaction predictor (IntaRNA by default, sRNA as query) once per sRNA on its candidate
+    targets only. Returns the predictor's rows for all surviving pairs. With accessibility
+    ``profiles`` and ``max_seed_ed``, candidates whose best seed site has a higher ED are dropped too.
+    """
+    seeds, stats = SeedIndex(targets, k).prefilter(srnas, max_energy, seed_regions, wobble)
+    if profiles is not None and max_seed_ed is not None:
+        from accessibility import annotate_seeds
+        seeds = annotate_seeds(seeds, targets, profiles, k, max_ed=max_seed_ed)
+        stats['candidates'] = len(seeds)
+        stats['pruned'] = 1 - len(seeds) / stats['pairs'] if stats['pairs'] else 0.0
+    if verbose:
+        print(f"Seed prefilter (k={k}, E <= {max_energy}): {stats['candidates']} / {stats['pairs']} pairs kept, "
+              f"{stats['pruned']:.1%} pruned")
+    rows = []
+    for name, group in seeds.groupby('sRNA', sort=False):
+        rows += run({name: srnas[name]}, {t: targets[t] for t in group['target']}, **run_kwargs)
+    return rows
+
+
+def prefiltered_backend(backend, k: int = 7, max_energy: float = None, seed_regions: dict = None,
+                        wobble: bool = True, profiles=None, max_seed_ed: float = None):
+    """Wrap a genome_scan backend so each batch of windows is seed-filtered before prediction."""
+    def run(srnas: dict, targets: dict) -> list:
+        return run_prefiltered(srnas, targets, k, max_energy, seed_regions, wobble, run=backend, verbose=False,
+                               profiles=profiles, max_seed_ed=max_seed_ed)
+    return run
+
+
+def test_seed_index_brute_force():
+    rng = np.random.default_rng(0)
+    code = {c: i for i, c in enumerate('ACGU')}
+
+    def random_seq(n):
+        return ''.join(rng.choice(list('ACGU'), n))
+
+    k, max_energy = 4, -3
+    targets = {f't{i}': random_seq(int(rng.integers(2, 60))) for i in range(20)}
+    targets['t0'] = targets['t0'][:5] + 'NN' + targets['t0'][7:]
+    srna, region = random_seq(40), (5, 30)
+    seeds = SeedIndex(targets, k).seeds(srna, region, max_energy=max_energy).set_index('target')
+    s = np.array([code[c] for c in srna])
+    for name, t in targets.items():
+        best = {}
+        for j in range(len(t) - k + 1):
+            if 'N' in t[j:j + k]:
+                continue
+            bottom = np.array([code[c] for c in t[j:j + k][::-1]])
+            e = min(helix_energy(s[i:i + k], bottom) for i in range(region[0], region[1] - k + 1))
+            if e <= max_energy:
+                best[j] = e
+        assert (name in seeds.index) == bool(best)
+        if best:
+            row = seeds.loc[name]
+            assert row['n_seeds'] == len(best)
+            assert np.isclose(row['seed_E'], min(best.values()))
+            i, j = int(row['srna_pos']), int(row['target_pos'])
+            bottom = np.array([code[c] for c in t[j:j + k][::-1]])
+            assert np.isclose(helix_energy(s[i:i + k], bottom), row['seed_E'])
@@ -0,0 +1,114 @@
+"""
+Sequence interning: every unique sequence is stored once and addressed by a stable content hash, so
+tables that repeat full sequences (RNAInter Sequence1/Sequence2, sRNATarBase 'sRNA Sequence', ...)
+only keep ids, and folding / interaction / bpRNA jobs can be deduplicated by id.
+
+Sequences are normalised (whitespace stripped, upper case, U -> T) before hashing, so the same RNA
+written as DNA or RNA gets the same id. Storage is one uint8 (ASCII) buffer plus offsets, which can
+be saved and memory-mapped back:
+
+    store = SequenceStore()
+    df['id 1'] = store.intern(df['Sequence1'])
+    store.get(df['id 1'].iloc[0]), store.view(df['id 1'].iloc[0])   # str / zero-copy uint8 view
+    store.save('data/sRNA/sequences')
+    store = SequenceStore.load('data/sRNA/sequences')                 # buffer is memory-mapped
+"""
+from pathlib import Path
+import hashlib
+import numpy as np
+import pandas as pd
+
+
+def normalise_sequence(seq: str) -> str:
+    return ''.join(str(seq).split()).upper().replace('U', 'T')
+
+
+def seq_hash(seq: str) -> str:
+    return hashlib.sha1(normalise_sequence(seq).encode()).hexdigest()
+
+
+class SequenceStore:
+
+    def __init__(self, hashes=None, offsets=None, buffer=None):
+        self.hashes = [] if hashes is None else list(hashes)
+        self._index = {h: i for i, h in enumerate(self.hashes)}
+        self._offsets = [0] if offsets is None else list(offsets)
+        self._frozen = np.zeros(0, dtype=np.uint8) if buffer is None else buffer
+        self._pending = []          # bytes appended since the buffer was last consolidated
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def __contains__(self, h):
+        return h in self._index
+
+    @property
+    def buffer(self) -> np.ndarray:
+        if self._pending:
+            self._frozen = np.concatenate([np.asarray(self._frozen)] +
+                                          [np.frombuffer(b, dtype=np.uint8) for b in self._pending])
+            self._pending = []
+        return self._frozen
+
+    @property
+    def offsets(self) -> np.ndarray:
+        return np.asarray(self._offsets, dtype=np.int64)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def add(self, seq: str) -> str:
+        seq = normalise_sequence(seq)
+        h = hashlib.sha1(seq.encode()).hexdigest()
+        if h not in self._index:
+            self._index[h] = len(self.hashes)
+            self.hashes.append(h)
+            self._pending.append(seq.encode('ascii', 'replace'))
+            self._offsets.append(self._offsets[-1] + len(seq))
+        return h
+
+    def intern(self, seqs: pd.Series) -> pd.Series:
+        """Ids for a column of sequences; each distinct string is normalised and hashed once. NaN stays NaN."""
+        codes, uniques = pd.factorize(seqs)
+        ids = np.array([self.add(s) for s in uniques] + [None], dtype=object)
+        return pd.Series(ids[codes], index=seqs.index, name=seqs.name)
+
+    def intern_mapping(self, seqs: dict) -> dict:
+        """{name: id} for a {name: sequence} dict."""
+        ids = self.intern(pd.Series(seqs, dtype=object))
+        return ids.to_dict()
+
+    def position(self, h: str) -> int:
+        return self._index[h]
+
+    def view(self, h: str) -> np.ndarray:
+        i = self._index[h]
+        return self.buffer[self._offsets[i]:self._offsets[i + 1]]
+
+    def get(self, h: str) -> str:
+        return self.view(h).tobytes().decode('ascii')
+
+    def __getitem__(self, h: str) -> str:
+        return self.get(h)
+
+    def to_fasta(self, fn, ids=None):
+        with open(fn, 'w') as f:
+            for h in (self.hashes if ids is None else ids):
+                f.write(f'>{h}\n{self.get(h)}\n')
+        return fn
+
+    def save(self, prefix):
+        """Write <prefix>.npy (sequence buffer) and <prefix>.index.npz (hashes, offsets)."""
+        prefix = Path(prefix)
+        prefix.parent.mkdir(parents=True, exist_ok=True)
+        np.save(prefix.with_name(prefix.name + '.npy'), self.buffer)
+        np.savez(prefix.with_name(prefix.name + '.index.npz'), hashes=np.array(self.hashes, dtype='U40'),
+                 offsets=self.offsets)
+
+    @classmethod
+    def load(cls, prefix, mmap: bool = True):
+        prefix = Path(prefix)
+        buffer = np.load(prefix.with_name(prefix.name + '.npy'), mmap_mode='r' if mmap else None)
+        with np.load(prefix.with_name(prefix.name + '.index.npz')) as z:
+            return cls(z['hashes'].tolist(), z['offsets'].tolist(), buffer)
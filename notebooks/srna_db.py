@@ -0,0 +1,269 @@
+"""
+One indexed SQLite store for the sRNA sources in data/sRNA (EcoCyc, RNAInter, sRNATarBase and the
+merged EcoCyc/RNAInter table), so notebooks look molecules and interactions up instead of re-reading
+and re-joining the CSVs by symbol.
+
+Tables
+    sequences    (seq_id, seq_hash, length, sequence)         deduplicated, DNA alphabet, upper case
+    molecules    (mol_id, symbol, name, category, source, source_id, seq_id, genome_position, strand)
+    aliases      (alias, alias_norm, mol_id, source)          symbols, EcoCyc names / b- / ECK-numbers,
+                                                              sRNATarBase 'sRNA Alias' / 'Target Alias'
+    interactions (int_id, srna_id, target_id, source, regulation, score, evidence_strong, evidence_weak,
+                  evidence_predict, binding_srna, binding_target, source_id)
+
+Usage:
+    db = SRNADatabase.open()                   # builds ../data/sRNA/srna.sqlite if missing or stale
+    db.molecules(alias='ECK1952')
+    db.interactions(srna='ryhB')
+    db.molecules(sequence='ATTTCTCTGAGATG...')
+"""
+from pathlib import Path
+import sqlite3
+import numpy as np
+import pandas as pd
+
+from seq_intern import SequenceStore, seq_hash
+
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data' / 'sRNA'
+FN_DB = DATA_DIR / 'srna.sqlite'
+SOURCES = {
+    'merged': DATA_DIR / 'merged_EcoCyc_RNAInter.csv',
+    'EcoCyc': DATA_DIR / 'EcoCyc' / 'EcoCyc_regulatory_RNAs.csv',
+    'RNAInter': DATA_DIR / 'RNAInter' / 'Download_data_RR.csv',
+    'sRNATarBase': DATA_DIR / 'sRNATarBase' / 'sRNATarBase.csv',
+}
+
+SCHEMA = """
+CREATE TABLE sequences (
+    seq_id INTEGER PRIMARY KEY, seq_hash TEXT NOT NULL UNIQUE, length INTEGER, sequence TEXT NOT NULL);
+CREATE TABLE molecules (
+    mol_id INTEGER PRIMARY KEY, symbol TEXT NOT NULL, name TEXT, category TEXT, source TEXT NOT NULL,
+    source_id TEXT, seq_id INTEGER REFERENCES sequences(seq_id), genome_position TEXT, strand TEXT,
+    UNIQUE (source, symbol, seq_id));
+CREATE TABLE aliases (
+    alias TEXT NOT NULL, alias_norm TEXT NOT NULL, mol_id INTEGER NOT NULL REFERENCES molecules(mol_id),
+    source TEXT, UNIQUE (alias_norm, mol_id));
+CREATE TABLE interactions (
+    int_id INTEGER PRIMARY KEY, srna_id INTEGER NOT NULL REFERENCES molecules(mol_id),
+    target_id INTEGER NOT NULL REFERENCES molecules(mol_id), source TEXT NOT NULL, regulation TEXT,
+    score REAL, evidence_strong TEXT, evidence_weak TEXT, evidence_predict TEXT,
+    binding_srna TEXT, binding_target TEXT, source_id TEXT);
+CREATE INDEX idx_molecules_symbol ON molecules (symbol COLLATE NOCASE);
+CREATE INDEX idx_molecules_seq ON molecules (seq_id);
+CREATE INDEX idx_aliases_norm ON aliases (alias_norm);
+CREATE INDEX idx_interactions_srna ON interactions (srna_id);
+CREATE INDEX idx_interactions_target ON interactions (target_id);
+"""
+
+def normalise_alias(alias: str) -> str:
+    return str(alias).strip().lower()
+
+
+def _split_aliases(s, sep: str) -> list:
+    if not isinstance(s, str):
+        return []
+    return [a.strip() for a in s.split(sep) if a.strip() and a.strip().lower() != 'nan']
+
+
+def _none_if_nan(x):
+    return None if isinstance(x, float) and np.isnan(x) else x
+
+
+# Source tables -> molecules (symbol, name, category, source, source_id, sequence, genome_position, strand,
+# aliases) and interactions (partner symbols + sequences, evidence)
+
+def read_merged(fn) -> pd.DataFrame:
+    df = pd.read_csv(fn, index_col=0)
+    return pd.DataFrame({'symbol': df['Symbol'].fillna(df['Name']), 'name': df['Name'],
+                         'category': df['Category'], 'source': df['Database'], 'source_id': df['ID'],
+                         'sequence': df['Sequence'], 'genome_position': None, 'strand': None,
+                         'aliases': [[] for _ in range(len(df))]})
+
+
+def read_ecocyc(fn, known: dict = None) -> pd.DataFrame:
+    """EcoCyc sRNAs under the same canonical symbol as alias_index (``known``: normalised alias -> symbol)."""
+    from alias_index import ecocyc_canonical, ecocyc_names  # alias_index imports this module
+    df = pd.read_csv(fn, index_col=0).drop_duplicates(subset=['Product'])
+    return pd.DataFrame({'symbol': ecocyc_canonical(df, known), 'name': df['Common-Name'], 'category': 'sRNA',
+                         'source': 'EcoCyc', 'source_id': df['Product'], 'sequence': df['Sequence - DNA sequence'],
+                         'genome_position': df['Left-End-Position'].astype(str) + '..' + df['Right-End-Position'].astype(str),
+                         'strand': df['Direction'].map({'+': 'forward', '-': 'reverse'}),
+                         'aliases': [aliases for _, aliases in ecocyc_names(df)]})
+
+
+def _oriented_rnainter(df):
+    """RNAInter rows with the sRNA as interactor 1 (swapped where only interactor 2 is an sRNA)."""
+    swap = (df['Category1'] != 'sRNA') & (df['Category2'] == 'sRNA')
+    out = df.copy()
+    for a, b in [('Interactor1.Symbol', 'Interactor2.Symbol'), ('Category1', 'Category2'),
+                 ('Raw_ID1', 'Raw_ID2'), ('Sequence1', 'Sequence2')]:
+        out.loc[swap, a], out.loc[swap, b] = df.loc[swap, b], df.loc[swap, a]
+    return out
+
+
+def read_rnainter(fn):
+    df = _oriented_rnainter(pd.read_csv(fn, index_col=0))
+    mols = pd.concat([
+        pd.DataFrame({'symbol': df[f'Interactor{i}.Symbol'], 'name': df[f'Interactor{i}.Symbol'],
+                      'category': df[f'Category{i}'], 'source': 'RNAInter', 'source_id': df[f'Raw_ID{i}'],
+                      'sequence': df[f'Sequence{i}'], 'genome_position': None, 'strand': None})
+        for i in (1, 2)])
+    mols['aliases'] = [[] for _ in range(len(mols))]
+    inter = pd.DataFrame({
+        'srna': df['Interactor1.Symbol'], 'srna_seq': df['Sequence1'],
+        'target': df['Interactor2.Symbol'], 'target_seq': df['Sequence2'],
+        'source': 'RNAInter', 'regulation': None, 'score': df['score'],
+        'evidence_strong': df['strong'], 'evidence_weak': df['weak'], 'evidence_predict': df['predict'],
+        'binding_srna': None, 'binding_target': None, 'source_id': df['RNAInterID']})
+    return mols, inter
+
+
+def read_srnatarbase(fn):
+    df = pd.read_csv(fn)
+    mols = pd.concat([
+        pd.DataFrame({'symbol': df[k], 'name': df[k], 'category': df[f'{k} Type'].fillna(default),
+                      'source': 'sRNATarBase', 'source_id': df[f'{k} ID'], 'sequence': df[f'{k} Sequence'],
+                      'genome_position': df[f'{k} Genome Position'], 'strand': df[f'{k} Strand'],
+                      'aliases': df[f'{k} Alias'].apply(_split_aliases, sep=';')})
+        for k, default in (('sRNA', 'sRNA'), ('Target', 'mRNA'))])
+    inter = pd.DataFrame({
+        'srna': df['sRNA'], 'srna_seq': df['sRNA Sequence'], 'target': df['Target'], 'target_seq': df['Target Sequence'],
+        'source': 'sRNATarBase', 'regulation': df['Regulation'], 'score': np.nan,
+        'evidence_strong': None, 'evidence_weak': None, 'evidence_predict': None,
+        'binding_srna': df['sRNA Binding Position'], 'binding_target': df['Target Binding Position'],
+        'source_id': None})
+    return mols, inter
+
+
+def build_srna_db(fn_db=FN_DB, sources: dict = None) -> Path:
+    """(Re)build the SQLite store from the source CSVs."""
+    from alias_index import known_symbols
+    sources = {**SOURCES, **(sources or {})}
+    rna_mols, rna_inter = read_rnainter(sources['RNAInter'])
+    tar_mols, tar_inter = read_srnatarbase(sources['sRNATarBase'])
+    ecocyc = read_ecocyc(sources['EcoCyc'], known_symbols(sources))
+    merged = read_merged(sources['merged'])
+    # the merged table repeats EcoCyc entries (same EcoCyc id) under their gene symbol: keep that as an alias
+    dup = (merged['source'] == 'EcoCyc') & merged['source_id'].isin(ecocyc['source_id'])
+    extra = merged[dup].groupby('source_id')['symbol'].agg(list)
+    ecocyc['aliases'] = [a + extra.get(i, []) for a, i in zip(ecocyc['aliases'], ecocyc['source_id'])]
+    mols = pd.concat([ecocyc, merged[~dup], rna_mols, tar_mols], ignore_index=True)
+    mols = mols[mols['symbol'].notna() & mols['sequence'].apply(lambda s: isinstance(s, str))].copy()
+    store = SequenceStore()
+    mols['seq_hash'] = store.intern(mols['sequence'])
+    inter = pd.concat([rna_inter, tar_inter], ignore_index=True)
+
+    fn_db = Path(fn_db)
+    fn_tmp = fn_db.with_suffix('.tmp')
+    fn_tmp.unlink(missing_ok=True)
+    con = sqlite3.connect(fn_tmp)
+    try:
+        con.executescript(SCHEMA)
+        con.executemany('INSERT INTO sequences (seq_hash, length, sequence) VALUES (?, ?, ?)',
+                        zip(store.hashes, store.lengths.tolist(), map(store.get, store.hashes)))
+        seq_ids = dict(con.execute('SELECT seq_hash, seq_id FROM sequences'))
+        mols['seq_id'] = mols['seq_hash'].map(seq_ids)
+
+        rows = mols[['symbol', 'name', 'category', 'source', 'source_id', 'seq_id', 'genome_position', 'strand']]
+        con.executemany('INSERT OR IGNORE INTO molecules (symbol, name, category, source, source_id, seq_id, '
+                        'genome_position, strand) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                        (tuple(map(_none_if_nan, r)) for r in rows.itertuples(index=False)))
+        mol_ids = {(s, sym, q): m for m, s, sym, q in con.execute('SELECT mol_id, source, symbol, seq_id FROM molecules')}
+        mols['mol_id'] = [mol_ids[k] for k in zip(mols['source'], mols['symbol'], mols['seq_id'])]
+
+        aliases = mols[['mol_id', 'source', 'symbol', 'name', 'aliases']].apply(
+            lambda r: [(a, r['mol_id'], r['source']) for a in {r['symbol'], r['name'], *r['aliases']} if isinstance(a, str)],
+            axis=1).explode().dropna()
+        con.executemany('INSERT OR IGNORE INTO aliases (alias, alias_norm, mol_id, source) VALUES (?, ?, ?, ?)',
+                        ((a, normalise_alias(a), m, s) for a, m, s in aliases))
+
+        def mol_id(source, symbol, seq):
+            return mol_ids.get((source, symbol, seq_ids.get(seq_hash(seq)))) if isinstance(seq, str) else None
+        inter['srna_id'] = [mol_id(*k) for k in zip(inter['source'], inter['srna'], inter['srna_seq'])]
+        inter['target_id'] = [mol_id(*k) for k in zip(inter['source'], inter['target'], inter['target_seq'])]
+        inter = inter.dropna(subset=['srna_id', 'target_id'])
+        cols = ['srna_id', 'target_id', 'source', 'regulation', 'score', 'evidence_strong', 'evidence_weak',
+                'evidence_predict', 'binding_srna', 'binding_target', 'source_id']
+        con.executemany(f'INSERT INTO interactions ({", ".join(cols)}) VALUES ({", ".join("?" * len(cols))})',
+                        (tuple(map(_none_if_nan, r)) for r in inter[cols].astype(object).itertuples(index=False)))
+        con.commit()
+    finally:
+        con.close()
+    fn_tmp.replace(fn_db)
+    return fn_db
+
+
+class SRNADatabase:
+
+    def __init__(self, fn_db=FN_DB):
+        self.fn_db = Path(fn_db)
+        self.con = sqlite3.connect(self.fn_db)
+
+    @classmethod
+    def open(cls, fn_db=FN_DB, sources: dict = None, rebuild: bool = False):
+        """Open the store, (re)building it first if it is missing or older than any source CSV."""
+        fn_db = Path(fn_db)
+        paths = {**SOURCES, **(sources or {})}.values()
+        if rebuild or not fn_db.exists() or any(Path(p).stat().st_mtime > fn_db.stat().st_mtime for p in paths):
+            build_srna_db(fn_db, sources)
+        return cls(fn_db)
+
+    def close(self):
+        self.con.close()
+
+    def query(self, sql: str, params=()) -> pd.DataFrame:
+        return pd.read_sql_query(sql, self.con, params=params)
+
+    def molecules(self, symbol: str = None, alias: str = None, sequence: str = None, seq_digest: str = None,
+                  source: str = None) -> pd.DataFrame:
+        """Molecules matching every given filter (symbol is case-insensitive, alias via the alias table)."""
+        where, params = [], []
+        if symbol is not None:
+            where.append('m.symbol = ? COLLATE NOCASE')
+            params.append(symbol)
+        if alias is not None:
+            where.append('m.mol_id IN (SELECT mol_id FROM aliases WHERE alias_norm = ?)')
+            params.append(normalise_alias(alias))
+        if sequence is not None or seq_digest is not None:
+            where.append('s.seq_hash = ?')
+            params.append(seq_digest or seq_hash(sequence))
+        if source is not None:
+            where.append('m.source = ?')
+            params.append(source)
+        return self.query(
+            'SELECT m.*, s.seq_hash, s.length, s.sequence FROM molecules m JOIN sequences s USING (seq_id)'
+            + (' WHERE ' + ' AND '.join(where) if where else ''), params)
+
+    def sequence_store(self) -> SequenceStore:
+        """All unique sequences as a SequenceStore (ids are the seq_hash column)."""
+        store = SequenceStore()
+        for (seq,) in self.con.execute('SELECT sequence FROM sequences ORDER BY seq_id'):
+            store.add(seq)
+        return store
+
+    def aliases(self, mol_id: int) -> list:
+        return [a for (a,) in self.con.execute('SELECT alias FROM aliases WHERE mol_id = ?', (int(mol_id),))]
+
+    def interactions(self, srna: str = None, target: str = None, source: str = None,
+                     by_alias: bool = False) -> pd.DataFrame:
+        """Interactions with both partners' symbols and sequences; srna/target match symbols (or aliases)."""
+        where, params = [], []
+        for col, value in (('srna_id', srna), ('target_id', target)):
+            if value is None:
+                continue
+            if by_alias:
+                where.append(f'i.{col} IN (SELECT mol_id FROM aliases WHERE alias_norm = ?)')
+                params.append(normalise_alias(value))
+            else:
+                where.append(f'i.{col} IN (SELECT mol_id FROM molecules WHERE symbol = ? COLLATE NOCASE)')
+                params.append(value)
+        if source is not None:
+            where.append('i.source = ?')
+            params.append(source)
+        return self.query(
+            'SELECT i.*, a.symbol AS srna, b.symbol AS target, sa.sequence AS srna_sequence, '
+            'sb.sequence AS target_sequence FROM interactions i '
+            'JOIN molecules a ON a.mol_id = i.srna_id JOIN molecules b ON b.mol_id = i.target_id '
+            'JOIN sequences sa ON sa.seq_id = a.seq_id JOIN sequences sb ON sb.seq_id = b.seq_id'
+            + (' WHERE ' + ' AND '.join(where) if where else ''), params)